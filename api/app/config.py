@@ -15,6 +15,11 @@ class Settings(BaseSettings):
     ANSIBASE_DB_USER: str = "ansibase"
     ANSIBASE_DB_PASSWORD: str = "ansibase"
 
+    # Pool de connexions : les routes synchrones tournent dans le threadpool
+    # de FastAPI (40 threads), le pool doit suivre la concurrence attendue
+    ANSIBASE_DB_POOL_SIZE: int = 20
+    ANSIBASE_DB_MAX_OVERFLOW: int = 10
+
     # Chiffrement des variables sensibles d'ansible (obligatoire, pas de valeur par défaut)
     ANSIBLE_ENCRYPTION_KEY: str
 
@@ -30,6 +35,14 @@ class Settings(BaseSettings):
     ANSIBASE_API_TITLE: str = "Ansibase API"
     ANSIBASE_API_VERSION: str = "1.0.0"
 
+    # Faire confiance à X-Forwarded-For (API derrière un reverse proxy)
+    ANSIBASE_TRUST_PROXY_HEADERS: bool = False
+    # Proxys internes a ignorer dans X-Forwarded-For (CIDR separes par des virgules)
+    ANSIBASE_TRUSTED_PROXIES: str = ""
+
+    # Écrire les logs d'audit par lots, dans un thread dédié après le commit
+    ANSIBASE_AUDIT_ASYNC: bool = False
+
     @property
     def database_url(self) -> str:
         return (
@@ -3,17 +3,34 @@ Gestion de la connexion base de données pour l'API
 Fournit le moteur SQLAlchemy et la dépendance get_db pour FastAPI
 """
 
-from typing import Generator
+from typing import Any, Generator
+
+import orjson
 from sqlalchemy import create_engine, Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from .config import settings
 
+
+def _json_serializer(obj: Any) -> str:
+    """Encode les colonnes JSON/JSONB avec orjson (SQLAlchemy attend un str)"""
+    return orjson.dumps(obj).decode()
+
+
 # moteur de sqlachemy pour l'acces a la BD
 engine: Engine = create_engine(
     settings.database_url,
     echo=False,
     pool_pre_ping=True,
+    pool_size=settings.ANSIBASE_DB_POOL_SIZE,
+    max_overflow=settings.ANSIBASE_DB_MAX_OVERFLOW,
+    # encodage/decodage JSON en C pour les colonnes JSONB (details d'audit)
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    # UPDATE/DELETE en executemany regroupes par execute_batch (psycopg2),
+    # les INSERT restent en VALUES multi-lignes
+    executemany_mode="values_plus_batch",
+    executemany_batch_page_size=500,
 )
 
 # recuperation d'un marqueur globale de session pour la connection a la base de donnees
@@ -2,22 +2,76 @@
 Dépendance de pagination pour les endpoints de liste
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Optional
 
-from fastapi import Query
+from fastapi import Query, Request, Response
+
+from app.schemas.pagination import PaginatedResponse
+
+# Borne dure sur la taille d'une page (évite les requêtes pathologiques)
+MAX_PER_PAGE = 100
 
 
 @dataclass
 class PaginationParams:
     """Paramètres de pagination extraits des query params"""
 
+    request: Request = field(repr=False)
+    response: Response = field(repr=False)
     page: int = Query(default=1, ge=1, description="Numéro de page")
-    per_page: int = Query(default=50, ge=1, le=100, description="Éléments par page")
+    per_page: int = Query(
+        default=50, ge=1, le=MAX_PER_PAGE, description="Éléments par page"
+    )
 
-    @property
+    @cached_property
     def offset(self) -> int:
         return (self.page - 1) * self.per_page
 
     @property
     def limit(self) -> int:
         return self.per_page
+
+    def pages(self, total: int) -> int:
+        """Nombre de pages pour un total donné"""
+        return (total + self.per_page - 1) // self.per_page
+
+    def _link_header(self, pages: int) -> Optional[str]:
+        """En-tête Link (RFC 8288) vers les pages precedente et suivante"""
+        links = []
+        if self.page > 1:
+            prev_url = self.request.url.include_query_params(page=self.page - 1)
+            links.append(f'<{prev_url}>; rel="prev"')
+        if self.page < pages:
+            next_url = self.request.url.include_query_params(page=self.page + 1)
+            links.append(f'<{next_url}>; rel="next"')
+        return ", ".join(links) if links else None
+
+    def paginate(self, items: list, total: int) -> PaginatedResponse:
+        """Construit la réponse paginée et renseigne l'en-tête Link (prev/next)"""
+        pages = self.pages(total)
+
+        link = self._link_header(pages)
+        if link:
+            self.response.headers["Link"] = link
+
+        return PaginatedResponse(
+            items=items,
+            total=total,
+            page=self.page,
+            per_page=self.per_page,
+            pages=pages,
+        )
+
+    def paginate_json(self, items_json: str, total: int) -> Response:
+        """Comme paginate(), pour des items déjà sérialisés en JSON (tableau)"""
+        pages = self.pages(total)
+
+        content = (
+            f'{{"items":{items_json},"total":{total},"page":{self.page},'
+            f'"per_page":{self.per_page},"pages":{pages}}}'
+        )
+        link = self._link_header(pages)
+        headers = {"Link": link} if link else None
+        return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,61 @@
+"""
+Dépendances liées à la requête HTTP entrante
+"""
+
+import ipaddress
+from typing import Optional, Union
+
+from fastapi import Request
+
+from app.config import settings
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+# reseaux des proxys internes, analyses une seule fois au chargement
+_TRUSTED_PROXIES = tuple(
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in settings.ANSIBASE_TRUSTED_PROXIES.split(",")
+    if network.strip()
+)
+
+
+def _parse_ip(value: str) -> Optional[IPAddress]:
+    """Adresse IP valide (sans zone IPv6), sinon None"""
+    value = value.strip()
+    if "%" in value:
+        return None
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def _is_trusted(address: IPAddress) -> bool:
+    return any(address in network for network in _TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Adresse IP du client, calculée une seule fois par requête.
+
+    Derrière un reverse proxy (ANSIBASE_TRUST_PROXY_HEADERS=true), l'en-tête
+    X-Forwarded-For est lu de droite à gauche : la première adresse qui n'est
+    pas un proxy de confiance (ANSIBASE_TRUSTED_PROXIES) est celle du client.
+    Les entrées de gauche, fournies par le client, ne sont jamais retenues
+    sans ce parcours ; une entrée invalide fait revenir à l'adresse du pair.
+    """
+    peer = request.client.host if request.client else None
+    if not settings.ANSIBASE_TRUST_PROXY_HEADERS:
+        return peer
+
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded:
+        return peer
+
+    for candidate in reversed(forwarded.split(",")):
+        address = _parse_ip(candidate)
+        if address is None:
+            # entree forgee ou illisible : on ne va pas plus loin
+            return peer
+        if not _is_trusted(address):
+            return str(address)
+    return peer
@@ -3,21 +3,61 @@ Fonctions de résolution id_or_name pour les endpoints
 Accepte un identifiant entier (ID) ou une chaîne (nom/clé)
 """
 
+from typing import Optional, TypeVar
+
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
 from app.models import Host, Group, Variable, User
 
+T = TypeVar("T")
+
+# cache référence -> ID dans Session.info (une session par requête)
+_CACHE_KEY = "_resolve_cache"
+
+
+def parse_ref(ref: str) -> tuple[Optional[int], str]:
+    """Analyse une référence une seule fois : (ID si numérique sinon None, référence)"""
+    return (int(ref) if ref.isdecimal() else None), ref
+
+
+def _resolve(db: Session, model: type[T], name_column, ref: str) -> Optional[T]:
+    """Résout une entité par ID ou nom en une seule requête.
+
+    Une même forme de requête sert aux deux styles de référence :
+    `WHERE id = :id OR name = :ref`, la correspondance par ID étant prioritaire.
+    Les références déjà résolues dans la session ne refont pas de requête.
+    """
+    cache = db.info.setdefault(_CACHE_KEY, {})
+
+    # reference deja resolue : l'entite est lue dans l'identity map (sans SQL),
+    # puis on verifie qu'elle porte toujours ce nom ou cet ID (renommage, suppression)
+    cached_id = cache.get((model, ref))
+    if cached_id is not None:
+        entity = db.get(model, cached_id)
+        if entity is not None and (
+            str(entity.id) == ref or getattr(entity, name_column.key) == ref
+        ):
+            return entity
+
+    maybe_id, _ = parse_ref(ref)
+    id_match = model.id == maybe_id
+    stmt = (
+        select(model)
+        .where(or_(id_match, name_column == ref))
+        .order_by(id_match.desc())
+        .limit(1)
+    )
+    entity = db.execute(stmt).scalar_one_or_none()
+    if entity is not None:
+        cache[(model, ref)] = entity.id
+    return entity
+
 
 def resolve_host(db: Session, id_or_name: str) -> Host:
     """Résout un hôte par ID ou nom"""
-    stmt = select(Host)
-    if id_or_name.isdigit():
-        stmt = stmt.where(Host.id == int(id_or_name))
-    else:
-        stmt = stmt.where(Host.name == id_or_name)
-    host = db.execute(stmt).scalar_one_or_none()
+    host = _resolve(db, Host, Host.name, id_or_name)
     if not host:
         raise HTTPException(status_code=404, detail=f"Hôte '{id_or_name}' introuvable")
     return host
@@ -25,12 +65,7 @@ def resolve_host(db: Session, id_or_name: str) -> Host:
 
 def resolve_group(db: Session, id_or_name: str) -> Group:
     """Résout un groupe par ID ou nom"""
-    stmt = select(Group)
-    if id_or_name.isdigit():
-        stmt = stmt.where(Group.id == int(id_or_name))
-    else:
-        stmt = stmt.where(Group.name == id_or_name)
-    group = db.execute(stmt).scalar_one_or_none()
+    group = _resolve(db, Group, Group.name, id_or_name)
     if not group:
         raise HTTPException(
             status_code=404, detail=f"Groupe '{id_or_name}' introuvable"
@@ -40,12 +75,7 @@ def resolve_group(db: Session, id_or_name: str) -> Group:
 
 def resolve_variable(db: Session, id_or_key: str) -> Variable:
     """Résout une variable par ID ou var_key"""
-    stmt = select(Variable)
-    if id_or_key.isdigit():
-        stmt = stmt.where(Variable.id == int(id_or_key))
-    else:
-        stmt = stmt.where(Variable.var_key == id_or_key)
-    variable = db.execute(stmt).scalar_one_or_none()
+    variable = _resolve(db, Variable, Variable.var_key, id_or_key)
     if not variable:
         raise HTTPException(
             status_code=404, detail=f"Variable '{id_or_key}' introuvable"
@@ -55,12 +85,7 @@ def resolve_variable(db: Session, id_or_key: str) -> Variable:
 
 def resolve_user(db: Session, id_or_username: str) -> User:
     """Résout un utilisateur par ID ou username"""
-    stmt = select(User)
-    if id_or_username.isdigit():
-        stmt = stmt.where(User.id == int(id_or_username))
-    else:
-        stmt = stmt.where(User.username == id_or_username)
-    user = db.execute(stmt).scalar_one_or_none()
+    user = _resolve(db, User, User.username, id_or_username)
     if not user:
         raise HTTPException(
             status_code=404, detail=f"Utilisateur '{id_or_username}' introuvable"
@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from .config import settings
 from .routers import auth, audit, groups, hosts, inventory, users, variables
@@ -14,11 +15,15 @@ from .routers import auth, audit, groups, hosts, inventory, users, variables
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Initialisation et nettoyage de l'application"""
-    # Démarrage : rien pour l'instant, les migrations Alembic gèrent le schéma
-    yield
-    # Arrêt
-    from .database import engine
+    # Démarrage : les migrations Alembic gèrent le schéma
+    from .database import SessionLocal, engine
+    from .services import audit as audit_service
 
+    if settings.ANSIBASE_AUDIT_ASYNC:
+        audit_service.start_writer(SessionLocal)
+    yield
+    # Arrêt : on vide la file d'audit avant de fermer le pool
+    audit_service.stop_writer()
     engine.dispose()
 
 
@@ -30,6 +35,8 @@ app = FastAPI(
     ),
     version=settings.ANSIBASE_API_VERSION,
     lifespan=lifespan,
+    # serialisation JSON en C (orjson) pour toutes les routes
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
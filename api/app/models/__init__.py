@@ -17,6 +17,9 @@ from ansibase.models import (
 from .user import User, ApiKey
 from .audit import AuditLog
 
+# mappers API configures au chargement du module (pas a la premiere requete)
+Base.registry.configure()
+
 __all__ = [
     # Base
     "Base",
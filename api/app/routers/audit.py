@@ -3,7 +3,6 @@ Router pour la consultation des logs d'audit
 Cas d'utilisation : 6.1
 """
 
-import math
 from datetime import datetime
 from typing import Optional
 
@@ -18,6 +17,7 @@ from app.models.audit import AuditLog
 from app.models.user import User
 from app.schemas.audit import AuditLogResponse
 from app.schemas.pagination import PaginatedResponse
+from app.services import audit as audit_service
 
 router = APIRouter(prefix="/api/v1/audit-logs", tags=["audit"])
 
@@ -35,6 +35,9 @@ def list_audit_logs(
     db: Session = Depends(get_db),
     _: User = Depends(require_superuser),
 ):
+    # les entrees d'audit de la transaction courante doivent etre visibles
+    audit_service.flush_pending(db)
+
     # on prepare les requetes avec les differents filtres
     stmt = select(AuditLog)
     count_stmt = select(func.count(AuditLog.id))
@@ -66,10 +69,4 @@ def list_audit_logs(
         .all()
     )
 
-    return PaginatedResponse(
-        items=logs,
-        total=total,
-        page=pagination.page,
-        per_page=pagination.per_page,
-        pages=math.ceil(total / pagination.per_page) if total else 0,
-    )
+    return pagination.paginate(logs, total)
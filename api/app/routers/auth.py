@@ -3,10 +3,13 @@ Router d'authentification
 Endpoint public : login par username/password
 """
 
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
+from app.dependencies.request import client_ip
 from app.schemas.user import LoginRequest, LoginResponse, UserResponse
 from app.services import user as user_service
 
@@ -17,16 +20,16 @@ router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 def login(
     # corps, parametres de la requete
     body: LoginRequest,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
 ):
     """Authentification par username/password. Retourne la clé API par défaut."""
     user, decrypted_key = user_service.authenticate_user(
         db,
         username=body.username,
         password=body.password,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
     return LoginResponse(
         user=UserResponse.model_validate(user),
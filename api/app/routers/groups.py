@@ -2,15 +2,16 @@
 Router pour la gestion des groupes
 """
 
-import math
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.pagination import PaginationParams
 from app.dependencies.resolve import resolve_group
+from app.dependencies.request import client_ip
 from app.models.user import User
 from app.schemas.group import (
     GroupCreate,
@@ -24,7 +25,6 @@ from app.schemas.group import (
     RequiredVariableCreate,
     RequiredVariableResponse,
 )
-from app.schemas.pagination import PaginatedResponse
 from app.services import group as group_service
 
 router = APIRouter(prefix="/api/v1/groups", tags=["groups"])
@@ -37,9 +37,9 @@ router = APIRouter(prefix="/api/v1/groups", tags=["groups"])
 def create_group(
     # corps, parametres de la requete
     body: GroupCreate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     return group_service.create_group(
@@ -48,7 +48,7 @@ def create_group(
         description=body.description,
         parent_ref=body.parent,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -67,16 +67,11 @@ def list_groups(
     if tree:
         return group_service.get_group_tree(db)
 
-    groups, total = group_service.list_groups(
+    # la page est serialisee en JSON par PostgreSQL (sans ORM ni Pydantic)
+    items_json, total = group_service.list_groups_json(
         db, offset=pagination.offset, limit=pagination.limit
     )
-    return PaginatedResponse(
-        items=[GroupResponse.model_validate(g) for g in groups],
-        total=total,
-        page=pagination.page,
-        per_page=pagination.per_page,
-        pages=math.ceil(total / pagination.per_page) if total else 0,
-    )
+    return pagination.paginate_json(items_json, total)
 
 
 # ── Avoir les details d'un groupe
@@ -100,9 +95,9 @@ def update_group(
     # corps, parametres de la requete
     id_or_name: str,
     body: GroupUpdate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -113,7 +108,7 @@ def update_group(
         description=body.description,
         parent_ref=body.parent,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -124,9 +119,9 @@ def update_group(
 def delete_group(
     # corps, parametres de la requete
     id_or_name: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -134,7 +129,7 @@ def delete_group(
         db,
         group=group,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -164,9 +159,9 @@ def assign_group_variable(
     # corps, parametres de la requete
     id_or_name: str,
     body: GroupVariableAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -176,7 +171,7 @@ def assign_group_variable(
         variable_ref=body.variable,
         value=body.value,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -188,9 +183,9 @@ def bulk_assign_group_variables(
     # corps, parametres de la requete
     id_or_name: str,
     body: GroupVariableBulkAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -199,7 +194,7 @@ def bulk_assign_group_variables(
         group=group,
         variables=[v.model_dump() for v in body.variables],
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -214,9 +209,9 @@ def update_group_variable(
     id_or_name: str,
     var_id_or_key: str,
     body: GroupVariableAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -226,7 +221,7 @@ def update_group_variable(
         variable_ref=var_id_or_key,
         value=body.value,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -238,9 +233,9 @@ def remove_group_variable(
     # corps, parametres de la requete
     id_or_name: str,
     var_id_or_key: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -249,7 +244,7 @@ def remove_group_variable(
         group=group,
         variable_ref=var_id_or_key,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -281,9 +276,9 @@ def add_required_variable(
     # corps, parametres de la requete
     id_or_name: str,
     body: RequiredVariableCreate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -294,7 +289,7 @@ def add_required_variable(
         is_required=body.is_required,
         override_default_value=body.override_default_value,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -306,9 +301,9 @@ def remove_required_variable(
     # corps, parametres de la requete
     id_or_name: str,
     var_id_or_key: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     group = resolve_group(db, id_or_name)
@@ -317,7 +312,7 @@ def remove_required_variable(
         group=group,
         variable_ref=var_id_or_key,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
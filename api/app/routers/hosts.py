@@ -2,20 +2,22 @@
 Router pour la gestion des hôtes
 """
 
-import math
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.pagination import PaginationParams
 from app.dependencies.resolve import resolve_host
+from app.dependencies.request import client_ip
 from app.models.user import User
 from app.schemas.host import (
     HostCreate,
     HostGroupAssign,
+    HostListItem,
     HostResponse,
     HostUpdate,
     HostVariableAssign,
@@ -28,6 +30,12 @@ from app.services import host as host_service
 
 router = APIRouter(prefix="/api/v1/hosts", tags=["hosts"])
 
+# relations disponibles pour ?expand=
+EXPAND_FIELDS = frozenset({"groups", "variables"})
+
+# serialiseur construit une seule fois (schema pydantic reutilise entre requetes)
+_VARIABLES_ADAPTER = TypeAdapter(list[HostVariableResponse])
+
 
 # ── Créer un hôte
 
@@ -36,9 +44,9 @@ router = APIRouter(prefix="/api/v1/hosts", tags=["hosts"])
 def create_host(
     # corps, parametres de la requete
     body: HostCreate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     return host_service.create_host(
@@ -47,25 +55,45 @@ def create_host(
         description=body.description,
         is_active=body.is_active,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
 # ── Lister les hôtes
 
 
-@router.get("", response_model=PaginatedResponse[HostResponse])
+@router.get("", response_model=PaginatedResponse[HostListItem])
 def list_hosts(
     # corps, parametres de la requete
     pagination: PaginationParams = Depends(),
     is_active: Optional[bool] = Query(None),
     group: Optional[str] = Query(None, description="Filtrer par groupe (nom ou id)"),
     search: Optional[str] = Query(None, description="Recherche par nom"),
+    expand: Optional[str] = Query(
+        None, description="Relations à inclure : groups, variables (séparées par des virgules)"
+    ),
     # dependences / middlewares
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
-    hosts, total = host_service.list_hosts(
+    if expand:
+        expand_fields = frozenset(f.strip() for f in expand.split(",")) & EXPAND_FIELDS
+        hosts, total = host_service.list_hosts(
+            db,
+            offset=pagination.offset,
+            limit=pagination.limit,
+            is_active=is_active,
+            group_ref=group,
+            search=search,
+            expand=expand_fields,
+        )
+        return pagination.paginate(
+            [host_service.serialize_expanded_host(h, expand_fields) for h in hosts],
+            total,
+        )
+
+    # la page est serialisee en JSON par PostgreSQL (sans ORM ni Pydantic)
+    items_json, total = host_service.list_hosts_json(
         db,
         offset=pagination.offset,
         limit=pagination.limit,
@@ -73,13 +101,7 @@ def list_hosts(
         group_ref=group,
         search=search,
     )
-    return PaginatedResponse(
-        items=hosts,
-        total=total,
-        page=pagination.page,
-        per_page=pagination.per_page,
-        pages=math.ceil(total / pagination.per_page) if total else 0,
-    )
+    return pagination.paginate_json(items_json, total)
 
 
 # ── Voir un hôte
@@ -102,9 +124,9 @@ def update_host(
     # corps, parametres de la requete
     id_or_name: str,
     body: HostUpdate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -115,7 +137,7 @@ def update_host(
         description=body.description,
         is_active=body.is_active,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -126,9 +148,9 @@ def update_host(
 def delete_host(
     # corps, parametres de la requete
     id_or_name: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -136,7 +158,7 @@ def delete_host(
         db,
         host=host,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -148,9 +170,9 @@ def add_to_group(
     # corps, parametres de la requete
     id_or_name: str,
     body: HostGroupAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -159,7 +181,7 @@ def add_to_group(
         host=host,
         group_ref=body.group,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -171,9 +193,9 @@ def remove_from_group(
     # corps, parametres de la requete
     id_or_name: str,
     group_id_or_name: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -182,7 +204,7 @@ def remove_from_group(
         host=host,
         group_ref=group_id_or_name,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -209,9 +231,9 @@ def assign_variable(
     # corps, parametres de la requete
     id_or_name: str,
     body: HostVariableAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -221,7 +243,7 @@ def assign_variable(
         variable_ref=body.variable,
         value=body.value,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -235,9 +257,9 @@ def bulk_assign_variables(
     # corps, parametres de la requete
     id_or_name: str,
     body: HostVariableBulkAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -246,7 +268,7 @@ def bulk_assign_variables(
         host=host,
         variables=[v.model_dump() for v in body.variables],
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -261,9 +283,9 @@ def update_variable(
     id_or_name: str,
     var_id_or_key: str,
     body: HostVariableAssign,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -273,7 +295,7 @@ def update_variable(
         variable_ref=var_id_or_key,
         value=body.value,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -285,9 +307,9 @@ def remove_variable(
     # corps, parametres de la requete
     id_or_name: str,
     var_id_or_key: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
@@ -296,7 +318,7 @@ def remove_variable(
         host=host,
         variable_ref=var_id_or_key,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -313,4 +335,10 @@ def list_host_variables(
     _: User = Depends(get_current_user),
 ):
     host = resolve_host(db, id_or_name)
-    return host_service.list_host_variables(db, host=host, reveal=reveal)
+    variables = host_service.list_host_variables(db, host=host, reveal=reveal)
+    return Response(
+        content=_VARIABLES_ADAPTER.dump_json(
+            _VARIABLES_ADAPTER.validate_python(variables)
+        ),
+        media_type="application/json",
+    )
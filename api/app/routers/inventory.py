@@ -2,11 +2,15 @@
 Router pour l'export d'inventaire Ansible
 """
 
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.request import client_ip
 from app.models.user import User
 from app.services import inventory as inventory_service
 from app.services.audit import log_action
@@ -19,10 +23,9 @@ router = APIRouter(prefix="/api/v1/inventory", tags=["inventory"])
 
 @router.get("")
 def export_inventory(
-    # corps, parametres de la requete
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     result = inventory_service.build_inventory(db)
@@ -33,9 +36,11 @@ def export_inventory(
         action="EXPORT",
         resource_type="inventory",
         details={"type": "full"},
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
-    return result
+    # les inventaires sont des dicts JSON natifs : on les encode directement
+    # avec orjson, sans le parcours jsonable_encoder de FastAPI
+    return ORJSONResponse(result)
 
 
 # ── Variables d'un hôte
@@ -45,9 +50,9 @@ def export_inventory(
 def get_host_vars(
     # corps, parametres de la requete
     hostname: str,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     result = inventory_service.get_host_vars(db, hostname)
@@ -58,9 +63,9 @@ def get_host_vars(
         action="EXPORT",
         resource_type="inventory",
         details={"type": "host_vars", "hostname": hostname},
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
-    return result
+    return ORJSONResponse(result)
 
 
 # ── Graphe des groupes
@@ -71,4 +76,4 @@ def inventory_graph(
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
-    return inventory_service.build_graph(db)
+    return ORJSONResponse(inventory_service.build_graph(db))
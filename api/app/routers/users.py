@@ -2,15 +2,17 @@
 Router pour la gestion des utilisateurs et API Keys
 """
 
-import math
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user, require_superuser
 from app.dependencies.pagination import PaginationParams
 from app.dependencies.resolve import resolve_user
+from app.dependencies.request import client_ip
 from app.models.user import User
 from app.schemas.pagination import PaginatedResponse
 from app.schemas.user import (
@@ -25,6 +27,9 @@ from app.services import user as user_service
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
+# serialiseur construit une seule fois (schema pydantic reutilise entre requetes)
+_API_KEYS_ADAPTER = TypeAdapter(list[ApiKeyResponse])
+
 
 # ── Créer un utilisateur
 
@@ -32,8 +37,8 @@ router = APIRouter(prefix="/api/v1/users", tags=["users"])
 @router.post("", response_model=LoginResponse, status_code=201)
 def create_user(
     body: UserCreate,
-    request: Request,
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(require_superuser),
 ):
     user, raw_key = user_service.create_user(
@@ -42,7 +47,7 @@ def create_user(
         password=body.password,
         is_superuser=body.is_superuser,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
     return LoginResponse(
         user=UserResponse.model_validate(user),
@@ -63,13 +68,7 @@ def list_users(
     users, total = user_service.list_users(
         db, offset=pagination.offset, limit=pagination.limit
     )
-    return PaginatedResponse(
-        items=users,
-        total=total,
-        page=pagination.page,
-        per_page=pagination.per_page,
-        pages=math.ceil(total / pagination.per_page) if total else 0,
-    )
+    return pagination.paginate(users, total)
 
 
 # ── Voir un utilisateur
@@ -92,8 +91,8 @@ def get_user(
 def update_user(
     id_or_username: str,
     body: UserUpdate,
-    request: Request,
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(require_superuser),
 ):
     user = resolve_user(db, id_or_username)
@@ -104,7 +103,7 @@ def update_user(
         is_active=body.is_active,
         is_superuser=body.is_superuser,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
     return updated
 
@@ -115,8 +114,8 @@ def update_user(
 @router.delete("/{id_or_username}", status_code=204)
 def delete_user(
     id_or_username: str,
-    request: Request,
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(require_superuser),
 ):
     user = resolve_user(db, id_or_username)
@@ -124,7 +123,7 @@ def delete_user(
         db,
         user=user,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -137,8 +136,8 @@ def delete_user(
 def create_api_key(
     id_or_username: str,
     body: ApiKeyCreate,
-    request: Request,
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     user = resolve_user(db, id_or_username)
@@ -148,7 +147,7 @@ def create_api_key(
         name=body.name,
         expires_at=body.expires_at,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
     return ApiKeyResponse(
         id=api_key.id,
@@ -171,7 +170,11 @@ def list_api_keys(
     _: User = Depends(get_current_user),
 ):
     user = resolve_user(db, id_or_username)
-    return user_service.list_api_keys(db, user=user)
+    keys = user_service.list_api_keys(db, user=user)
+    return Response(
+        content=_API_KEYS_ADAPTER.dump_json(_API_KEYS_ADAPTER.validate_python(keys)),
+        media_type="application/json",
+    )
 
 
 # ── Révoquer une API Key
@@ -181,8 +184,8 @@ def list_api_keys(
 def revoke_api_key(
     id_or_username: str,
     key_id: int,
-    request: Request,
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     user = resolve_user(db, id_or_username)
@@ -191,5 +194,5 @@ def revoke_api_key(
         user=user,
         key_id=key_id,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
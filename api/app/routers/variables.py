@@ -2,16 +2,17 @@
 Router pour la gestion du catalogue de variables et alias
 """
 
-import math
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.pagination import PaginationParams
 from app.dependencies.resolve import resolve_variable
+from app.dependencies.request import client_ip
 from app.models.user import User
 from app.schemas.pagination import PaginatedResponse
 from app.schemas.variable import (
@@ -25,6 +26,8 @@ from app.services import variable as variable_service
 
 router = APIRouter(prefix="/api/v1", tags=["variables"])
 
+_VARIABLES_ADAPTER = TypeAdapter(list[VariableResponse])
+
 
 # ── Créer une variable
 
@@ -33,9 +36,9 @@ router = APIRouter(prefix="/api/v1", tags=["variables"])
 def create_variable(
     # corps, parametres de la requete
     body: VariableCreate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     return variable_service.create_variable(
@@ -47,7 +50,7 @@ def create_variable(
         default_value=body.default_value,
         validation_regex=body.validation_regex,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -58,6 +61,9 @@ def create_variable(
 def list_variables(
     # corps, parametres de la requete
     pagination: PaginationParams = Depends(),
+    after: Optional[int] = Query(
+        None, ge=0, description="Curseur : variables d'ID supérieur (ignore page)"
+    ),
     is_sensitive: Optional[bool] = Query(None),
     is_ansible_builtin: Optional[bool] = Query(None),
     var_type: Optional[str] = Query(None),
@@ -69,17 +75,16 @@ def list_variables(
         db,
         offset=pagination.offset,
         limit=pagination.limit,
+        cursor_id=after,
         is_sensitive=is_sensitive,
         is_ansible_builtin=is_ansible_builtin,
         var_type=var_type,
     )
-    return PaginatedResponse(
-        items=variables,
-        total=total,
-        page=pagination.page,
-        per_page=pagination.per_page,
-        pages=math.ceil(total / pagination.per_page) if total else 0,
-    )
+    # page serialisee en une passe par pydantic-core, sans jsonable_encoder
+    items_json = _VARIABLES_ADAPTER.dump_json(
+        _VARIABLES_ADAPTER.validate_python(variables)
+    ).decode()
+    return pagination.paginate_json(items_json, total)
 
 
 # ── Voir une variable
@@ -102,9 +107,9 @@ def update_variable(
     # corps, parametres de la requete
     id_or_key: str,
     body: VariableUpdate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     variable = resolve_variable(db, id_or_key)
@@ -117,7 +122,7 @@ def update_variable(
         default_value=body.default_value,
         validation_regex=body.validation_regex,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -128,10 +133,10 @@ def update_variable(
 def delete_variable(
     # corps, parametres de la requete
     id_or_key: str,
-    request: Request,
     force: bool = Query(False),
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     variable = resolve_variable(db, id_or_key)
@@ -140,7 +145,7 @@ def delete_variable(
         variable=variable,
         force=force,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
 
@@ -154,9 +159,9 @@ def create_alias(
     # corps, parametres de la requete
     id_or_key: str,
     body: AliasCreate,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     alias_variable = resolve_variable(db, id_or_key)
@@ -165,7 +170,7 @@ def create_alias(
         alias_variable=alias_variable,
         source_variable_ref=body.source_variable,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
 
     # on construit la reponse avec les noms de variables
@@ -202,14 +207,14 @@ def list_aliases(
 def delete_alias(
     # corps, parametres de la requete
     alias_id: int,
-    request: Request,
     # dependences / middlewares
     db: Session = Depends(get_db),
+    ip_address: Optional[str] = Depends(client_ip),
     current_user: User = Depends(get_current_user),
 ):
     variable_service.delete_alias(
         db,
         alias_id=alias_id,
         actor_id=current_user.id,
-        ip_address=request.client.host if request.client else None,
+        ip_address=ip_address,
     )
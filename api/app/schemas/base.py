@@ -0,0 +1,16 @@
+"""
+Schémas Pydantic communs aux réponses
+"""
+
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+# base des schemas de sortie lus depuis un modele ORM horodate
+class TimestampedResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    updated_at: datetime
@@ -2,10 +2,11 @@
 Schémas Pydantic pour les groupes
 """
 
-from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel
+
+from app.schemas.base import TimestampedResponse
 
 
 # ── Schema pour les groupes
@@ -26,15 +27,10 @@ class GroupUpdate(BaseModel):
 
 
 # schema de sortie
-class GroupResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
+class GroupResponse(TimestampedResponse):
     name: str
     description: Optional[str]
     parent_id: Optional[int]
-    created_at: datetime
-    updated_at: datetime
 
 
 # schema de sortie detaille
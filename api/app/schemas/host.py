@@ -2,10 +2,11 @@
 Schémas Pydantic pour les hôtes
 """
 
-from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel
+
+from app.schemas.base import TimestampedResponse
 
 
 # ── Schema pour les hôtes
@@ -26,15 +27,16 @@ class HostUpdate(BaseModel):
 
 
 # schema de sortie
-class HostResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
+class HostResponse(TimestampedResponse):
     name: str
     description: Optional[str]
     is_active: bool
-    created_at: datetime
-    updated_at: datetime
+
+
+# schema de sortie de liste, avec les relations demandees via ?expand=
+class HostListItem(HostResponse):
+    groups: Optional[list[str]] = None
+    variables: Optional[list["HostVariableResponse"]] = None
 
 
 # ── Schema pour les groupes d'un hôte
@@ -71,3 +73,6 @@ class HostVariableBulkResponse(BaseModel):
     assigned: list[HostVariableResponse]
     updated: list[HostVariableResponse]
     errors: list[dict]
+
+
+HostListItem.model_rebuild()
@@ -7,6 +7,8 @@ from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.base import TimestampedResponse
+
 
 # ── Schema pour les utilisateurs
 
@@ -26,15 +28,10 @@ class UserUpdate(BaseModel):
 
 
 # schema de sortie
-class UserResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
+class UserResponse(TimestampedResponse):
     username: str
     is_active: bool
     is_superuser: bool
-    created_at: datetime
-    updated_at: datetime
 
 
 # ── Schema pour l'authentification
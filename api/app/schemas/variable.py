@@ -7,6 +7,8 @@ from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.base import TimestampedResponse
+
 
 # ── Schema pour les variables
 
@@ -31,10 +33,7 @@ class VariableUpdate(BaseModel):
 
 
 # schema de sortie
-class VariableResponse(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int
+class VariableResponse(TimestampedResponse):
     var_key: str
     description: Optional[str]
     is_sensitive: bool
@@ -42,8 +41,6 @@ class VariableResponse(BaseModel):
     default_value: Optional[str]
     validation_regex: Optional[str]
     is_ansible_builtin: bool
-    created_at: datetime
-    updated_at: datetime
 
 
 # ── Schema pour les alias
@@ -2,12 +2,44 @@
 Service d'audit — enregistrement des actions dans ansibase_audit_logs
 """
 
-from typing import Any, Optional
+import io
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Callable, Optional
 
+import orjson
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 
 from app.models.audit import AuditLog
 
+logger = logging.getLogger(__name__)
+
+# clé du tampon d'audit dans Session.info (propre à chaque session / requête)
+_BUFFER_KEY = "_audit_buffer"
+
+# écriture différée (ANSIBASE_AUDIT_ASYNC) : file bornée et taille des lots
+_QUEUE_MAXSIZE = 10_000
+_BATCH_SIZE = 1000
+_BATCH_WAIT = 0.05
+
+# au-delà de ce nombre de lignes, un lot est écrit par COPY plutôt que par INSERT
+_COPY_THRESHOLD = 256
+_COPY_COLUMNS = (
+    "user_id",
+    "action",
+    "resource_type",
+    "resource_id",
+    "details",
+    "ip_address",
+    "created_at",
+)
+_COPY_SQL = (
+    f"COPY {AuditLog.__tablename__} ({', '.join(_COPY_COLUMNS)}) FROM STDIN"
+)
+
 
 def log_action(
     db: Session,
@@ -19,14 +51,191 @@ def log_action(
     details: Optional[dict[str, Any]] = None,
     ip_address: Optional[str] = None,
 ) -> None:
-    """Enregistre une action dans les logs d'audit"""
-    entry = AuditLog(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        details=details,
-        ip_address=ip_address,
+    """Enregistre une action dans les logs d'audit.
+
+    L'entrée est mise en tampon sur la session ; toutes les entrées d'une
+    transaction sont insérées en une seule requête au moment du commit.
+    """
+    db.info.setdefault(_BUFFER_KEY, []).append(
+        {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "created_at": datetime.utcnow(),
+        }
     )
-    db.add(entry)
-    db.flush()
+
+
+def flush_pending(db: Session) -> None:
+    """Écrit les entrées d'audit en attente (avant un commit ou une lecture des logs)"""
+    rows = db.info.pop(_BUFFER_KEY, None)
+    if rows:
+        db.execute(insert(AuditLog), rows)
+
+
+# ── Écriture différée par un thread dédié (optionnelle)
+
+
+class _AuditWriter:
+    """Insère les entrées d'audit par lots, hors du chemin des requêtes.
+
+    Les entrées ne sont confiées au writer qu'après le commit de la
+    transaction métier : une requête annulée ne laisse aucune trace.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]) -> None:
+        self._session_factory = session_factory
+        self._queue: queue.Queue = queue.Queue(maxsize=_QUEUE_MAXSIZE)
+        self._thread = threading.Thread(
+            target=self._run, name="ansibase-audit", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, rows: list[dict]) -> None:
+        # file pleine : on bloque plutot que de perdre des entrees
+        for row in rows:
+            self._queue.put(row)
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                break
+
+            # on regroupe ce qui arrive pendant _BATCH_WAIT, jusqu'a _BATCH_SIZE
+            batch = [row]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    row = self._queue.get(timeout=_BATCH_WAIT)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            self._write(batch)
+
+    def _write(self, batch: list[dict]) -> None:
+        db = self._session_factory()
+        try:
+            try:
+                if len(batch) >= _COPY_THRESHOLD:
+                    _copy_rows(db, batch)
+                else:
+                    db.execute(insert(AuditLog), batch)
+                db.commit()
+                return
+            except Exception:
+                db.rollback()
+                logger.exception(
+                    "Échec de l'écriture groupée de %d logs d'audit, "
+                    "reprise ligne par ligne",
+                    len(batch),
+                )
+
+            # une ligne invalide (SAVEPOINT annulé) n'emporte plus le reste du lot
+            for row in batch:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(AuditLog), row)
+                except Exception:
+                    logger.exception("Log d'audit ignoré: %r", row)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Échec de l'écriture des logs d'audit")
+        finally:
+            db.close()
+
+
+def _copy_value(value: Any) -> str:
+    """Encode une valeur au format texte de COPY (\\N pour NULL)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, dict):
+        value = orjson.dumps(value).decode()
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(db: Session, batch: list[dict]) -> None:
+    """Écrit un lot d'entrées par COPY FROM STDIN (connexion psycopg2 de la session)"""
+    buffer = io.StringIO()
+    for row in batch:
+        buffer.write("\t".join(_copy_value(row[col]) for col in _COPY_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(_COPY_SQL, buffer)
+    finally:
+        cursor.close()
+
+
+_writer: Optional[_AuditWriter] = None
+
+
+def start_writer(session_factory: Callable[[], Session]) -> None:
+    """Active l'écriture différée des logs d'audit (au démarrage de l'API)"""
+    global _writer
+    if _writer is None:
+        _writer = _AuditWriter(session_factory)
+        _writer.start()
+
+
+def stop_writer() -> None:
+    """Vide la file puis arrête l'écriture différée (à l'arrêt de l'API)"""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+# ── Écriture groupée au commit
+
+
+@event.listens_for(Session, "before_commit")
+def _write_audit_buffer(session: Session) -> None:
+    # ces evenements suivent aussi les SAVEPOINT : on attend le commit racine
+    if session.in_nested_transaction():
+        return
+    # en mode differe, les entrees partent apres le commit (after_commit)
+    if _writer is None:
+        flush_pending(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_audit_buffer(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    if _writer is not None:
+        rows = session.info.pop(_BUFFER_KEY, None)
+        if rows:
+            _writer.submit(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_audit_buffer(session: Session) -> None:
+    # un ROLLBACK TO SAVEPOINT ne doit pas perdre les entrees deja bufferisees
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_BUFFER_KEY, None)
@@ -26,6 +26,18 @@ def decrypt(session: Session, encrypted: bytes) -> Optional[str]:
     return _crypto.decrypt_value(session, encrypted)
 
 
+def encrypt_many(session: Session, values: list[str]) -> list[Optional[bytes]]:
+    """Chiffre plusieurs valeurs via pgcrypto en un seul aller-retour"""
+    return _crypto.encrypt_values(session, values)
+
+
+def decrypt_many(
+    session: Session, encrypted: list[Optional[bytes]]
+) -> list[Optional[str]]:
+    """Déchiffre plusieurs valeurs via pgcrypto en un seul aller-retour"""
+    return _crypto.decrypt_values(session, encrypted)
+
+
 def encrypt_api_key(session: Session, value: str) -> Optional[bytes]:
     """Chiffre une clé API via pgcrypto (clé de chiffrement dédiée)"""
     return _api_key_crypto.encrypt_value(session, value)
@@ -6,7 +6,9 @@ from typing import Optional
 
 from fastapi import HTTPException
 from sqlalchemy import delete as sql_delete
-from sqlalchemy import func, select
+from sqlalchemy import Text, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.models import (
@@ -18,9 +20,11 @@ from app.models import (
 )
 from app.dependencies.resolve import resolve_group, resolve_variable
 from app.services import crypto as crypto_service
+from app.services import variable as variable_service
 from app.services.audit import log_action
+from app.utils import iso_timestamp
 
-PROTECTED_GROUPS = {"all", "ungrouped"}
+PROTECTED_GROUPS = frozenset({"all", "ungrouped"})
 
 
 # ── Endpoints pour les groupes
@@ -37,21 +41,21 @@ def create_group(
 ) -> Group:
     """Crée un nouveau groupe"""
 
-    # on verifie si le groupe avec le nom donne n'existe pas
-    existing = db.execute(select(Group).where(Group.name == name)).scalar_one_or_none()
-    if existing:
-        raise HTTPException(status_code=409, detail=f"Groupe '{name}' existe déjà")
-
     # on resout le parent si specifie
     parent_id = None
     if parent_ref:
         parent = resolve_group(db, parent_ref)
         parent_id = parent.id
 
-    # on cree le groupe et on l'ajoute
-    group = Group(name=name, description=description, parent_id=parent_id)
-    db.add(group)
-    db.flush()
+    # on cree le groupe ; la contrainte d'unicite sur le nom detecte les doublons
+    group = db.scalars(
+        pg_insert(Group)
+        .values(name=name, description=description, parent_id=parent_id)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Group)
+    ).first()
+    if group is None:
+        raise HTTPException(status_code=409, detail=f"Groupe '{name}' existe déjà")
 
     log_action(
         db,
@@ -65,17 +69,55 @@ def create_group(
     return group
 
 
-def list_groups(
+def list_groups_json(
     db: Session, *, offset: int = 0, limit: int = 50
-) -> tuple[list[Group], int]:
-    """Liste paginée des groupes"""
-    total = db.execute(select(func.count(Group.id))).scalar_one()
-    groups = (
-        db.execute(select(Group).order_by(Group.id).offset(offset).limit(limit))
-        .scalars()
-        .all()
+) -> tuple[str, int]:
+    """Liste paginée des groupes, serialisee en JSON directement par PostgreSQL.
+    Evite l'hydratation ORM et la validation Pydantic sur le chemin de lecture.
+    Retourne (tableau JSON des groupes, total).
+    """
+    # page courante, avec les colonnes de GroupResponse et le total (fenetre)
+    page = (
+        select(
+            Group.id,
+            Group.name,
+            Group.description,
+            Group.parent_id,
+            Group.created_at,
+            Group.updated_at,
+            func.count().over().label("total"),
+        )
+        .order_by(Group.id)
+        .offset(offset)
+        .limit(limit)
+        .subquery("g")
+    )
+    item = func.json_build_object(
+        "id", page.c.id,
+        "name", page.c.name,
+        "description", page.c.description,
+        "parent_id", page.c.parent_id,
+        "created_at", iso_timestamp(page.c.created_at),
+        "updated_at", iso_timestamp(page.c.updated_at),
     )
-    return list(groups), total
+    items_json, total = db.execute(
+        select(
+            cast(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(item, page.c.id)),
+                    literal_column("'[]'::json"),
+                ),
+                Text,
+            ),
+            func.max(page.c.total),
+        ).select_from(page)
+    ).one()
+    if total is None:
+        # page vide : le total n'est connu que par un comptage separe
+        total = (
+            db.execute(select(func.count(Group.id))).scalar_one() if offset else 0
+        )
+    return items_json, total
 
 
 def get_group_tree(db: Session) -> list[dict]:
@@ -107,24 +149,17 @@ def get_group_detail(db: Session, group: Group) -> dict:
 
     # on recupere les enfants
     children = (
-        db.execute(select(Group.name).where(Group.parent_id == group.id))
+        db.execute(
+            select(Group.name)
+            .where(Group.parent_id == group.id)
+            .order_by(Group.name)
+        )
         .scalars()
         .all()
     )
 
     # on recupere les hotes directs
-    from app.models import Host
-
-    host_ids = (
-        db.execute(select(HostGroup.host_id).where(HostGroup.group_id == group.id))
-        .scalars()
-        .all()
-    )
-    hosts = []
-    for hid in host_ids:
-        h = db.get(Host, hid)
-        if h:
-            hosts.append(h.name)
+    hosts = _direct_host_names(db, group.id)
 
     return {
         "id": group.id,
@@ -134,11 +169,29 @@ def get_group_detail(db: Session, group: Group) -> dict:
         "created_at": group.created_at,
         "updated_at": group.updated_at,
         "parent_name": parent_name,
-        "children": sorted(children),
-        "hosts": sorted(hosts),
+        "children": children,
+        "hosts": hosts,
     }
 
 
+def _is_ancestor_or_self(db: Session, group_id: int, parent_id: int) -> bool:
+    """Vrai si group_id est parent_id ou l'un de ses ancêtres (cycle à l'affectation)"""
+    # UNION (et non UNION ALL) : la remontee s'arrete meme sur un cycle existant
+    ancestors = (
+        select(Group.id, Group.parent_id)
+        .where(Group.id == parent_id)
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union(
+        select(Group.id, Group.parent_id).join(
+            ancestors, Group.id == ancestors.c.parent_id
+        )
+    )
+    return db.execute(
+        select(ancestors.c.id).where(ancestors.c.id == group_id).limit(1)
+    ).first() is not None
+
+
 def update_group(
     db: Session,
     *,
@@ -161,9 +214,9 @@ def update_group(
                 detail=f"Le groupe '{group.name}' ne peut pas être renommé",
             )
         existing = db.execute(
-            select(Group).where(Group.name == name)
-        ).scalar_one_or_none()
-        if existing:
+            select(Group.id).where(Group.name == name, Group.id != group.id).limit(1)
+        ).scalar()
+        if existing is not None:
             raise HTTPException(status_code=409, detail=f"Groupe '{name}' existe déjà")
         group.name = name
         changes["name"] = name
@@ -174,6 +227,14 @@ def update_group(
 
     if parent_ref is not None:
         parent = resolve_group(db, parent_ref)
+        if _is_ancestor_or_self(db, group.id, parent.id):
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Le groupe '{parent.name}' ne peut pas être le parent de "
+                    f"'{group.name}' (cycle dans la hiérarchie)"
+                ),
+            )
         group.parent_id = parent.id
         changes["parent_id"] = parent.id
 
@@ -209,17 +270,10 @@ def delete_group(
     group_id = group.id
     group_name = group.name
 
-    # on supprime les dependances avant le groupe
-    db.execute(sql_delete(HostGroup).where(HostGroup.group_id == group_id))
-    db.execute(sql_delete(GroupVariable).where(GroupVariable.group_id == group_id))
-    db.execute(
-        sql_delete(GroupRequiredVariable).where(
-            GroupRequiredVariable.group_id == group_id
-        )
-    )
-
-    db.delete(group)
-    db.flush()
+    # un seul DELETE : liens, variables, variables requises et sous-groupes
+    # suivent par les cles etrangeres ON DELETE CASCADE ; db.delete() aurait
+    # charge chaque collection liee (backrefs) avant la suppression
+    db.execute(sql_delete(Group).where(Group.id == group_id))
 
     log_action(
         db,
@@ -235,6 +289,23 @@ def delete_group(
 # ── Hôtes d'un groupe
 
 
+def _direct_host_names(db: Session, group_id: int) -> list[str]:
+    """Noms des hôtes directs d'un groupe, tries par la base"""
+    from app.models import Host
+
+    names = (
+        db.execute(
+            select(Host.name)
+            .join(HostGroup, HostGroup.host_id == Host.id)
+            .where(HostGroup.group_id == group_id)
+            .order_by(Host.name)
+        )
+        .scalars()
+        .all()
+    )
+    return names
+
+
 def list_group_hosts(
     db: Session, *, group: Group, inherited: bool = False
 ) -> list[str]:
@@ -242,41 +313,36 @@ def list_group_hosts(
     from app.models import Host
 
     if not inherited:
-        host_ids = (
-            db.execute(select(HostGroup.host_id).where(HostGroup.group_id == group.id))
-            .scalars()
-            .all()
-        )
-        hosts = []
-        for hid in host_ids:
-            h = db.get(Host, hid)
-            if h:
-                hosts.append(h.name)
-        return sorted(hosts)
-
-    # avec heritage : on collecte recursivement les enfants
-    def collect_hosts(grp_id: int) -> set[str]:
-        result = set()
-        host_ids = (
-            db.execute(select(HostGroup.host_id).where(HostGroup.group_id == grp_id))
-            .scalars()
-            .all()
-        )
-        for hid in host_ids:
-            h = db.get(Host, hid)
-            if h:
-                result.add(h.name)
-
-        child_ids = (
-            db.execute(select(Group.id).where(Group.parent_id == grp_id))
-            .scalars()
-            .all()
+        return _direct_host_names(db, group.id)
+
+    # avec heritage : hierarchie chargee une fois, descendants parcourus en memoire
+    children_by_parent: dict[Optional[int], list[int]] = {}
+    for grp_id, parent_id in db.execute(select(Group.id, Group.parent_id)).all():
+        children_by_parent.setdefault(parent_id, []).append(grp_id)
+
+    # seen : un cycle de parents deja en base ne fait pas boucler le parcours
+    group_ids = []
+    seen = {group.id}
+    stack = [group.id]
+    while stack:
+        grp_id = stack.pop()
+        group_ids.append(grp_id)
+        for child_id in children_by_parent.get(grp_id, ()):
+            if child_id not in seen:
+                seen.add(child_id)
+                stack.append(child_id)
+
+    return (
+        db.execute(
+            select(Host.name)
+            .join(HostGroup, HostGroup.host_id == Host.id)
+            .where(HostGroup.group_id.in_(group_ids))
+            .distinct()
+            .order_by(Host.name)
         )
-        for cid in child_ids:
-            result |= collect_hosts(cid)
-        return result
-
-    return sorted(collect_hosts(group.id))
+        .scalars()
+        .all()
+    )
 
 
 # ── Variables de groupe
@@ -294,34 +360,31 @@ def assign_group_variable(
     """Affecte une variable à un groupe (chiffrement auto si sensible)"""
     variable = resolve_variable(db, variable_ref)
 
-    # on verifie que la variable n'est pas deja assignee
-    existing = db.execute(
-        select(GroupVariable).where(
-            GroupVariable.group_id == group.id, GroupVariable.var_id == variable.id
-        )
+    # on cree l'assignation avec chiffrement si sensible, sauf si elle existe deja
+    values = {"group_id": group.id, "var_id": variable.id}
+    if variable.is_sensitive:
+        values["var_value_encrypted"] = crypto_service.encrypt(db, value)
+    else:
+        values["var_value"] = value
+
+    gv_id = db.execute(
+        pg_insert(GroupVariable)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["group_id", "var_id"])
+        .returning(GroupVariable.id)
     ).scalar_one_or_none()
-    if existing:
+    if gv_id is None:
         raise HTTPException(
             status_code=409,
             detail=f"Variable '{variable.var_key}' déjà assignée au groupe '{group.name}'",
         )
 
-    # on cree l'assignation avec chiffrement si sensible
-    gv = GroupVariable(group_id=group.id, var_id=variable.id)
-    if variable.is_sensitive:
-        gv.var_value_encrypted = crypto_service.encrypt(db, value)
-    else:
-        gv.var_value = value
-
-    db.add(gv)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
         action="CREATE",
         resource_type="group_variable",
-        resource_id=str(gv.id),
+        resource_id=str(gv_id),
         details={"group": group.name, "variable": variable.var_key},
         ip_address=ip_address,
     )
@@ -341,82 +404,17 @@ def bulk_assign_group_variables(
     ip_address: Optional[str] = None,
 ) -> dict:
     """Définit les valeurs de plusieurs variables pour un groupe (upsert)"""
-    assigned = []
-    updated = []
-    errors = []
-
-    for item in variables:
-        variable_ref = item["variable"]
-        value = item["value"]
-
-        # on resout la variable, si introuvable on l'ajoute aux erreurs
-        try:
-            variable = resolve_variable(db, variable_ref)
-        except HTTPException:
-            errors.append({
-                "variable": variable_ref,
-                "detail": f"Variable '{variable_ref}' introuvable",
-            })
-            continue
-
-        # on verifie si la variable est deja assignee
-        existing = db.execute(
-            select(GroupVariable).where(
-                GroupVariable.group_id == group.id, GroupVariable.var_id == variable.id
-            )
-        ).scalar_one_or_none()
-
-        if existing:
-            # mise a jour de la valeur existante
-            if variable.is_sensitive:
-                existing.var_value_encrypted = crypto_service.encrypt(db, value)
-                existing.var_value = None
-            else:
-                existing.var_value = value
-                existing.var_value_encrypted = None
-            db.flush()
-
-            log_action(
-                db,
-                user_id=actor_id,
-                action="UPDATE",
-                resource_type="group_variable",
-                resource_id=str(existing.id),
-                details={"group": group.name, "variable": variable.var_key},
-                ip_address=ip_address,
-            )
-            updated.append({
-                "var_key": variable.var_key,
-                "value": "****" if variable.is_sensitive else value,
-                "is_sensitive": variable.is_sensitive,
-            })
-        else:
-            # nouvelle assignation
-            gv = GroupVariable(group_id=group.id, var_id=variable.id)
-            if variable.is_sensitive:
-                gv.var_value_encrypted = crypto_service.encrypt(db, value)
-            else:
-                gv.var_value = value
-
-            db.add(gv)
-            db.flush()
-
-            log_action(
-                db,
-                user_id=actor_id,
-                action="CREATE",
-                resource_type="group_variable",
-                resource_id=str(gv.id),
-                details={"group": group.name, "variable": variable.var_key},
-                ip_address=ip_address,
-            )
-            assigned.append({
-                "var_key": variable.var_key,
-                "value": "****" if variable.is_sensitive else value,
-                "is_sensitive": variable.is_sensitive,
-            })
-
-    return {"assigned": assigned, "updated": updated, "errors": errors}
+    return variable_service.bulk_upsert_values(
+        db,
+        model=GroupVariable,
+        owner_column="group_id",
+        owner_id=group.id,
+        resource_type="group_variable",
+        owner_details={"group": group.name},
+        variables=variables,
+        actor_id=actor_id,
+        ip_address=ip_address,
+    )
 
 
 def update_group_variable(
@@ -510,55 +508,39 @@ def list_group_variables(
     db: Session, *, group: Group, inherited: bool = False
 ) -> list[dict]:
     """Liste les variables d'un groupe (directes ou avec héritage parent)"""
-    variables = {}
+    chain = [group.id]
 
     if inherited:
-        # on remonte la hierarchie des parents
-        chain = []
-        current = group
-        while current:
+        # on remonte la hierarchie des parents en memoire (une seule requete)
+        parents = dict(db.execute(select(Group.id, Group.parent_id)).all())
+        current = parents.get(group.id)
+        while current is not None and current not in chain:
             chain.append(current)
-            current = db.get(Group, current.parent_id) if current.parent_id else None
-        chain.reverse()  # du parent racine vers le groupe courant
-
-        for grp in chain:
-            gvs = (
-                db.execute(
-                    select(GroupVariable).where(GroupVariable.group_id == grp.id)
-                )
-                .scalars()
-                .all()
-            )
-            for gv in gvs:
-                var = db.get(Variable, gv.var_id)
-                if var:
-                    if var.is_sensitive and gv.var_value_encrypted:
-                        val = crypto_service.decrypt(db, gv.var_value_encrypted)
-                    else:
-                        val = gv.var_value
-                    variables[var.var_key] = {
-                        "var_key": var.var_key,
-                        "value": "****" if var.is_sensitive else val,
-                        "is_sensitive": var.is_sensitive,
-                    }
-    else:
-        gvs = (
-            db.execute(select(GroupVariable).where(GroupVariable.group_id == group.id))
-            .scalars()
-            .all()
+            current = parents.get(current)
+
+    rows = db.execute(
+        select(
+            GroupVariable.group_id,
+            GroupVariable.var_value,
+            Variable.var_key,
+            Variable.is_sensitive,
         )
-        for gv in gvs:
-            var = db.get(Variable, gv.var_id)
-            if var:
-                if var.is_sensitive and gv.var_value_encrypted:
-                    val = crypto_service.decrypt(db, gv.var_value_encrypted)
-                else:
-                    val = gv.var_value
-                variables[var.var_key] = {
-                    "var_key": var.var_key,
-                    "value": "****" if var.is_sensitive else val,
-                    "is_sensitive": var.is_sensitive,
-                }
+        .join(Variable, Variable.id == GroupVariable.var_id)
+        .where(GroupVariable.group_id.in_(chain))
+    ).all()
+
+    # du parent racine vers le groupe courant : le plus proche l'emporte
+    rank = {grp_id: i for i, grp_id in enumerate(reversed(chain))}
+    rows.sort(key=lambda row: rank[row.group_id])
+
+    variables = {}
+    for row in rows:
+        # valeur sensible toujours masquee : pas de dechiffrement
+        variables[row.var_key] = {
+            "var_key": row.var_key,
+            "value": "****" if row.is_sensitive else row.var_value,
+            "is_sensitive": row.is_sensitive,
+        }
 
     return list(variables.values())
 
@@ -579,28 +561,24 @@ def add_required_variable(
     """Ajoute une variable requise/optionnelle pour un groupe"""
     variable = resolve_variable(db, variable_ref)
 
-    # on verifie que la variable requise n'est pas deja definie
-    existing = db.execute(
-        select(GroupRequiredVariable).where(
-            GroupRequiredVariable.group_id == group.id,
-            GroupRequiredVariable.var_id == variable.id,
+    # on cree la variable requise, sauf si elle est deja definie
+    grv = db.scalars(
+        pg_insert(GroupRequiredVariable)
+        .values(
+            group_id=group.id,
+            var_id=variable.id,
+            is_required=is_required,
+            override_default_value=override_default_value,
         )
-    ).scalar_one_or_none()
-    if existing:
+        .on_conflict_do_nothing(index_elements=["group_id", "var_id"])
+        .returning(GroupRequiredVariable)
+    ).first()
+    if grv is None:
         raise HTTPException(
             status_code=409,
             detail=f"Variable '{variable.var_key}' déjà définie comme requise pour '{group.name}'",
         )
 
-    grv = GroupRequiredVariable(
-        group_id=group.id,
-        var_id=variable.id,
-        is_required=is_required,
-        override_default_value=override_default_value,
-    )
-    db.add(grv)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
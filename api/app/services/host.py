@@ -6,13 +6,29 @@ from typing import Optional
 
 from fastapi import HTTPException
 from sqlalchemy import delete as sql_delete
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, bindparam, cast, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, raiseload, selectinload
 
 from app.models import Group, Host, HostGroup, HostVariable, Variable
-from app.dependencies.resolve import resolve_group, resolve_variable
+from app.dependencies.resolve import parse_ref, resolve_group, resolve_variable
 from app.services import crypto as crypto_service
+from app.services import variable as variable_service
 from app.services.audit import log_action
+from app.utils import iso_timestamp
+
+
+# ── Requetes de recherche construites une seule fois (parametres lies)
+
+_HOST_GROUP = select(HostGroup).where(
+    HostGroup.host_id == bindparam("host_id"),
+    HostGroup.group_id == bindparam("group_id"),
+)
+_HOST_VARIABLE = select(HostVariable).where(
+    HostVariable.host_id == bindparam("host_id"),
+    HostVariable.var_id == bindparam("var_id"),
+)
 
 
 # ── Endpoints pour les hôtes
@@ -29,16 +45,16 @@ def create_host(
 ) -> Host:
     """Crée un nouvel hôte"""
 
-    # on verifie si l'hote avec le nom donne n'existe pas
-    existing = db.execute(select(Host).where(Host.name == name)).scalar_one_or_none()
-    if existing:
+    # on cree l'hote ; la contrainte d'unicite sur le nom detecte les doublons
+    host = db.scalars(
+        pg_insert(Host)
+        .values(name=name, description=description, is_active=is_active)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Host)
+    ).first()
+    if host is None:
         raise HTTPException(status_code=409, detail=f"Hôte '{name}' existe déjà")
 
-    # si non on le cree et on l'ajoute
-    host = Host(name=name, description=description, is_active=is_active)
-    db.add(host)
-    db.flush()
-
     # on le renseigne dans les logs
     log_action(
         db,
@@ -52,6 +68,51 @@ def create_host(
     return host
 
 
+def _host_filters(
+    db: Session,
+    *,
+    is_active: Optional[bool] = None,
+    group_ref: Optional[str] = None,
+    search: Optional[str] = None,
+) -> tuple[list, Optional[int]]:
+    """Construit les conditions de filtrage communes aux listes d'hôtes.
+    Retourne (conditions, ID du groupe filtre ou None).
+    """
+    conditions = []
+    group_id = None
+
+    if is_active is not None:
+        conditions.append(Host.is_active == is_active)
+
+    if search:
+        conditions.append(Host.name.ilike(f"%{search}%"))
+
+    if group_ref:
+        # on resout le groupe par ID ou nom en une seule requete (ID prioritaire)
+        maybe_id, _ = parse_ref(group_ref)
+        id_match = Group.id == maybe_id
+        group_id = db.execute(
+            select(Group.id)
+            .where(or_(id_match, Group.name == group_ref))
+            .order_by(id_match.desc())
+            .limit(1)
+        ).scalar()
+
+    return conditions, group_id
+
+
+def _filter_hosts(stmt, filters: tuple[list, Optional[int]]):
+    """Applique les filtres de _host_filters a une requete sur les hôtes.
+    Le filtre par groupe est une jointure sur HostGroup (pas de sous-requete IN).
+    """
+    conditions, group_id = filters
+    if group_id is not None:
+        stmt = stmt.join(HostGroup, HostGroup.host_id == Host.id).where(
+            HostGroup.group_id == group_id
+        )
+    return stmt.where(*conditions)
+
+
 def list_hosts(
     db: Session,
     *,
@@ -60,41 +121,135 @@ def list_hosts(
     is_active: Optional[bool] = None,
     group_ref: Optional[str] = None,
     search: Optional[str] = None,
+    expand: frozenset[str] = frozenset(),
 ) -> tuple[list[Host], int]:
-    """Liste paginée des hôtes avec filtres"""
-
-    # on prepare les requetes avec les differents filtres
-    stmt = select(Host)
-    count_stmt = select(func.count(Host.id))
+    """Liste paginée des hôtes avec filtres.
+    Les relations ne sont chargees que si demandees via expand (groups, variables).
+    """
+    filters = _host_filters(
+        db, is_active=is_active, group_ref=group_ref, search=search
+    )
 
-    if is_active is not None:
-        stmt = stmt.where(Host.is_active == is_active)
-        count_stmt = count_stmt.where(Host.is_active == is_active)
+    # aucune relation chargee implicitement (pas de N+1 a la serialisation)
+    options = [raiseload("*")]
+    if "groups" in expand:
+        options.append(
+            selectinload(Host.host_group_associations).joinedload(HostGroup.group)
+        )
+    if "variables" in expand:
+        options.append(
+            selectinload(Host.host_variables).joinedload(HostVariable.variable)
+        )
 
-    if search:
-        stmt = stmt.where(Host.name.ilike(f"%{search}%"))
-        count_stmt = count_stmt.where(Host.name.ilike(f"%{search}%"))
+    # le total est calcule par la meme requete (fenetre count() OVER ())
+    rows = db.execute(
+        _filter_hosts(
+            select(Host, func.count().over().label("total")), filters
+        )
+        .options(*options)
+        .order_by(Host.id)
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total
+    return [], _count_hosts(db, filters, offset)
+
+
+def _count_hosts(db: Session, filters: tuple[list, Optional[int]], offset: int) -> int:
+    """Total des hôtes quand la page demandee est vide"""
+    if offset == 0:
+        return 0
+    return db.execute(
+        _filter_hosts(select(func.count(Host.id)), filters)
+    ).scalar_one()
+
+
+def serialize_expanded_host(host: Host, expand: frozenset[str]) -> dict:
+    """Serialise un hôte charge par list_hosts avec ses relations demandees.
+    Les valeurs sensibles restent masquees.
+    """
+    data = {
+        "id": host.id,
+        "name": host.name,
+        "description": host.description,
+        "is_active": host.is_active,
+        "created_at": host.created_at,
+        "updated_at": host.updated_at,
+    }
+    if "groups" in expand:
+        data["groups"] = sorted(a.group.name for a in host.host_group_associations)
+    if "variables" in expand:
+        data["variables"] = [
+            {
+                "var_key": hv.variable.var_key,
+                "value": "****" if hv.variable.is_sensitive else hv.var_value,
+                "is_sensitive": hv.variable.is_sensitive,
+            }
+            for hv in host.host_variables
+        ]
+    return data
+
+
+def list_hosts_json(
+    db: Session,
+    *,
+    offset: int = 0,
+    limit: int = 50,
+    is_active: Optional[bool] = None,
+    group_ref: Optional[str] = None,
+    search: Optional[str] = None,
+) -> tuple[str, int]:
+    """Liste paginée des hôtes, serialisee en JSON directement par PostgreSQL.
+    Evite l'hydratation ORM et la validation Pydantic sur le chemin de lecture.
+    Retourne (tableau JSON des hôtes, total).
+    """
+    filters = _host_filters(
+        db, is_active=is_active, group_ref=group_ref, search=search
+    )
 
-    if group_ref:
-        # on resout le groupe pour filtrer
-        group_stmt = select(Group)
-        if group_ref.isdigit():
-            group_stmt = group_stmt.where(Group.id == int(group_ref))
-        else:
-            group_stmt = group_stmt.where(Group.name == group_ref)
-        group = db.execute(group_stmt).scalar_one_or_none()
-        if group:
-            host_ids_stmt = select(HostGroup.host_id).where(HostGroup.group_id == group.id)
-            stmt = stmt.where(Host.id.in_(host_ids_stmt))
-            count_stmt = count_stmt.where(Host.id.in_(host_ids_stmt))
-
-    total = db.execute(count_stmt).scalar_one()
-    hosts = (
-        db.execute(stmt.order_by(Host.id).offset(offset).limit(limit))
-        .scalars()
-        .all()
+    # page courante, avec les colonnes de HostResponse et le total (fenetre)
+    page = (
+        _filter_hosts(
+            select(
+                Host.id,
+                Host.name,
+                Host.description,
+                Host.is_active,
+                Host.created_at,
+                Host.updated_at,
+                func.count().over().label("total"),
+            ),
+            filters,
+        )
+        .order_by(Host.id)
+        .offset(offset)
+        .limit(limit)
+        .subquery("h")
     )
-    return list(hosts), total
+    item = func.json_build_object(
+        "id", page.c.id,
+        "name", page.c.name,
+        "description", page.c.description,
+        "is_active", page.c.is_active,
+        "created_at", iso_timestamp(page.c.created_at),
+        "updated_at", iso_timestamp(page.c.updated_at),
+    )
+    items_json, total = db.execute(
+        select(
+            cast(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(item, page.c.id)),
+                    literal_column("'[]'::json"),
+                ),
+                Text,
+            ),
+            func.max(page.c.total),
+        ).select_from(page)
+    ).one()
+    if total is None:
+        total = _count_hosts(db, filters, offset)
+    return items_json, total
 
 
 def update_host(
@@ -112,8 +267,10 @@ def update_host(
     # on identifie le changement qu'on souhaite appliquer
     changes = {}
     if name is not None and name != host.name:
-        existing = db.execute(select(Host).where(Host.name == name)).scalar_one_or_none()
-        if existing:
+        existing = db.execute(
+            select(Host.id).where(Host.name == name, Host.id != host.id).limit(1)
+        ).scalar()
+        if existing is not None:
             raise HTTPException(status_code=409, detail=f"Hôte '{name}' existe déjà")
         host.name = name
         changes["name"] = name
@@ -150,11 +307,9 @@ def delete_host(
     host_id = host.id
     host_name = host.name
 
-    # on supprime les dependances avant l'hote
-    db.execute(sql_delete(HostGroup).where(HostGroup.host_id == host_id))
-    db.execute(sql_delete(HostVariable).where(HostVariable.host_id == host_id))
-    db.delete(host)
-    db.flush()
+    # un seul DELETE : groupes et variables de l'hote suivent par les
+    # cles etrangeres ON DELETE CASCADE (indexees)
+    db.execute(sql_delete(Host).where(Host.id == host_id))
 
     log_action(
         db,
@@ -181,29 +336,25 @@ def add_to_group(
     """Ajoute un hôte à un groupe"""
     group = resolve_group(db, group_ref)
 
-    # on verifie que l'hote n'est pas deja dans le groupe
-    existing = db.execute(
-        select(HostGroup).where(
-            HostGroup.host_id == host.id, HostGroup.group_id == group.id
-        )
+    # on ajoute l'hote au groupe, sauf s'il y est deja
+    hg_id = db.execute(
+        pg_insert(HostGroup)
+        .values(host_id=host.id, group_id=group.id)
+        .on_conflict_do_nothing(index_elements=["host_id", "group_id"])
+        .returning(HostGroup.id)
     ).scalar_one_or_none()
-    if existing:
+    if hg_id is None:
         raise HTTPException(
             status_code=409,
             detail=f"Hôte '{host.name}' déjà dans le groupe '{group.name}'",
         )
 
-    # si non on l'ajoute
-    hg = HostGroup(host_id=host.id, group_id=group.id)
-    db.add(hg)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
         action="CREATE",
         resource_type="host_group",
-        resource_id=str(hg.id),
+        resource_id=str(hg_id),
         details={"host": host.name, "group": group.name},
         ip_address=ip_address,
     )
@@ -223,9 +374,7 @@ def remove_from_group(
 
     # on verifie que l'hote est bien dans le groupe
     hg = db.execute(
-        select(HostGroup).where(
-            HostGroup.host_id == host.id, HostGroup.group_id == group.id
-        )
+        _HOST_GROUP, {"host_id": host.id, "group_id": group.id}
     ).scalar_one_or_none()
     if not hg:
         raise HTTPException(
@@ -248,17 +397,17 @@ def remove_from_group(
 
 def list_host_groups(db: Session, *, host: Host) -> list[str]:
     """Liste les groupes d'un hôte"""
-    group_ids = (
-        db.execute(select(HostGroup.group_id).where(HostGroup.host_id == host.id))
+    groups = (
+        db.execute(
+            select(Group.name)
+            .join(HostGroup, HostGroup.group_id == Group.id)
+            .where(HostGroup.host_id == host.id)
+            .order_by(Group.name)
+        )
         .scalars()
         .all()
     )
-    groups = []
-    for gid in group_ids:
-        g = db.get(Group, gid)
-        if g:
-            groups.append(g.name)
-    return sorted(groups)
+    return groups
 
 
 # ── Variables d'un hôte
@@ -276,34 +425,31 @@ def assign_variable(
     """Affecte une variable à un hôte (chiffrement auto si sensible)"""
     variable = resolve_variable(db, variable_ref)
 
-    # on verifie que la variable n'est pas deja assignee
-    existing = db.execute(
-        select(HostVariable).where(
-            HostVariable.host_id == host.id, HostVariable.var_id == variable.id
-        )
+    # on cree l'assignation avec chiffrement si sensible, sauf si elle existe deja
+    values = {"host_id": host.id, "var_id": variable.id}
+    if variable.is_sensitive:
+        values["var_value_encrypted"] = crypto_service.encrypt(db, value)
+    else:
+        values["var_value"] = value
+
+    hv_id = db.execute(
+        pg_insert(HostVariable)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["host_id", "var_id"])
+        .returning(HostVariable.id)
     ).scalar_one_or_none()
-    if existing:
+    if hv_id is None:
         raise HTTPException(
             status_code=409,
             detail=f"Variable '{variable.var_key}' déjà assignée à l'hôte '{host.name}'",
         )
 
-    # on cree l'assignation avec chiffrement si sensible
-    hv = HostVariable(host_id=host.id, var_id=variable.id)
-    if variable.is_sensitive:
-        hv.var_value_encrypted = crypto_service.encrypt(db, value)
-    else:
-        hv.var_value = value
-
-    db.add(hv)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
         action="CREATE",
         resource_type="host_variable",
-        resource_id=str(hv.id),
+        resource_id=str(hv_id),
         details={"host": host.name, "variable": variable.var_key},
         ip_address=ip_address,
     )
@@ -328,9 +474,7 @@ def update_variable(
 
     # on verifie que la variable est bien assignee
     hv = db.execute(
-        select(HostVariable).where(
-            HostVariable.host_id == host.id, HostVariable.var_id == variable.id
-        )
+        _HOST_VARIABLE, {"host_id": host.id, "var_id": variable.id}
     ).scalar_one_or_none()
     if not hv:
         raise HTTPException(
@@ -377,9 +521,7 @@ def remove_variable(
 
     # on verifie que la variable est bien assignee
     hv = db.execute(
-        select(HostVariable).where(
-            HostVariable.host_id == host.id, HostVariable.var_id == variable.id
-        )
+        _HOST_VARIABLE, {"host_id": host.id, "var_id": variable.id}
     ).scalar_one_or_none()
     if not hv:
         raise HTTPException(
@@ -409,105 +551,48 @@ def bulk_assign_variables(
     ip_address: Optional[str] = None,
 ) -> dict:
     """Définit les valeurs de plusieurs variables pour un hôte (upsert)"""
-    assigned = []
-    updated = []
-    errors = []
-
-    for item in variables:
-        variable_ref = item["variable"]
-        value = item["value"]
-
-        # on resout la variable, si introuvable on l'ajoute aux erreurs
-        try:
-            variable = resolve_variable(db, variable_ref)
-        except HTTPException:
-            errors.append({
-                "variable": variable_ref,
-                "detail": f"Variable '{variable_ref}' introuvable",
-            })
-            continue
-
-        # on verifie si la variable est deja assignee
-        existing = db.execute(
-            select(HostVariable).where(
-                HostVariable.host_id == host.id, HostVariable.var_id == variable.id
-            )
-        ).scalar_one_or_none()
-
-        if existing:
-            # mise a jour de la valeur existante
-            if variable.is_sensitive:
-                existing.var_value_encrypted = crypto_service.encrypt(db, value)
-                existing.var_value = None
-            else:
-                existing.var_value = value
-                existing.var_value_encrypted = None
-            db.flush()
-
-            log_action(
-                db,
-                user_id=actor_id,
-                action="UPDATE",
-                resource_type="host_variable",
-                resource_id=str(existing.id),
-                details={"host": host.name, "variable": variable.var_key},
-                ip_address=ip_address,
-            )
-            updated.append({
-                "var_key": variable.var_key,
-                "value": "****" if variable.is_sensitive else value,
-                "is_sensitive": variable.is_sensitive,
-            })
-        else:
-            # nouvelle assignation
-            hv = HostVariable(host_id=host.id, var_id=variable.id)
-            if variable.is_sensitive:
-                hv.var_value_encrypted = crypto_service.encrypt(db, value)
-            else:
-                hv.var_value = value
-
-            db.add(hv)
-            db.flush()
-
-            log_action(
-                db,
-                user_id=actor_id,
-                action="CREATE",
-                resource_type="host_variable",
-                resource_id=str(hv.id),
-                details={"host": host.name, "variable": variable.var_key},
-                ip_address=ip_address,
-            )
-            assigned.append({
-                "var_key": variable.var_key,
-                "value": "****" if variable.is_sensitive else value,
-                "is_sensitive": variable.is_sensitive,
-            })
-
-    return {"assigned": assigned, "updated": updated, "errors": errors}
+    return variable_service.bulk_upsert_values(
+        db,
+        model=HostVariable,
+        owner_column="host_id",
+        owner_id=host.id,
+        resource_type="host_variable",
+        owner_details={"host": host.name},
+        variables=variables,
+        actor_id=actor_id,
+        ip_address=ip_address,
+    )
 
 
 def list_host_variables(
     db: Session, *, host: Host, reveal: bool = False
 ) -> list[dict]:
     """Liste les variables d'un hôte (sensibles masquées sauf reveal=true)"""
-    hvs = (
-        db.execute(select(HostVariable).where(HostVariable.host_id == host.id))
-        .scalars()
-        .all()
-    )
-    result = []
-    for hv in hvs:
-        var = db.get(Variable, hv.var_id)
-        if not var:
-            continue
+    rows = db.execute(
+        select(HostVariable, Variable)
+        .join(Variable, HostVariable.var_id == Variable.id)
+        .where(HostVariable.host_id == host.id)
+    ).all()
+
+    # on dechiffre toutes les valeurs sensibles en un seul aller-retour si reveal=true
+    decrypted = {}
+    if reveal:
+        to_decrypt = [
+            hv for hv, var in rows if var.is_sensitive and hv.var_value_encrypted
+        ]
+        decrypted = dict(
+            zip(
+                (hv.id for hv in to_decrypt),
+                crypto_service.decrypt_many(
+                    db, [hv.var_value_encrypted for hv in to_decrypt]
+                ),
+            )
+        )
 
-        # on dechiffre si sensible et reveal=true
+    result = []
+    for hv, var in rows:
         if var.is_sensitive:
-            if reveal and hv.var_value_encrypted:
-                val = crypto_service.decrypt(db, hv.var_value_encrypted)
-            else:
-                val = "****"
+            val = decrypted.get(hv.id, "****") if reveal else "****"
         else:
             val = hv.var_value
 
@@ -2,18 +2,40 @@
 Service de gestion des utilisateurs et API Keys
 """
 
+import secrets
 from datetime import datetime
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, raiseload
 
 from app.utils import generate_key, hash_password, verify_password
 from app.models.user import ApiKey, User
 from app.services.audit import log_action
 from app.services.crypto import encrypt_api_key, decrypt_api_key
 
+# ── Requetes de recherche construites une seule fois (parametres lies)
+
+# utilisateur et sa cle d'API par defaut active, en une seule ligne
+_USER_WITH_DEFAULT_KEY = (
+    select(User, ApiKey)
+    .outerjoin(
+        ApiKey,
+        and_(
+            ApiKey.user_id == User.id,
+            ApiKey.name == "default",
+            ApiKey.is_active == True,
+        ),
+    )
+    .where(User.username == bindparam("username"))
+    .limit(1)
+)
+
+# hash factice : un username inconnu coute autant qu'un mauvais mot de passe
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16))
+
 # ── Endpoints pour les utilisateurs
 
 
@@ -28,13 +50,17 @@ def authenticate_user(
     Retourne (User, clé API par défaut en clair).
     """
 
-    # on recupere l'utilisateur
-    user = db.execute(
-        select(User).where(User.username == username)
-    ).scalar_one_or_none()
+    # on recupere l'utilisateur et sa cle d'API par defaut en une requete
+    row = db.execute(_USER_WITH_DEFAULT_KEY, {"username": username}).first()
+    user, default_key = row if row else (None, None)
+
+    # on verifie toujours un hash (temps constant, pas d'enumeration des usernames)
+    password_ok = verify_password(
+        password, user.password_hash if user else _DUMMY_PASSWORD_HASH
+    )
 
     # s'il n'existe pas, on renseigne que la requete n'a pas marche
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not password_ok:
         log_action(
             db,
             user_id=None,
@@ -50,15 +76,6 @@ def authenticate_user(
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Utilisateur désactivé")
 
-    # on recupere la cle d'API par defaut de l'utilisateur
-    default_key = db.execute(
-        select(ApiKey).where(
-            ApiKey.user_id == user.id,
-            ApiKey.name == "default",
-            ApiKey.is_active == True,
-        )
-    ).scalar_one_or_none()
-
     if not default_key:
         raise HTTPException(
             status_code=500,
@@ -99,24 +116,22 @@ def create_user(
     Retourne (User, clé en clair).
     """
 
-    # on verifie si l'utilisateur avec le username donne n'existe pas
-    existing = db.execute(
-        select(User).where(User.username == username)
-    ).scalar_one_or_none()
-    if existing:
+    # on cree l'utilisateur ; la contrainte d'unicite detecte les doublons
+    user = db.scalars(
+        pg_insert(User)
+        .values(
+            username=username,
+            password_hash=hash_password(password),
+            is_superuser=is_superuser,
+        )
+        .on_conflict_do_nothing(index_elements=["username"])
+        .returning(User)
+    ).first()
+    if user is None:
         raise HTTPException(
             status_code=409, detail=f"Username '{username}' déjà utilisé"
         )
 
-    # si non on le cree et on l'ajoute
-    user = User(
-        username=username,
-        password_hash=hash_password(password),
-        is_superuser=is_superuser,
-    )
-    db.add(user)
-    db.flush()
-
     # on genere une cle d'API par defaut sans expiration
     raw_key, key_hash = generate_key()
     default_key = ApiKey(
@@ -146,13 +161,20 @@ def list_users(
     db: Session, *, offset: int = 0, limit: int = 50
 ) -> tuple[list[User], int]:
     """Liste paginée des utilisateurs"""
-    total = db.execute(select(func.count(User.id))).scalar_one()
-    users = (
-        db.execute(select(User).order_by(User.id).offset(offset).limit(limit))
-        .scalars()
-        .all()
-    )
-    return list(users), total
+    # le total est calcule par la meme requete (fenetre count() OVER ())
+    rows = db.execute(
+        select(User, func.count().over().label("total"))
+        .options(raiseload("*"))
+        .order_by(User.id)
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total
+
+    # page vide : le total n'est connu que par un comptage separe
+    total = db.execute(select(func.count(User.id))).scalar_one() if offset else 0
+    return [], total
 
 
 def get_user(db: Session, user: User) -> User:
@@ -263,15 +285,19 @@ def generate_api_key(
 
 def list_api_keys(db: Session, *, user: User) -> list[dict]:
     """Liste les API Keys d'un utilisateur avec les valeurs dechiffrees"""
-    keys = (
-        db.execute(
-            select(ApiKey)
-            .where(ApiKey.user_id == user.id)
-            .order_by(ApiKey.created_at.desc())
+    # seules les metadonnees sont lues : la valeur chiffree ne transite pas
+    keys = db.execute(
+        select(
+            ApiKey.id,
+            ApiKey.key_prefix,
+            ApiKey.name,
+            ApiKey.expires_at,
+            ApiKey.is_active,
+            ApiKey.created_at,
         )
-        .scalars()
-        .all()
-    )
+        .where(ApiKey.user_id == user.id)
+        .order_by(ApiKey.created_at.desc())
+    ).all()
     result = []
     for key in keys:
         result.append(
@@ -2,25 +2,37 @@
 Service de gestion du catalogue de variables et alias
 """
 
-from typing import Optional
+from typing import Optional, Union
 
 from fastapi import HTTPException
-from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, exists, func, literal_column, or_, select
+from sqlalchemy.orm import Session, aliased
 
 from sqlalchemy import delete as sql_delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.models import (
-    GroupRequiredVariable,
     GroupVariable,
     HostVariable,
     Variable,
     VariableAlias,
 )
-from app.dependencies.resolve import resolve_variable
+from app.dependencies.resolve import parse_ref, resolve_variable
+from app.services import crypto as crypto_service
 from app.services.audit import log_action
 
 
+# ── Filtres du catalogue construits une seule fois (parametres lies)
+
+_VARIABLE_FILTERS = {
+    "is_sensitive": Variable.is_sensitive == bindparam("is_sensitive"),
+    "is_ansible_builtin": (
+        Variable.is_ansible_builtin == bindparam("is_ansible_builtin")
+    ),
+    "var_type": Variable.var_type == bindparam("var_type"),
+}
+
+
 # ── Endpoints pour les variables
 
 
@@ -38,25 +50,23 @@ def create_variable(
 ) -> Variable:
     """Crée une nouvelle variable dans le catalogue"""
 
-    # on verifie si la variable avec la cle donnee n'existe pas
-    existing = db.execute(
-        select(Variable).where(Variable.var_key == var_key)
-    ).scalar_one_or_none()
-    if existing:
+    # on cree la variable ; la contrainte d'unicite sur var_key detecte les doublons
+    variable = db.scalars(
+        pg_insert(Variable)
+        .values(
+            var_key=var_key,
+            description=description,
+            is_sensitive=is_sensitive,
+            var_type=var_type,
+            default_value=default_value,
+            validation_regex=validation_regex,
+        )
+        .on_conflict_do_nothing(index_elements=["var_key"])
+        .returning(Variable)
+    ).first()
+    if variable is None:
         raise HTTPException(status_code=409, detail=f"Variable '{var_key}' existe déjà")
 
-    # si non on la cree et on l'ajoute
-    variable = Variable(
-        var_key=var_key,
-        description=description,
-        is_sensitive=is_sensitive,
-        var_type=var_type,
-        default_value=default_value,
-        validation_regex=validation_regex,
-    )
-    db.add(variable)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
@@ -69,38 +79,80 @@ def create_variable(
     return variable
 
 
+def _variable_filters(**filters) -> tuple[list, dict]:
+    """Sélectionne les filtres demandés parmi _VARIABLE_FILTERS.
+    Retourne (conditions, paramètres liés) ; les filtres à None sont ignorés.
+    """
+    params = {name: value for name, value in filters.items() if value is not None}
+    return [_VARIABLE_FILTERS[name] for name in params], params
+
+
 def list_variables(
     db: Session,
     *,
     offset: int = 0,
     limit: int = 50,
+    cursor_id: Optional[int] = None,
     is_sensitive: Optional[bool] = None,
     is_ansible_builtin: Optional[bool] = None,
     var_type: Optional[str] = None,
 ) -> tuple[list[Variable], int]:
-    """Liste paginée du catalogue de variables avec filtres"""
-
-    # on prepare les requetes avec les differents filtres
-    stmt = select(Variable)
-    count_stmt = select(func.count(Variable.id))
-
-    if is_sensitive is not None:
-        stmt = stmt.where(Variable.is_sensitive == is_sensitive)
-        count_stmt = count_stmt.where(Variable.is_sensitive == is_sensitive)
-    if is_ansible_builtin is not None:
-        stmt = stmt.where(Variable.is_ansible_builtin == is_ansible_builtin)
-        count_stmt = count_stmt.where(Variable.is_ansible_builtin == is_ansible_builtin)
-    if var_type is not None:
-        stmt = stmt.where(Variable.var_type == var_type)
-        count_stmt = count_stmt.where(Variable.var_type == var_type)
-
-    total = db.execute(count_stmt).scalar_one()
-    variables = (
-        db.execute(stmt.order_by(Variable.id).offset(offset).limit(limit))
-        .scalars()
-        .all()
+    """Liste paginée du catalogue de variables avec filtres.
+    Avec cursor_id, retourne les variables d'ID supérieur (offset ignoré).
+    """
+    conditions, params = _variable_filters(
+        is_sensitive=is_sensitive,
+        is_ansible_builtin=is_ansible_builtin,
+        var_type=var_type,
     )
-    return list(variables), total
+
+    if cursor_id is not None:
+        # pagination par curseur : on repart de la cle primaire, sans OFFSET ;
+        # le total (tous curseurs confondus) vient d'une sous-requete scalaire
+        total_col = (
+            select(func.count(Variable.id))
+            .where(*conditions)
+            .correlate(None)
+            .scalar_subquery()
+            .label("total")
+        )
+        stmt = (
+            select(Variable, total_col)
+            .where(*conditions, Variable.id > cursor_id)
+            .order_by(Variable.id)
+            .limit(limit)
+        )
+    else:
+        # jointure differee : l'OFFSET ne parcourt que les IDs, seules
+        # les lignes de la page sont lues en entier ; le total est calcule
+        # par la meme requete (fenetre count() OVER ())
+        page_ids = (
+            select(Variable.id, func.count().over().label("total"))
+            .where(*conditions)
+            .order_by(Variable.id)
+            .offset(offset)
+            .limit(limit)
+            .subquery("page_ids")
+        )
+        stmt = (
+            select(Variable, page_ids.c.total)
+            .join(page_ids, Variable.id == page_ids.c.id)
+            .order_by(Variable.id)
+        )
+
+    rows = db.execute(stmt, params).all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total
+    if cursor_id is None and offset == 0:
+        return [], 0
+    return [], _count_variables(db, conditions, params)
+
+
+def _count_variables(db: Session, conditions: list, params: dict) -> int:
+    """Total des variables quand la page demandee est vide"""
+    return db.execute(
+        select(func.count(Variable.id)).where(*conditions), params
+    ).scalar_one()
 
 
 def get_variable(db: Session, variable: Variable) -> Variable:
@@ -127,17 +179,16 @@ def update_variable(
 
     # on interdit le changement de is_sensitive si des valeurs existent
     if is_sensitive is not None and is_sensitive != variable.is_sensitive:
-        has_host_values = db.execute(
-            select(func.count(HostVariable.id)).where(
-                HostVariable.var_id == variable.id
-            )
-        ).scalar_one()
-        has_group_values = db.execute(
-            select(func.count(GroupVariable.id)).where(
-                GroupVariable.var_id == variable.id
+        # une seule requete, EXISTS s'arrete a la premiere valeur trouvee
+        has_values = db.execute(
+            select(
+                or_(
+                    exists().where(HostVariable.var_id == variable.id),
+                    exists().where(GroupVariable.var_id == variable.id),
+                )
             )
         ).scalar_one()
-        if has_host_values > 0 or has_group_values > 0:
+        if has_values:
             raise HTTPException(
                 status_code=400,
                 detail="Impossible de changer is_sensitive : des valeurs existent déjà",
@@ -145,19 +196,23 @@ def update_variable(
         variable.is_sensitive = is_sensitive
         changes["is_sensitive"] = is_sensitive
 
-    if description is not None:
+    if description is not None and description != variable.description:
         variable.description = description
         changes["description"] = description
-    if var_type is not None:
+    if var_type is not None and var_type != variable.var_type:
         variable.var_type = var_type
         changes["var_type"] = var_type
-    if default_value is not None:
+    if default_value is not None and default_value != variable.default_value:
         variable.default_value = default_value
         changes["default_value"] = default_value
-    if validation_regex is not None:
+    if validation_regex is not None and validation_regex != variable.validation_regex:
         variable.validation_regex = validation_regex
         changes["validation_regex"] = validation_regex
 
+    # rien ne change : ni UPDATE ni entree d'audit
+    if not changes:
+        return variable
+
     # puis on l'applique
     db.flush()
 
@@ -191,23 +246,9 @@ def delete_variable(
     var_id = variable.id
     var_key = variable.var_key
 
-    # on supprime les dependances avant la variable
-    db.execute(sql_delete(HostVariable).where(HostVariable.var_id == var_id))
-    db.execute(sql_delete(GroupVariable).where(GroupVariable.var_id == var_id))
-    db.execute(
-        sql_delete(GroupRequiredVariable).where(GroupRequiredVariable.var_id == var_id)
-    )
-    db.execute(
-        sql_delete(VariableAlias).where(
-            or_(
-                VariableAlias.alias_var_id == var_id,
-                VariableAlias.source_var_id == var_id,
-            )
-        )
-    )
-
-    db.delete(variable)
-    db.flush()
+    # un seul DELETE : valeurs, variables requises et alias suivent par les
+    # cles etrangeres ON DELETE CASCADE (indexees)
+    db.execute(sql_delete(Variable).where(Variable.id == var_id))
 
     log_action(
         db,
@@ -220,6 +261,120 @@ def delete_variable(
     )
 
 
+# ── Valeurs de variables des hotes et des groupes
+
+
+def bulk_upsert_values(
+    db: Session,
+    *,
+    model: Union[type[HostVariable], type[GroupVariable]],
+    owner_column: str,
+    owner_id: int,
+    resource_type: str,
+    owner_details: dict,
+    variables: list[dict],
+    actor_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+) -> dict:
+    """Définit les valeurs de plusieurs variables d'un hôte ou d'un groupe (upsert).
+    model est HostVariable ou GroupVariable, owner_column sa colonne
+    proprietaire (host_id / group_id).
+    """
+    assigned = []
+    updated = []
+    errors = []
+
+    # on resout toutes les references (id ou var_key) en une seule requete
+    refs = [parse_ref(item["variable"]) for item in variables]
+    ids = {ref_id for ref_id, _ in refs if ref_id is not None}
+    keys = {key for _, key in refs}
+    found = (
+        db.execute(
+            select(Variable).where(
+                or_(Variable.id.in_(ids), Variable.var_key.in_(keys))
+            )
+        )
+        .scalars()
+        .all()
+    )
+    by_id = {v.id: v for v in found}
+    by_key = {v.var_key: v for v in found}
+
+    # une ligne par variable, la derniere valeur donnee l'emporte
+    pending: dict[int, tuple[Variable, str]] = {}
+    for item, (ref_id, variable_ref) in zip(variables, refs):
+        variable = by_id.get(ref_id) or by_key.get(variable_ref)
+
+        # si introuvable on l'ajoute aux erreurs
+        if variable is None:
+            errors.append({
+                "variable": variable_ref,
+                "detail": f"Variable '{variable_ref}' introuvable",
+            })
+            continue
+        pending[variable.id] = (variable, item["value"])
+
+    if not pending:
+        return {"assigned": assigned, "updated": updated, "errors": errors}
+
+    # on chiffre toutes les valeurs sensibles en un seul aller-retour
+    sensitive = [
+        (variable.id, value)
+        for variable, value in pending.values()
+        if variable.is_sensitive
+    ]
+    encrypted = dict(
+        zip(
+            (var_id for var_id, _ in sensitive),
+            crypto_service.encrypt_many(db, [value for _, value in sensitive]),
+        )
+    )
+
+    rows = [
+        {
+            owner_column: owner_id,
+            "var_id": variable.id,
+            "var_value": None if variable.is_sensitive else value,
+            "var_value_encrypted": encrypted.get(variable.id),
+        }
+        for variable, value in pending.values()
+    ]
+
+    # un seul INSERT ... ON CONFLICT DO UPDATE ; xmax = 0 distingue les insertions
+    # (updated_at est renseigne par le trigger de la table)
+    stmt = pg_insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[owner_column, "var_id"],
+        set_={
+            "var_value": stmt.excluded.var_value,
+            "var_value_encrypted": stmt.excluded.var_value_encrypted,
+        },
+    ).returning(
+        model.id,
+        model.var_id,
+        literal_column("xmax = 0").label("inserted"),
+    )
+
+    for value_id, var_id, inserted in db.execute(stmt).all():
+        variable, value = pending[var_id]
+        log_action(
+            db,
+            user_id=actor_id,
+            action="CREATE" if inserted else "UPDATE",
+            resource_type=resource_type,
+            resource_id=str(value_id),
+            details={**owner_details, "variable": variable.var_key},
+            ip_address=ip_address,
+        )
+        (assigned if inserted else updated).append({
+            "var_key": variable.var_key,
+            "value": "****" if variable.is_sensitive else value,
+            "is_sensitive": variable.is_sensitive,
+        })
+
+    return {"assigned": assigned, "updated": updated, "errors": errors}
+
+
 # ── Endpoints pour les alias
 
 
@@ -239,23 +394,16 @@ def create_alias(
             status_code=400, detail="Une variable ne peut pas être son propre alias"
         )
 
-    # on verifie que l'alias n'existe pas deja
-    existing = db.execute(
-        select(VariableAlias).where(
-            VariableAlias.alias_var_id == alias_variable.id,
-            VariableAlias.source_var_id == source_variable.id,
-        )
-    ).scalar_one_or_none()
-    if existing:
+    # on cree l'alias, sauf s'il existe deja (contrainte d'unicite du couple)
+    alias = db.scalars(
+        pg_insert(VariableAlias)
+        .values(alias_var_id=alias_variable.id, source_var_id=source_variable.id)
+        .on_conflict_do_nothing(index_elements=["alias_var_id", "source_var_id"])
+        .returning(VariableAlias)
+    ).first()
+    if alias is None:
         raise HTTPException(status_code=409, detail="Cet alias existe déjà")
 
-    alias = VariableAlias(
-        alias_var_id=alias_variable.id,
-        source_var_id=source_variable.id,
-    )
-    db.add(alias)
-    db.flush()
-
     log_action(
         db,
         user_id=actor_id,
@@ -273,37 +421,29 @@ def create_alias(
 
 def list_aliases(db: Session, *, variable: Variable) -> list[dict]:
     """Liste les alias d'une variable (en tant que source ou alias)"""
-    aliases = (
-        db.execute(
-            select(VariableAlias).where(
-                or_(
-                    VariableAlias.alias_var_id == variable.id,
-                    VariableAlias.source_var_id == variable.id,
-                )
+    alias_var = aliased(Variable, name="alias_var")
+    source_var = aliased(Variable, name="source_var")
+
+    # les cles des deux variables sont jointes dans la meme requete (pas de N+1) ;
+    # les deux cles etrangeres sont NOT NULL, les jointures internes suffisent
+    rows = db.execute(
+        select(
+            VariableAlias.id,
+            alias_var.var_key.label("alias_var_key"),
+            source_var.var_key.label("source_var_key"),
+            VariableAlias.description,
+            VariableAlias.created_at,
+        )
+        .join(alias_var, alias_var.id == VariableAlias.alias_var_id)
+        .join(source_var, source_var.id == VariableAlias.source_var_id)
+        .where(
+            or_(
+                VariableAlias.alias_var_id == variable.id,
+                VariableAlias.source_var_id == variable.id,
             )
         )
-        .scalars()
-        .all()
     )
-
-    result = []
-    for a in aliases:
-        alias_var = db.get(Variable, a.alias_var_id)
-        source_var = db.get(Variable, a.source_var_id)
-        result.append(
-            {
-                "id": a.id,
-                "alias_var_key": (
-                    alias_var.var_key if alias_var else str(a.alias_var_id)
-                ),
-                "source_var_key": (
-                    source_var.var_key if source_var else str(a.source_var_id)
-                ),
-                "description": a.description,
-                "created_at": a.created_at,
-            }
-        )
-    return result
+    return [row._asdict() for row in rows]
 
 
 def delete_alias(
@@ -5,6 +5,11 @@ Utilitaires pour le projet Ansibase API
 import bcrypt
 import secrets
 
+from sqlalchemy import case, func
+
+# format ISO 8601 a la seconde, pour to_char de PostgreSQL
+_ISO_SECONDS = 'YYYY-MM-DD"T"HH24:MI:SS'
+
 
 def hash_password(password: str) -> str:
     """Hash un mot de passe avec bcrypt"""
@@ -22,3 +27,15 @@ def generate_key(length: int = 48) -> tuple[str, str]:
     key_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
     return raw_key, key_hash
+
+
+def iso_timestamp(column):
+    """Horodatage formaté par PostgreSQL comme le sérialise Pydantic.
+
+    ISO 8601 sans fuseau, microsecondes sur 6 chiffres ou omises si nulles :
+    les listes sérialisées en SQL et les réponses de détail concordent.
+    """
+    return case(
+        (func.to_char(column, "US") == "000000", func.to_char(column, _ISO_SECONDS)),
+        else_=func.to_char(column, _ISO_SECONDS + ".US"),
+    )
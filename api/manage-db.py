@@ -18,36 +18,33 @@ import sys
 from pathlib import Path
 
 from alembic.config import Config, CommandLine
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import Connection, create_engine, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.pool import NullPool
 
 
-def check_core_schema(database_url: str) -> None:
+def check_core_schema(conn: Connection) -> None:
     """Verifie que les migrations core sont appliquees avant de lancer l'API."""
-    engine = create_engine(database_url)
+    # une seule requete ciblee : table absente -> ProgrammingError, table vide -> None
     try:
-        with engine.connect() as conn:
-            table_names = inspect(engine).get_table_names()
-
-            if "alembic_version_core" not in table_names:
-                print(
-                    "ERREUR: le schema core n'est pas initialise.\n"
-                    "Executez d'abord : ansibase-db --config ansibase.ini upgrade",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-
-            result = conn.execute(text("SELECT version_num FROM alembic_version_core"))
-            versions = {row[0] for row in result}
-
-            if not versions:
-                print(
-                    "ERREUR: aucune migration core appliquee.\n"
-                    "Executez d'abord : ansibase-db --config ansibase.ini upgrade",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-    finally:
-        engine.dispose()
+        version = conn.execute(
+            text("SELECT version_num FROM alembic_version_core LIMIT 1")
+        ).scalar()
+    except ProgrammingError:
+        print(
+            "ERREUR: le schema core n'est pas initialise.\n"
+            "Executez d'abord : ansibase-db --config ansibase.ini upgrade",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if version is None:
+        print(
+            "ERREUR: aucune migration core appliquee.\n"
+            "Executez d'abord : ansibase-db --config ansibase.ini upgrade",
+            file=sys.stderr,
+        )
+        sys.exit(1)
 
 
 def main():
@@ -80,10 +77,20 @@ def main():
 
     # Verifier le prerequis core avant upgrade/downgrade
     cmd_name = options.cmd[0].__name__ if options.cmd else ""
-    if cmd_name in ("upgrade", "downgrade"):
-        check_core_schema(settings.database_url)
+    if cmd_name not in ("upgrade", "downgrade"):
+        cli.run_cmd(cfg, options)
+        return
 
-    cli.run_cmd(cfg, options)
+    # une seule connexion pour la verification et les migrations : env.py la
+    # reprend via cfg.attributes au lieu d'ouvrir la sienne
+    engine = create_engine(settings.database_url, poolclass=NullPool)
+    try:
+        with engine.begin() as conn:
+            check_core_schema(conn)
+            cfg.attributes["connection"] = conn
+            cli.run_cmd(cfg, options)
+    finally:
+        engine.dispose()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 """
 Fixtures de test pour l'API ansibase
-Utilise la base PostgreSQL réelle (les migrations doivent être appliquées)
+Utilise la base PostgreSQL réelle (les migrations doivent être appliquées).
+Une seule connexion et une seule application pour toute la session ; chaque
+test tourne dans un SAVEPOINT annulé à la fin.
 """
 
 import secrets
@@ -18,40 +20,28 @@ from app.models.user import ApiKey, User
 from app.services.crypto import encrypt_api_key
 
 
-# engine et session pour les tests (meme base, avec rollback par test)
+# engine et session pour les tests (meme base, tout est annule en fin de session)
 _engine = create_engine(settings.database_url, echo=False, pool_pre_ping=True)
 _TestSession = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
 
 
-@pytest.fixture()
-def db() -> Session:
-    """Session DB avec rollback automatique après chaque test"""
-    connection = _engine.connect()
-    transaction = connection.begin()
-    session = _TestSession(bind=connection)
-
-    yield session
-
-    session.close()
-    transaction.rollback()
-    connection.close()
-
-
-@pytest.fixture()
-def client(db: Session) -> TestClient:
-    """Client HTTP de test avec override de la session DB"""
-
-    def _override_get_db():
-        yield db
-
-    app.dependency_overrides[get_db] = _override_get_db
-    with TestClient(app) as c:
-        yield c
-    app.dependency_overrides.clear()
+def _create_api_key(db: Session, user: User, name: str) -> tuple[ApiKey, str]:
+    """Crée une clé API pour un utilisateur. Retourne (ApiKey, clé en clair)."""
+    raw_key = secrets.token_urlsafe(48)
+    key_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    api_key = ApiKey(
+        user_id=user.id,
+        key_hash=key_hash,
+        key_value_encrypted=encrypt_api_key(db, raw_key),
+        key_prefix=raw_key[:12],
+        name=name,
+    )
+    db.add(api_key)
+    db.flush()
+    return api_key, raw_key
 
 
-@pytest.fixture()
-def admin_user(db: Session) -> User:
+def _get_or_create_admin(db: Session) -> User:
     """Utilisateur admin existant en base (cree par la migration)"""
     user = db.execute(
         text("SELECT * FROM ansibase_users WHERE username = :u"),
@@ -60,10 +50,7 @@ def admin_user(db: Session) -> User:
     if user:
         return db.get(User, user.id)
 
-    # fallback : creer si absent (avec sa cle API par defaut)
-    raw_key = secrets.token_urlsafe(48)
-    key_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
+    # fallback : creer si absent (avec sa cle API par defaut pour le login)
     user = User(
         username="admin",
         password_hash=bcrypt.hashpw(b"admin", bcrypt.gensalt()).decode("utf-8"),
@@ -72,35 +59,81 @@ def admin_user(db: Session) -> User:
     )
     db.add(user)
     db.flush()
-
-    # on cree la cle API par defaut pour que le login fonctionne
-    default_key = ApiKey(
-        user_id=user.id,
-        key_hash=key_hash,
-        key_value_encrypted=encrypt_api_key(db, raw_key),
-        key_prefix=raw_key[:12],
-        name="default",
-    )
-    db.add(default_key)
-    db.flush()
+    _create_api_key(db, user, "default")
     return user
 
 
+# ── Fixtures partagees par toute la session de tests
+
+
+@pytest.fixture(scope="session")
+def _connection():
+    """Connexion unique, dans une transaction annulée en fin de session"""
+    connection = _engine.connect()
+    transaction = connection.begin()
+
+    yield connection
+
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session")
+def _seed(_connection) -> dict:
+    """Admin et clé API de test créés une seule fois (hachages bcrypt compris)"""
+    session = _TestSession(bind=_connection, join_transaction_mode="create_savepoint")
+    admin = _get_or_create_admin(session)
+    api_key, raw_key = _create_api_key(session, admin, "test-key")
+    seed = {"admin_id": admin.id, "api_key_id": api_key.id, "raw_key": raw_key}
+
+    # on libere le savepoint : les donnees restent visibles pour tous les tests
+    session.commit()
+    session.close()
+    return seed
+
+
+@pytest.fixture(scope="session")
+def _app_client() -> TestClient:
+    """Client HTTP unique (démarrage de l'application une seule fois)"""
+    with TestClient(app) as c:
+        yield c
+
+
+# ── Fixtures par test
+
+
+@pytest.fixture()
+def db(_connection) -> Session:
+    """Session DB isolée par un SAVEPOINT, annulé après chaque test"""
+    session = _TestSession(bind=_connection, join_transaction_mode="create_savepoint")
+
+    yield session
+
+    session.close()
+
+
 @pytest.fixture()
-def admin_api_key(db: Session, admin_user: User) -> tuple[ApiKey, str]:
+def client(_app_client: TestClient, db: Session) -> TestClient:
+    """Client HTTP de test avec override de la session DB"""
+
+    def _override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = _override_get_db
+    yield _app_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def admin_user(db: Session, _seed: dict) -> User:
+    """Utilisateur admin existant en base"""
+    return db.get(User, _seed["admin_id"])
+
+
+@pytest.fixture()
+def admin_api_key(db: Session, _seed: dict) -> tuple[ApiKey, str]:
     """API Key active pour l'admin. Retourne (ApiKey, cle en clair)."""
-    raw_key = secrets.token_urlsafe(48)
-    key_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-    api_key = ApiKey(
-        user_id=admin_user.id,
-        key_hash=key_hash,
-        key_value_encrypted=encrypt_api_key(db, raw_key),
-        key_prefix=raw_key[:12],
-        name="test-key",
-    )
-    db.add(api_key)
-    db.flush()
-    return api_key, raw_key
+    return db.get(ApiKey, _seed["api_key_id"]), _seed["raw_key"]
 
 
 @pytest.fixture()
@@ -127,18 +160,7 @@ def regular_user(db: Session) -> User:
 @pytest.fixture()
 def regular_api_key(db: Session, regular_user: User) -> tuple[ApiKey, str]:
     """API Key pour l'utilisateur non-superuser"""
-    raw_key = secrets.token_urlsafe(48)
-    key_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-    api_key = ApiKey(
-        user_id=regular_user.id,
-        key_hash=key_hash,
-        key_value_encrypted=encrypt_api_key(db, raw_key),
-        key_prefix=raw_key[:12],
-        name="regular-test-key",
-    )
-    db.add(api_key)
-    db.flush()
-    return api_key, raw_key
+    return _create_api_key(db, regular_user, "regular-test-key")
 
 
 @pytest.fixture()
@@ -46,3 +46,40 @@ def test_audit_acces_non_superuser(client, regular_auth_headers, auth_headers):
     """Non-superuser ne peut pas voir les logs → 403"""
     resp = client.get("/api/v1/audit-logs", headers=regular_auth_headers)
     assert resp.status_code == 403
+
+
+# ── Adresse IP du client (X-Forwarded-For)
+
+
+def _requete(forwarded: str):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "headers": [(b"x-forwarded-for", forwarded.encode())],
+        "client": ("10.0.0.5", 1234),
+    })
+
+
+def test_client_ip_entree_la_plus_a_droite(monkeypatch):
+    """L'entree ajoutee par le proxy est retenue, pas celle fournie par le client"""
+    from app.config import settings
+    from app.dependencies.request import client_ip
+
+    monkeypatch.setattr(settings, "ANSIBASE_TRUST_PROXY_HEADERS", True)
+    assert client_ip(_requete("1.1.1.1, 5.6.7.8")) == "5.6.7.8"
+    # entree invalide ou trop longue : repli sur l'adresse du pair
+    assert client_ip(_requete("x" * 100)) == "10.0.0.5"
+
+
+def test_audit_x_forwarded_for_invalide(client, auth_headers, monkeypatch):
+    """Un X-Forwarded-For forge ne fait pas echouer la mutation"""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ANSIBASE_TRUST_PROXY_HEADERS", True)
+    resp = client.post(
+        "/api/v1/hosts",
+        json={"name": "audit-xff-h"},
+        headers={**auth_headers, "X-Forwarded-For": "x" * 100},
+    )
+    assert resp.status_code == 201
@@ -83,6 +83,26 @@ def test_renommer_all_interdit(client, auth_headers):
     assert resp.status_code == 400
 
 
+def test_parent_cycle_interdit(client, auth_headers):
+    """Un groupe ne peut pas devenir son propre parent ni celui de son parent → 400"""
+    client.post("/api/v1/groups", json={"name": "cycle_a"}, headers=auth_headers)
+    client.post(
+        "/api/v1/groups",
+        json={"name": "cycle_b", "parent": "cycle_a"},
+        headers=auth_headers,
+    )
+
+    resp = client.put(
+        "/api/v1/groups/cycle_a", json={"parent": "cycle_a"}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+
+    resp = client.put(
+        "/api/v1/groups/cycle_a", json={"parent": "cycle_b"}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+
+
 # ── Supprimer un groupe
 
 
@@ -179,6 +199,34 @@ def test_retirer_variable_groupe(client, auth_headers):
     assert resp.status_code == 204
 
 
+def test_affecter_variables_groupe_en_masse(client, auth_headers):
+    """Upsert en masse : création, mise à jour et référence inconnue"""
+    client.post("/api/v1/groups", json={"name": "bulk_grp", "parent": "all"}, headers=auth_headers)
+    client.post("/api/v1/variables", json={"var_key": "bulk_old"}, headers=auth_headers)
+    client.post("/api/v1/variables", json={"var_key": "bulk_new"}, headers=auth_headers)
+    client.post(
+        "/api/v1/groups/bulk_grp/variables",
+        json={"variable": "bulk_old", "value": "old"},
+        headers=auth_headers,
+    )
+    resp = client.put(
+        "/api/v1/groups/bulk_grp/variables",
+        json={
+            "variables": [
+                {"variable": "bulk_old", "value": "new"},
+                {"variable": "bulk_new", "value": "val"},
+                {"variable": "unknown_bulk_grp_var", "value": "x"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [v["var_key"] for v in data["updated"]] == ["bulk_old"]
+    assert [v["var_key"] for v in data["assigned"]] == ["bulk_new"]
+    assert data["errors"][0]["variable"] == "unknown_bulk_grp_var"
+
+
 # ── Variables requises
 
 
@@ -36,6 +36,37 @@ def test_lister_hotes(client, auth_headers):
     assert resp.json()["total"] >= 1
 
 
+def test_lister_hotes_pagination_link(client, auth_headers):
+    """En-tête Link prev/next sur la liste paginée"""
+    for i in range(3):
+        client.post("/api/v1/hosts", json={"name": f"page_h{i}"}, headers=auth_headers)
+    resp = client.get("/api/v1/hosts?page=2&per_page=1", headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["pages"] == data["total"]
+    assert 'rel="prev"' in resp.headers["link"]
+    assert "page=1" in resp.headers["link"]
+    assert 'rel="next"' in resp.headers["link"]
+
+
+def test_lister_hotes_expand(client, auth_headers):
+    """Relations incluses via ?expand="""
+    client.post("/api/v1/hosts", json={"name": "exp_h1"}, headers=auth_headers)
+    client.post("/api/v1/groups", json={"name": "exp_grp", "parent": "all"}, headers=auth_headers)
+    client.post(
+        "/api/v1/hosts/exp_h1/groups",
+        json={"group": "exp_grp"},
+        headers=auth_headers,
+    )
+    resp = client.get(
+        "/api/v1/hosts?search=exp_h1&expand=groups,variables", headers=auth_headers
+    )
+    assert resp.status_code == 200
+    item = resp.json()["items"][0]
+    assert "exp_grp" in item["groups"]
+    assert item["variables"] == []
+
+
 def test_lister_hotes_filtre_active(client, auth_headers):
     """Filtre is_active"""
     client.post(
@@ -259,3 +290,29 @@ def test_retirer_variable_hote(client, auth_headers):
     )
     resp = client.delete("/api/v1/hosts/rm_var_h/variables/ansible_host", headers=auth_headers)
     assert resp.status_code == 204
+
+
+def test_affecter_variables_en_masse(client, auth_headers):
+    """Upsert en masse : création, mise à jour et référence inconnue"""
+    client.post("/api/v1/hosts", json={"name": "bulk_h"}, headers=auth_headers)
+    client.post(
+        "/api/v1/hosts/bulk_h/variables",
+        json={"variable": "ansible_host", "value": "10.0.0.1"},
+        headers=auth_headers,
+    )
+    resp = client.put(
+        "/api/v1/hosts/bulk_h/variables",
+        json={
+            "variables": [
+                {"variable": "ansible_host", "value": "10.0.0.2"},
+                {"variable": "ansible_port", "value": "2222"},
+                {"variable": "unknown_bulk_var", "value": "x"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [v["var_key"] for v in data["updated"]] == ["ansible_host"]
+    assert [v["var_key"] for v in data["assigned"]] == ["ansible_port"]
+    assert data["errors"][0]["variable"] == "unknown_bulk_var"
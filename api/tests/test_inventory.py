@@ -19,15 +19,15 @@ def _setup_inventory_data(client, auth_headers):
         json={"group": "inv-webservers"},
         headers=auth_headers,
     )
-    # assigner des variables a l'hote
-    client.post(
-        "/api/v1/hosts/inv-web01/variables",
-        json={"variable": "ansible_host", "value": "192.168.1.10"},
-        headers=auth_headers,
-    )
-    client.post(
+    # assigner des variables a l'hote (un seul appel en masse)
+    client.put(
         "/api/v1/hosts/inv-web01/variables",
-        json={"variable": "ansible_user", "value": "deploy"},
+        json={
+            "variables": [
+                {"variable": "ansible_host", "value": "192.168.1.10"},
+                {"variable": "ansible_user", "value": "deploy"},
+            ]
+        },
         headers=auth_headers,
     )
 
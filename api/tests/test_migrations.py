@@ -0,0 +1,32 @@
+"""
+Tests des migrations de l'API : chaque revision doit tenir dans version_num
+(VARCHAR(32)), sans connexion a la base
+"""
+
+import ast
+from pathlib import Path
+
+import pytest
+
+VERSIONS_DIR = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+# Taille de la colonne version_num de la table de suivi
+VERSION_NUM_LENGTH = 32
+
+
+def _revision(path: Path) -> str:
+    """Lit l'identifiant de revision sans importer le module de migration"""
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "revision"
+            for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise AssertionError(f"{path.name} : revision introuvable")
+
+
+@pytest.mark.parametrize(
+    "path", sorted(VERSIONS_DIR.glob("[0-9]*.py")), ids=lambda p: p.stem
+)
+def test_revision_tient_dans_version_num(path):
+    assert len(_revision(path)) <= VERSION_NUM_LENGTH
@@ -82,6 +82,18 @@ def test_lister_variables_filtre_builtin(client, auth_headers):
         assert v["is_ansible_builtin"] is True
 
 
+def test_lister_variables_curseur(client, auth_headers):
+    """Pagination par curseur : ?after=<id> reprend après l'ID donné"""
+    first = client.get("/api/v1/variables?per_page=2", headers=auth_headers).json()
+    last_id = first["items"][-1]["id"]
+    resp = client.get(
+        f"/api/v1/variables?per_page=2&after={last_id}", headers=auth_headers
+    )
+    assert resp.status_code == 200
+    for v in resp.json()["items"]:
+        assert v["id"] > last_id
+
+
 # ── Voir une variable
 
 
@@ -2,11 +2,23 @@
 Ansibase - Inventaire Ansible dynamique avec PostgreSQL
 """
 
-__version__ = "1.0.0"
+from typing import TYPE_CHECKING
 
-from .database import Database, DatabaseConfig
-from .crypto import PgCrypto
-from .builder import InventoryBuilder
+__version__ = "1.1.0"
+
+if TYPE_CHECKING:
+    from .database import Database, DatabaseConfig
+    from .crypto import PgCrypto
+    from .builder import InventoryBuilder
+
+# Exports charges a la demande (PEP 562) : importer ansibase.config ou lancer
+# un script avec --help ne charge pas SQLAlchemy
+_LAZY_EXPORTS = {
+    "Database": ".database",
+    "DatabaseConfig": ".database",
+    "PgCrypto": ".crypto",
+    "InventoryBuilder": ".builder",
+}
 
 __all__ = [
     "Database",
@@ -14,3 +26,15 @@ __all__ = [
     "PgCrypto",
     "InventoryBuilder",
 ]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
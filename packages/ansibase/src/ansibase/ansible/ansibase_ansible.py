@@ -80,49 +80,57 @@ class InventoryModule(BaseInventoryPlugin):
             inventory: Objet inventaire Ansible
             inventory_data: Données d'inventaire depuis ansibase
         """
+        # Méthodes et index liés une fois (boucles chaudes sur les gros inventaires)
+        add_group = inventory.add_group
+        add_host = inventory.add_host
+        add_child = inventory.add_child
+        set_variable = inventory.set_variable
+        hosts = inventory.hosts
+        groups = inventory.groups
+
         # Ajouter les groupes
         for group_name, group_data in inventory_data.items():
             if group_name == "_meta":
                 continue
 
             # Créer le groupe
-            inventory.add_group(group_name)
+            add_group(group_name)
 
             # Ajouter les hôtes au groupe
             if "hosts" in group_data:
                 for host_name in group_data["hosts"]:
                     # Créer l'hôte s'il n'existe pas
-                    if host_name not in inventory.hosts:
-                        inventory.add_host(host_name)
+                    if host_name not in hosts:
+                        add_host(host_name)
 
                     # Ajouter l'hôte au groupe
-                    inventory.add_child(group_name, host_name)
+                    add_child(group_name, host_name)
 
             # Ajouter les groupes enfants
             if "children" in group_data:
                 for child_name in group_data["children"]:
                     # Créer le groupe enfant s'il n'existe pas
-                    if child_name not in inventory.groups:
-                        inventory.add_group(child_name)
+                    if child_name not in groups:
+                        add_group(child_name)
 
                     # Ajouter la relation parent-enfant
-                    inventory.add_child(group_name, child_name)
+                    add_child(group_name, child_name)
 
             # Ajouter les variables de groupe
             if "vars" in group_data:
                 for var_key, var_value in group_data["vars"].items():
-                    inventory.set_variable(group_name, var_key, var_value)
+                    set_variable(group_name, var_key, var_value)
 
         # Ajouter les variables d'hôtes (hostvars)
         if "_meta" in inventory_data and "hostvars" in inventory_data["_meta"]:
             for host_name, host_vars in inventory_data["_meta"]["hostvars"].items():
                 # Créer l'hôte s'il n'existe pas encore
-                if host_name not in inventory.hosts:
-                    inventory.add_host(host_name)
+                if host_name not in hosts:
+                    add_host(host_name)
 
                 # Ajouter les variables
                 for var_key, var_value in host_vars.items():
-                    inventory.set_variable(host_name, var_key, var_value)
+                    set_variable(host_name, var_key, var_value)
 
     def _generate_inventory(self, db_config: Dict[str, Any], encryption_key: str):
         """
@@ -148,8 +156,8 @@ class InventoryModule(BaseInventoryPlugin):
             inventory_data = builder.build()
             return inventory_data
         finally:
+            # le pool reste ouvert pour les appels suivants a parse()
             session.close()
-            database.close()
 
     def parse(self, inventory, loader, path, cache):
         """
@@ -5,34 +5,175 @@ Script d'inventaire dynamique ansibase
 
 import os
 import sys
+import stat
 import json
+import time
+import hashlib
 import argparse
+import tempfile
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel (extra "orjson")
+    orjson = None
 
-from ansibase.builder import InventoryBuilder
 from ansibase.config import load_config
-from ansibase.crypto import PgCrypto
-from ansibase.database import Database, DatabaseConfig
 
 
-def generate_inventory(config):
-    """Génère l'inventaire complet"""
+def _dumps(data, pretty=False):
+    """Sérialise en JSON (bytes), avec orjson si disponible"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return json.dumps(data, indent=2 if pretty else None).encode("utf-8")
+
+
+def _loads(raw):
+    """Désérialise du JSON (bytes), avec orjson si disponible"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _stream_json(out, data, depth):
+    """
+    Écrit un document JSON fragment par fragment : les dictionnaires sont
+    déroulés sur `depth` niveaux, le reste est sérialisé d'un bloc
+    """
+    if depth == 0 or not isinstance(data, dict):
+        out.write(_dumps(data))
+        return
+
+    out.write(b"{")
+    for i, (key, value) in enumerate(data.items()):
+        if i:
+            out.write(b",")
+        out.write(_dumps(key))
+        out.write(b":")
+        _stream_json(out, value, depth - 1)
+    out.write(b"}")
+
+
+def _cache_dir():
+    """Répertoire de cache propre à l'utilisateur ($XDG_CACHE_HOME/ansibase)"""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ansibase"
+
+
+def _cache_path(config):
+    """Fichier de cache propre à la base ciblée par la configuration"""
+    digest = hashlib.sha1(
+        json.dumps(config["database"], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return _cache_dir() / f"inventory_{digest}.json"
+
+
+def _is_private(st):
+    """Fichier ou répertoire appartenant à l'utilisateur, sans accès groupe/autres"""
+    return st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) & 0o077 == 0
+
+
+def _read_cache(cache_path, ttl):
+    """Inventaire en cache s'il est encore valide, sinon None"""
+    try:
+        with open(cache_path, "rb") as f:
+            # fstat sur le descripteur ouvert : c'est bien ce fichier qui est lu
+            st = os.fstat(f.fileno())
+            # le cache contient des secrets dechiffres : un fichier d'un autre
+            # utilisateur ou lisible par d'autres est ignore
+            if not _is_private(st) or time.time() - st.st_mtime >= ttl:
+                return None
+            return _loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, inventory):
+    """Écrit le cache de façon atomique (fichier temporaire puis renommage)"""
+    # cache best-effort : un echec d'ecriture ne bloque pas l'inventaire
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # repertoire preexistant : il doit nous appartenir et rester prive
+        if not _is_private(cache_path.parent.stat()):
+            return
+        # mkstemp cree le fichier en 0600 : les variables dechiffrees restent privees
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_dumps(inventory))
+        os.replace(tmp, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _open_builder(config):
+    """Session et constructeur d'inventaire pour la base configurée"""
+    # imports differes : --help et un inventaire servi par le cache
+    # ne chargent pas SQLAlchemy
+    from ansibase.builder import InventoryBuilder
+    from ansibase.crypto import PgCrypto
+    from ansibase.database import Database, DatabaseConfig
+
     db_config = DatabaseConfig.from_dict(config["database"])
     database = Database(db_config)
     crypto = PgCrypto(config["encryption"]["key"])
 
     session = database.get_session()
+    return session, InventoryBuilder(session, crypto)
+
+
+def build_inventory(config):
+    """Construit l'inventaire complet depuis la base.
+
+    Retourne (inventaire, complet) ; complet vaut False si des valeurs
+    sensibles n'ont pas pu être déchiffrées.
+    """
+    session, builder = _open_builder(config)
 
     try:
-        builder = InventoryBuilder(session, crypto)
-        return builder.build()
+        return builder.build(), builder.undecrypted == 0
     finally:
         session.close()
 
 
+def generate_inventory(config):
+    """Génère l'inventaire complet (servi depuis le cache si activé et valide)"""
+    cache = config.get("cache", {})
+    if not cache.get("enabled"):
+        return build_inventory(config)[0]
+
+    cache_path = _cache_path(config)
+    inventory = _read_cache(cache_path, cache.get("ttl", 300))
+    if inventory is None:
+        inventory, complete = build_inventory(config)
+        # un inventaire degrade n'est pas garde pendant tout le TTL
+        if complete:
+            _write_cache(cache_path, inventory)
+
+    return inventory
+
+
 def get_host_vars(config, hostname):
-    """Récupère les variables d'un hôte"""
-    inventory = generate_inventory(config)
-    return inventory["_meta"]["hostvars"].get(hostname, {})
+    """Récupère les variables d'un hôte (cache valide, sinon requête ciblée)"""
+    cache = config.get("cache", {})
+    if cache.get("enabled"):
+        inventory = _read_cache(_cache_path(config), cache.get("ttl", 300))
+        if inventory is not None:
+            return inventory["_meta"]["hostvars"].get(hostname, {})
+
+    # pas d'inventaire complet : seules les variables de l'hote sont chargees
+    session, builder = _open_builder(config)
+
+    try:
+        return builder.build_host(hostname)
+    finally:
+        session.close()
 
 
 def main():
@@ -63,8 +204,14 @@ def main():
         elif args.host:
             result = get_host_vars(config, args.host)
 
-        indent = 2 if args.pretty else None
-        print(json.dumps(result, indent=indent))
+        out = sys.stdout.buffer
+        if args.list and not args.pretty:
+            # inventaire ecrit groupe par groupe et hote par hote
+            # (racine -> _meta -> hostvars -> hote) : pas de copie serialisee complete
+            _stream_json(out, result, depth=3)
+        else:
+            out.write(_dumps(result, pretty=args.pretty))
+        out.write(b"\n")
 
     except Exception as e:
         print(f"ERREUR: {e}", file=sys.stderr)
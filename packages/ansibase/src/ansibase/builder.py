@@ -3,12 +3,15 @@ Constructeur d'inventaire Ansible pour ansibase
 Utilise une structure arborescente pour gérer la hiérarchie des groupes
 """
 
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple, Any
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, aliased
 
 from .models import (
     Host,
-    Group,
     Variable,
     VariableAlias,
     HostVariable,
@@ -18,6 +21,76 @@ from .models import (
 from .crypto import PgCrypto
 from .graph import GroupTree
 
+# Parcours de la hiérarchie côté serveur ; le chemin protège contre les cycles
+_GROUP_HIERARCHY_SQL = text(
+    """
+    WITH RECURSIVE t AS (
+        SELECT id, parent_id, name, description, 0 AS depth, ARRAY[id] AS path
+        FROM ansibase_groups
+        WHERE parent_id IS NULL
+        UNION ALL
+        SELECT g.id, g.parent_id, g.name, g.description, t.depth + 1, t.path || g.id
+        FROM ansibase_groups g
+        JOIN t ON g.parent_id = t.id
+        WHERE NOT g.id = ANY(t.path)
+    )
+    SELECT id, parent_id, name, description, depth, path
+    FROM t
+    ORDER BY depth DESC, id
+    """
+)
+
+# Requêtes Core construites une seule fois (lignes légères, pas d'entités ORM)
+_alias_var = aliased(Variable)
+_source_var = aliased(Variable)
+
+_ALIASES_STMT = (
+    select(_alias_var.var_key, _source_var.var_key)
+    .select_from(VariableAlias)
+    .join(_alias_var, VariableAlias.alias_var_id == _alias_var.id)
+    .join(_source_var, VariableAlias.source_var_id == _source_var.id)
+)
+
+_GROUP_VARS_STMT = select(
+    GroupVariable.group_id,
+    Variable.var_key,
+    GroupVariable.var_value,
+    GroupVariable.var_value_encrypted,
+    Variable.is_sensitive,
+).join(Variable, Variable.id == GroupVariable.var_id)
+
+# Jointure externe : les hôtes sans groupe sont aussi retournés (group_id à None)
+_MEMBERSHIPS_STMT = (
+    select(Host.name, HostGroup.group_id)
+    .outerjoin(HostGroup, HostGroup.host_id == Host.id)
+    .where(Host.is_active.is_(True))
+)
+
+_HOST_VARS_STMT = (
+    select(
+        Host.name,
+        Variable.var_key,
+        HostVariable.var_value,
+        HostVariable.var_value_encrypted,
+        Variable.is_sensitive,
+    )
+    .join(HostVariable, HostVariable.host_id == Host.id)
+    .join(Variable, Variable.id == HostVariable.var_id)
+    .where(Host.is_active.is_(True))
+)
+
+_HOST_VARS_BY_NAME_STMT = (
+    select(
+        Variable.var_key,
+        HostVariable.var_value,
+        HostVariable.var_value_encrypted,
+        Variable.is_sensitive,
+    )
+    .join(Host, Host.id == HostVariable.host_id)
+    .join(Variable, Variable.id == HostVariable.var_id)
+    .where(Host.name == bindparam("hostname"), Host.is_active.is_(True))
+)
+
 
 class InventoryBuilder:
     """
@@ -37,28 +110,74 @@ class InventoryBuilder:
         self.crypto: PgCrypto = crypto
         self.tree: GroupTree = GroupTree()
         self.aliases: Dict[str, str] = {}
+        self.aliases_by_source: Dict[str, List[str]] = defaultdict(list)
+        self.hierarchy: List[Any] = []
+        self.raw_host_vars: Dict[str, Dict[str, Any]] = {}
         self.inventory: Dict[str, Any] = {"_meta": {"hostvars": {}}}
+        # Valeurs sensibles illisibles (remplacées par None) : un inventaire
+        # incomplet ne doit pas être mis en cache
+        self.undecrypted: int = 0
 
     def load_aliases(self) -> None:
         """
         Charge tous les alias de variables depuis la base de données
+        (une seule requête, les deux clés sont jointes)
         """
-        alias_records = self.session.query(VariableAlias).all()
+        rows = self.session.execute(_ALIASES_STMT).all()
 
-        for alias_record in alias_records:
-            alias_var = (
-                self.session.query(Variable)
-                .filter_by(id=alias_record.alias_var_id)
-                .first()
-            )
-            source_var = (
-                self.session.query(Variable)
-                .filter_by(id=alias_record.source_var_id)
-                .first()
-            )
+        self.aliases = {alias_key: source_key for alias_key, source_key in rows}
+
+        # Index inverse : clé source -> alias, pour ne parcourir que les
+        # alias des clés réellement présentes
+        self.aliases_by_source = defaultdict(list)
+        for alias_key, source_key in self.aliases.items():
+            self.aliases_by_source[source_key].append(alias_key)
+
+    def decrypt_pending(
+        self, pending: List[Tuple[Dict[str, Any], str, bytes]]
+    ) -> None:
+        """
+        Déchiffre un lot de valeurs sensibles en un seul aller-retour
+        et les range dans leurs dictionnaires de destination
+
+        Args:
+            pending: Triplets (dictionnaire cible, clé, valeur chiffrée)
+        """
+        if not pending:
+            return
+
+        # Chaque tentative dans un SAVEPOINT : une erreur pgcrypto n'annule
+        # que la tentative, pas la transaction (ni les valeurs suivantes)
+        try:
+            with self.session.begin_nested():
+                values = self.crypto.decrypt_values(
+                    self.session, [encrypted for _, _, encrypted in pending]
+                )
+        except DBAPIError as e:
+            # Repli valeur par valeur : seules les valeurs illisibles sont perdues
+            print(f"Erreur lors du déchiffrement groupé: {e}", file=sys.stderr)
+            values = [self._decrypt_one(encrypted) for _, _, encrypted in pending]
+
+        for (target, key, _), value in zip(pending, values):
+            target[key] = value
+
+    def _decrypt_one(self, encrypted: bytes) -> Any:
+        """
+        Déchiffre une seule valeur dans son propre SAVEPOINT
 
-            if alias_var and source_var:
-                self.aliases[alias_var.var_key] = source_var.var_key
+        Args:
+            encrypted: Valeur chiffrée
+
+        Returns:
+            Valeur déchiffrée, ou None si elle est illisible
+        """
+        try:
+            with self.session.begin_nested():
+                return self.crypto.decrypt_values(self.session, [encrypted])[0]
+        except DBAPIError as e:
+            print(f"Valeur sensible illisible ignorée: {e}", file=sys.stderr)
+            self.undecrypted += 1
+            return None
 
     def resolve_aliases(self, variables: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -72,22 +191,33 @@ class InventoryBuilder:
         """
         resolved: Dict[str, Any] = variables.copy()
 
-        for alias_key, source_key in self.aliases.items():
-            # Si l'alias n'existe pas mais la source oui, créer l'alias
-            if alias_key not in resolved and source_key in resolved:
-                resolved[alias_key] = resolved[source_key]
+        for source_key, value in variables.items():
+            # Créer les alias de cette source qui n'existent pas encore
+            for alias_key in self.aliases_by_source.get(source_key, ()):
+                if alias_key not in resolved:
+                    resolved[alias_key] = value
 
         return resolved
 
+    def fetch_group_hierarchy(self) -> List[Any]:
+        """
+        Récupère la hiérarchie des groupes calculée par PostgreSQL (WITH RECURSIVE)
+
+        Returns:
+            Lignes (id, parent_id, name, description, depth, path) triées par
+            profondeur décroissante : les enfants précèdent leurs parents
+        """
+        return self.session.execute(_GROUP_HIERARCHY_SQL).all()
+
     def build_group_tree(self) -> None:
         """
         Construit l'arbre des groupes depuis la base de données
         """
-        # Récupérer tous les groupes
-        groups = self.session.query(Group).all()
+        # Récupérer tous les groupes, déjà ordonnés par la base
+        self.hierarchy = self.fetch_group_hierarchy()
 
-        # Première passe : créer tous les nœuds
-        for group in groups:
+        # Première passe : créer tous les nœuds (parents avant enfants)
+        for group in reversed(self.hierarchy):
             self.tree.add_group(
                 group_id=group.id,
                 name=group.name,
@@ -95,154 +225,93 @@ class InventoryBuilder:
                 parent_id=group.parent_id,
             )
 
-        # Deuxième passe : charger les variables de chaque groupe
-        for group in groups:
-            node = self.tree.get_node(group.id)
-            if node:
-                node.variables = self.load_group_variables(group.id)
-
-    def load_group_variables(self, group_id: int) -> Dict[str, Any]:
-        """
-        Charge les variables d'un groupe spécifique
-
-        Args:
-            group_id: ID du groupe
-
-        Returns:
-            Dictionnaire des variables
-        """
-        variables: Dict[str, Any] = {}
-
-        group_vars = (
-            self.session.query(GroupVariable).filter_by(group_id=group_id).all()
-        )
-
-        for gv in group_vars:
-            variable = self.session.query(Variable).filter_by(id=gv.var_id).first()
+        # Deuxième passe : charger les variables de tous les groupes en une requête
+        pending: List[Tuple[Dict[str, Any], str, bytes]] = []
+        rows = self.session.execute(_GROUP_VARS_STMT).all()
 
-            if not variable:
+        for group_id, var_key, var_value, var_value_encrypted, is_sensitive in rows:
+            node = self.tree.get_node(group_id)
+            if not node:
                 continue
 
-            # Déchiffrer si nécessaire
-            if variable.is_sensitive and gv.var_value_encrypted:
-                value = self.crypto.decrypt_value(self.session, gv.var_value_encrypted)
+            # Valeurs sensibles déchiffrées ensuite, en un seul lot
+            if is_sensitive and var_value_encrypted:
+                pending.append((node.variables, var_key, var_value_encrypted))
             else:
-                value = gv.var_value
-
-            variables[variable.var_key] = value
+                node.variables[var_key] = var_value
 
-        return variables
+        self.decrypt_pending(pending)
 
     def load_hosts(self) -> None:
         """
         Charge tous les hôtes actifs et les assigne à leurs groupes
+        (deux requêtes : appartenances puis variables de tous les hôtes)
+        Les variables sont gardées brutes ; voir finalize_hostvars
         """
-        hosts = self.session.query(Host).filter_by(is_active=True).all()
+        hostvars = self.raw_host_vars
 
-        for host in hosts:
-            # Récupérer les groupes de l'hôte via la table de liaison HostGroup
-            host_group_records = (
-                self.session.query(HostGroup).filter_by(host_id=host.id).all()
-            )
+        # Appartenances aux groupes
+        memberships = self.session.execute(_MEMBERSHIPS_STMT).all()
 
-            for hg in host_group_records:
-                # Récupérer le groupe correspondant
-                group = self.session.query(Group).filter_by(id=hg.group_id).first()
-                if group:
-                    node = self.tree.get_node(group.id)
-                    if node:
-                        node.hosts.add(host.name)
+        for host_name, group_id in memberships:
+            hostvars.setdefault(host_name, {})
+            if group_id is not None:
+                self.tree.add_host(group_id, host_name)
 
-            # Charger les variables de l'hôte
-            host_vars = self.load_host_variables(host.id)
+        # Variables de tous les hôtes actifs
+        pending: List[Tuple[Dict[str, Any], str, bytes]] = []
+        rows = self.session.execute(_HOST_VARS_STMT).all()
 
-            # Résoudre les alias
-            host_vars = self.resolve_aliases(host_vars)
+        for host_name, var_key, var_value, var_value_encrypted, is_sensitive in rows:
+            # Valeurs sensibles déchiffrées ensuite, en un seul lot
+            if is_sensitive and var_value_encrypted:
+                pending.append((hostvars[host_name], var_key, var_value_encrypted))
+            else:
+                hostvars[host_name][var_key] = var_value
 
-            # Stocker dans _meta.hostvars
-            self.inventory["_meta"]["hostvars"][host.name] = host_vars
+        self.decrypt_pending(pending)
 
-    def load_host_variables(self, host_id: int) -> Dict[str, Any]:
+    def finalize_hostvars(self) -> None:
         """
-        Charge les variables d'un hôte spécifique
-
-        Args:
-            host_id: ID de l'hôte
-
-        Returns:
-            Dictionnaire des variables
+        Résout les alias des variables d'hôtes et les range dans _meta.hostvars
+        (uniquement pour l'inventaire complet)
         """
-        variables: Dict[str, Any] = {}
-
-        host_vars = self.session.query(HostVariable).filter_by(host_id=host_id).all()
-
-        for hv in host_vars:
-            variable = self.session.query(Variable).filter_by(id=hv.var_id).first()
-
-            if not variable:
-                continue
-
-            # Déchiffrer si nécessaire
-            if variable.is_sensitive and hv.var_value_encrypted:
-                value = self.crypto.decrypt_value(self.session, hv.var_value_encrypted)
-            else:
-                value = hv.var_value
-
-            variables[variable.var_key] = value
-
-        return variables
+        hostvars = self.inventory["_meta"]["hostvars"]
+        for host_name, host_vars in self.raw_host_vars.items():
+            hostvars[host_name] = self.resolve_aliases(host_vars)
 
     def build_inventory_structure(self) -> None:
         """
         Construit la structure d'inventaire Ansible depuis l'arbre
-        Parcours en profondeur pour construire la structure
+        Suit l'ordre post-fixé calculé par fetch_group_hierarchy ; seules les
+        sections non vides sont ajoutées et les groupes vides sont omis
         """
-        # Parcourir l'arbre en post-order pour propager les hôtes
-        for node in self.tree.traverse_postorder():
-            group_name = node.name
+        # Parcourir dans l'ordre de la base (enfants avant parents)
+        for group in self.hierarchy:
+            node = self.tree.get_node(group.id)
+
+            # Groupe intermédiaire vide : rien à construire
+            if not (node.hosts or node.children or node.variables):
+                continue
 
-            # Initialiser la structure du groupe
-            self.inventory[group_name] = {}
+            entry: Dict[str, Any] = {}
 
             # Ajouter les hôtes directs (pas les enfants)
             if node.hosts:
-                self.inventory[group_name]["hosts"] = sorted(list(node.hosts))
+                entry["hosts"] = sorted(node.hosts)
 
             # Ajouter les enfants
             if node.children:
-                self.inventory[group_name]["children"] = sorted(
-                    [child.name for child in node.children]
-                )
+                entry["children"] = sorted(child.name for child in node.children)
 
             # Ajouter les variables
             if node.variables:
                 resolved_vars = self.resolve_aliases(node.variables)
                 if resolved_vars:
-                    self.inventory[group_name]["vars"] = resolved_vars
-
-    def cleanup_inventory(self) -> None:
-        """
-        Nettoie l'inventaire en supprimant les sections vides
-        """
-        for group_name in list(self.inventory.keys()):
-            if group_name == "_meta":
-                continue
-
-            group = self.inventory[group_name]
-
-            # Supprimer les clés vides
-            if not group.get("hosts"):
-                group.pop("hosts", None)
-
-            if not group.get("children"):
-                group.pop("children", None)
+                    entry["vars"] = resolved_vars
 
-            if not group.get("vars"):
-                group.pop("vars", None)
-
-            # Supprimer le groupe s'il est complètement vide
-            if not group:
-                del self.inventory[group_name]
+            if entry:
+                self.inventory[node.name] = entry
 
     def build(self) -> Dict[str, Any]:
         """
@@ -260,14 +329,43 @@ class InventoryBuilder:
         # 3. Charger les hôtes
         self.load_hosts()
 
-        # 4. Construire la structure d'inventaire
+        # 4. Construire la structure d'inventaire (sans sections vides)
         self.build_inventory_structure()
 
-        # 5. Nettoyer
-        self.cleanup_inventory()
+        # 5. Variables d'hôtes avec alias résolus
+        self.finalize_hostvars()
 
         return self.inventory
 
+    def build_host(self, hostname: str) -> Dict[str, Any]:
+        """
+        Construit uniquement les variables d'un hôte, sans l'inventaire complet
+
+        Args:
+            hostname: Nom de l'hôte
+
+        Returns:
+            Dictionnaire des variables de l'hôte (vide si absent ou inactif)
+        """
+        self.load_aliases()
+
+        rows = self.session.execute(
+            _HOST_VARS_BY_NAME_STMT, {"hostname": hostname}
+        ).all()
+
+        host_vars: Dict[str, Any] = {}
+        pending: List[Tuple[Dict[str, Any], str, bytes]] = []
+
+        for var_key, var_value, var_value_encrypted, is_sensitive in rows:
+            if is_sensitive and var_value_encrypted:
+                pending.append((host_vars, var_key, var_value_encrypted))
+            else:
+                host_vars[var_key] = var_value
+
+        self.decrypt_pending(pending)
+
+        return self.resolve_aliases(host_vars)
+
     def get_host_vars(self, hostname: str) -> Dict[str, Any]:
         """
         Récupère les variables d'un hôte spécifique
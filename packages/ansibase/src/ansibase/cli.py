@@ -4,8 +4,6 @@ import os
 import sys
 import argparse
 
-from ansibase.config import load_config
-
 
 def main():
     # Parent parser pour les options communes a toutes les sous-commandes
@@ -39,7 +37,9 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    # Charger la config et construire l'URL
+    # Charger la config et construire l'URL (import differe apres argparse)
+    from ansibase.config import load_config
+
     config_file = args.config or os.environ.get("ANSIBASE_CONFIG", "ansibase.ini")
     config = load_config(config_file)
     db = config["database"]
@@ -1,8 +1,21 @@
 """Chargement de configuration ansibase (INI et YML)"""
 
+import copy
+import re
 from pathlib import Path
 from configparser import ConfigParser
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+
+# Configurations deja lues dans ce processus, par (chemin, mtime)
+_config_cache: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+# Lecteur INI rapide (sections et paires cle = valeur) ; ConfigParser sert de
+# repli des que le fichier sort de ce format (section DEFAULT, lignes
+# indentees, doublons, ligne inconnue) ou s'il manque une cle
+USE_FAST_INI = True
+
+_INI_SECTION = re.compile(r"\[(?P<section>.+)\]")
+_INI_OPTION = re.compile(r"(?P<key>[^=:]*?)\s*[=:]\s*(?P<value>.*)")
 
 
 def load_config(config_file: str = "ansibase.ini") -> Dict[str, Any]:
@@ -17,28 +30,47 @@ def load_config(config_file: str = "ansibase.ini") -> Dict[str, Any]:
     if not config_path.exists():
         raise FileNotFoundError(f"Fichier de configuration non trouve: {config_path}")
 
-    ext = config_path.suffix.lower()
-    if ext in (".yml", ".yaml"):
-        return _load_yaml(config_path)
-    else:
-        return _load_ini(config_path)
+    # le fichier n'est relu que s'il a ete modifie depuis la derniere lecture
+    key = (str(config_path.resolve()), config_path.stat().st_mtime_ns)
+    config = _config_cache.get(key)
+    if config is None:
+        ext = config_path.suffix.lower()
+        if ext in (".yml", ".yaml"):
+            config = _load_yaml(config_path)
+        else:
+            config = _load_ini(config_path)
+        _config_cache[key] = config
+
+    # copie : l'appelant peut modifier le dictionnaire sans alterer le cache
+    return copy.deepcopy(config)
 
 
 def _load_ini(config_path: Path) -> Dict[str, Any]:
     """Charge un fichier INI."""
-    parser = ConfigParser()
-    parser.read(config_path)
+    text = config_path.read_text(encoding="utf-8")
+
+    if USE_FAST_INI:
+        try:
+            return _parse_ini_fast(text)
+        except (KeyError, ValueError):
+            # format inattendu : ConfigParser donne un message d'erreur precis
+            pass
+
+    # sans interpolation : un "%" seul est lu tel quel ; "%%" (echappement
+    # exige par les anciennes versions) reste decode par _unescape
+    parser = ConfigParser(interpolation=None)
+    parser.read_string(text, source=str(config_path))
 
     return {
         "database": {
-            "host": parser.get("database", "host"),
+            "host": _unescape(parser.get("database", "host")),
             "port": parser.getint("database", "port"),
-            "database": parser.get("database", "database"),
-            "user": parser.get("database", "user"),
-            "password": parser.get("database", "password"),
+            "database": _unescape(parser.get("database", "database")),
+            "user": _unescape(parser.get("database", "user")),
+            "password": _unescape(parser.get("database", "password")),
         },
         "encryption": {
-            "key": parser.get("encryption", "key"),
+            "key": _unescape(parser.get("encryption", "key")),
         },
         "cache": {
             "enabled": parser.getboolean("cache", "enabled", fallback=True),
@@ -47,12 +79,82 @@ def _load_ini(config_path: Path) -> Dict[str, Any]:
     }
 
 
+def _unescape(value: str) -> str:
+    """Decode "%%" en "%" comme l'interpolation de ConfigParser.
+
+    Les fichiers existants ecrivent un "%" litteral sous la forme "%%" ; ils
+    restent lus a l'identique. Un "%" seul est accepte tel quel.
+    """
+    return value.replace("%%", "%")
+
+
+def _parse_ini_fast(text: str) -> Dict[str, Any]:
+    """Lit un fichier INI simple ligne par ligne.
+
+    Mêmes règles que ConfigParser pour ce fichier : clés en minuscules,
+    séparateurs = ou :, lignes de commentaire # et ;. Tout ce que ce lecteur
+    ne reproduit pas lève ValueError (repli sur ConfigParser).
+    """
+    sections: Dict[str, Dict[str, str]] = {}
+    current = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped[0] in "#;":
+            continue
+        # ligne indentee : suite de la valeur precedente pour ConfigParser
+        if line[0].isspace():
+            raise ValueError("ligne indentee")
+
+        match = _INI_SECTION.fullmatch(stripped)
+        if match is not None:
+            name = match.group("section")
+            # DEFAULT est herite par toutes les sections ; doublon : erreur
+            if name == "DEFAULT" or name in sections:
+                raise ValueError(f"section {name} non geree")
+            current = sections[name] = {}
+            continue
+
+        match = _INI_OPTION.fullmatch(stripped)
+        if match is None or not match.group("key") or current is None:
+            raise ValueError("ligne non geree")
+        key = match.group("key").lower()
+        if key in current:
+            raise ValueError(f"cle {key} en double")
+        current[key] = match.group("value")
+
+    database = sections["database"]
+    cache = sections.get("cache", {})
+
+    return {
+        "database": {
+            "host": _unescape(database["host"]),
+            "port": int(database["port"]),
+            "database": _unescape(database["database"]),
+            "user": _unescape(database["user"]),
+            "password": _unescape(database["password"]),
+        },
+        "encryption": {
+            "key": _unescape(sections["encryption"]["key"]),
+        },
+        "cache": {
+            "enabled": ConfigParser.BOOLEAN_STATES[
+                cache.get("enabled", "true").lower()
+            ],
+            "ttl": int(cache.get("ttl", 300)),
+        },
+    }
+
+
 def _load_yaml(config_path: Path) -> Dict[str, Any]:
     """Charge un fichier YAML."""
     import yaml
 
+    # chargeur C (libyaml) si disponible, sinon chargeur Python
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
     with open(config_path) as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=loader)
 
     return {
         "database": {
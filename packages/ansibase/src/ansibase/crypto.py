@@ -3,10 +3,28 @@ Module de chiffrement/déchiffrement pour ansibase
 Gère les variables sensibles avec pgcrypto
 """
 
-from typing import Optional
+import sys
+from typing import List, Optional
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+# Requêtes pgcrypto construites une seule fois (clé et valeurs liées à l'exécution)
+_DECRYPT = text("SELECT pgp_sym_decrypt(:encrypted, :key)")
+_ENCRYPT = text("SELECT pgp_sym_encrypt(:plain, :key)")
+_DECRYPT_MANY = text(
+    "SELECT CASE WHEN v IS NULL THEN NULL "
+    "ELSE pgp_sym_decrypt(v, :key) END "
+    "FROM unnest(CAST(:encrypted AS bytea[])) WITH ORDINALITY AS t(v, i) "
+    "ORDER BY i"
+)
+_ENCRYPT_MANY = text(
+    "SELECT CASE WHEN v IS NULL OR v = '' THEN NULL "
+    "ELSE pgp_sym_encrypt(v, :key) END "
+    "FROM unnest(CAST(:plains AS text[])) WITH ORDINALITY AS t(v, i) "
+    "ORDER BY i"
+)
+
+
 class PgCrypto:
     """Gestionnaire de chiffrement/déchiffrement pour variables sensibles"""
     
@@ -35,13 +53,13 @@ class PgCrypto:
         
         try:
             result = session.execute(
-                text("SELECT pgp_sym_decrypt(:encrypted, :key)"),
+                _DECRYPT,
                 {"encrypted": encrypted_value, "key": self.encryption_key}
             )
             row = result.fetchone()
             return row[0] if row else None
         except Exception as e:
-            print(f"Erreur lors du déchiffrement: {e}")
+            print(f"Erreur lors du déchiffrement: {e}", file=sys.stderr)
             return None
     
     def encrypt_value(self, session: Session, plain_value: str) -> Optional[bytes]:
@@ -60,11 +78,55 @@ class PgCrypto:
         
         try:
             result = session.execute(
-                text("SELECT pgp_sym_encrypt(:plain, :key)"),
+                _ENCRYPT,
                 {"plain": plain_value, "key": self.encryption_key}
             )
             row = result.fetchone()
             return row[0] if row else None
         except Exception as e:
-            print(f"Erreur lors du chiffrement: {e}")
-            return None
\ No newline at end of file
+            print(f"Erreur lors du chiffrement: {e}", file=sys.stderr)
+            return None
+    
+    def encrypt_values(
+        self, session: Session, plain_values: List[str]
+    ) -> List[Optional[bytes]]:
+        """
+        Chiffre plusieurs valeurs en un seul aller-retour avec la base
+        
+        Args:
+            session: Session SQLAlchemy
+            plain_values: Valeurs en clair
+            
+        Returns:
+            Valeurs chiffrées, dans le même ordre (None pour une valeur vide)
+        """
+        if not plain_values:
+            return []
+        
+        result = session.execute(
+            _ENCRYPT_MANY,
+            {"plains": list(plain_values), "key": self.encryption_key}
+        )
+        return [row[0] for row in result]
+    
+    def decrypt_values(
+        self, session: Session, encrypted_values: List[Optional[bytes]]
+    ) -> List[Optional[str]]:
+        """
+        Déchiffre plusieurs valeurs en un seul aller-retour avec la base
+        
+        Args:
+            session: Session SQLAlchemy
+            encrypted_values: Valeurs chiffrées (None accepté)
+            
+        Returns:
+            Valeurs déchiffrées, dans le même ordre (None pour une valeur absente)
+        """
+        if not encrypted_values:
+            return []
+        
+        result = session.execute(
+            _DECRYPT_MANY,
+            {"encrypted": list(encrypted_values), "key": self.encryption_key}
+        )
+        return [row[0] for row in result]
@@ -8,6 +8,30 @@ from sqlalchemy import create_engine, Engine
 from sqlalchemy.orm import sessionmaker, Session
 from .models import Base
 
+# Engines partagés par DSN : les Database créées dans un même processus
+# réutilisent le même pool de connexions
+_engine_cache: Dict[str, Engine] = {}
+
+
+def _get_engine(connection_string: str) -> Engine:
+    engine = _engine_cache.get(connection_string)
+    if engine is None:
+        engine = create_engine(
+            connection_string,
+            echo=False,  # Mettre à True pour debug SQL
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,  # Vérifie la connexion avant utilisation
+            pool_recycle=1800,  # Renouvelle les connexions de plus de 30 min
+            # UPDATE/DELETE en executemany (reparentage des groupes à
+            # l'import) regroupés par execute_batch de psycopg2 ; les INSERT
+            # restent en VALUES multi-lignes
+            executemany_mode="values_plus_batch",
+            executemany_batch_page_size=500,
+        )
+        _engine_cache[connection_string] = engine
+    return engine
+
 
 class DatabaseConfig:
     """Configuration de la base de données"""
@@ -44,11 +68,7 @@ class Database:
 
     def __init__(self, config: DatabaseConfig) -> None:
         self.config: DatabaseConfig = config
-        self.engine: Engine = create_engine(
-            config.connection_string,
-            echo=False,  # Mettre à True pour debug SQL
-            pool_pre_ping=True,  # Vérifie la connexion avant utilisation
-        )
+        self.engine: Engine = _get_engine(config.connection_string)
         self.SessionLocal: sessionmaker[Session] = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -1,11 +1,14 @@
-from typing import Dict, List, Set, Optional, Any
+import sys
+from typing import Dict, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class GroupNode:
     """
     Nœud représentant un groupe dans l'arbre hiérarchique
+    (slots : pas de __dict__ par nœud, attributs à emplacement fixe ;
+    comparaison et hachage par identité)
     """
 
     id: int
@@ -35,22 +38,29 @@ class GroupNode:
         Récupère toutes les variables du groupe (incluant celles héritées)
         Les variables locales ont priorité sur les variables héritées
 
+        Le dictionnaire retourné peut être partagé avec le parent : il est en
+        lecture seule (modifier `variables` puis appeler invalidate_variables)
+
         Returns:
             Dictionnaire des variables complètes
         """
-        if self._computed_variables is not None:
-            return self._computed_variables
-
-        # Commencer par les variables héritées du parent
-        computed: Dict[str, Any] = {}
-        if self.parent:
-            computed = self.parent.get_all_variables().copy()
-
-        # Surcharger avec les variables locales
-        computed.update(self.variables)
-
-        self._computed_variables = computed
-        return computed
+        if self._computed_variables is None:
+            # Ancêtres pas encore calculés, du plus proche au plus lointain
+            chain: List["GroupNode"] = []
+            node: Optional["GroupNode"] = self
+            while node is not None and node._computed_variables is None:
+                chain.append(node)
+                node = node.parent
+
+            # Une seule fusion par nœud, de haut en bas ; sans variables
+            # locales, le nœud partage le dictionnaire de son parent
+            computed: Dict[str, Any] = node._computed_variables if node else {}
+            for current in reversed(chain):
+                if current.variables:
+                    computed = {**computed, **current.variables}
+                current._computed_variables = computed
+
+        return self._computed_variables
 
     def get_all_hosts(self) -> Set[str]:
         """
@@ -60,27 +70,63 @@ class GroupNode:
         Returns:
             Ensemble des noms d'hôtes
         """
-        if self._computed_hosts is not None:
-            return self._computed_hosts
+        if self._computed_hosts is None:
+            # Parcours suffixé itératif du sous-arbre ; les nœuds déjà
+            # calculés sont réutilisés tels quels
+            stack: List[Tuple["GroupNode", bool]] = [(self, False)]
+            while stack:
+                node, visited = stack.pop()
+                if node._computed_hosts is not None:
+                    continue
+                if visited:
+                    node._computed_hosts = node._union_children_hosts()
+                else:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in node.children)
+
+        return self._computed_hosts
+
+    def _union_children_hosts(self) -> Set[str]:
+        """Hôtes directs + hôtes déjà calculés des enfants"""
+        all_hosts: Set[str] = set(self.hosts)
+        for child in self.children:
+            all_hosts |= child._computed_hosts
+        return all_hosts
 
-        # Commencer par les hôtes directs
-        all_hosts: Set[str] = self.hosts.copy()
+    def invalidate_variables(self) -> None:
+        """
+        Invalide les variables calculées après une modification des variables
+        de ce nœud : seuls le nœud et ses descendants en héritent
 
-        # Ajouter récursivement les hôtes des enfants
-        for child in self.children:
-            all_hosts.update(child.get_all_hosts())
+        Un nœud non calculé n'a aucun descendant calculé (le calcul remonte
+        toujours jusqu'à la racine) : le parcours s'arrête à ces nœuds, et ne
+        coûte rien si le cache n'a pas été lu depuis la dernière invalidation
+        """
+        stack: List["GroupNode"] = [self]
+        while stack:
+            node = stack.pop()
+            if node._computed_variables is None:
+                continue
+            node._computed_variables = None
+            stack.extend(node.children)
+
+    def invalidate_hosts(self) -> None:
+        """
+        Invalide les hôtes calculés après une modification des hôtes de ce
+        nœud : seuls le nœud et ses ancêtres les agrègent
 
-        self._computed_hosts = all_hosts
-        return all_hosts
+        Un nœud non calculé n'a aucun ancêtre calculé (un ancêtre calcule
+        tout son sous-arbre) : la remontée s'arrête au premier nœud vide
+        """
+        node: Optional["GroupNode"] = self
+        while node is not None and node._computed_hosts is not None:
+            node._computed_hosts = None
+            node = node.parent
 
     def invalidate_cache(self) -> None:
-        """Invalide le cache des valeurs calculées"""
-        self._computed_variables = None
-        self._computed_hosts = None
-
-        # Propager aux enfants
-        for child in self.children:
-            child.invalidate_cache()
+        """Invalide le cache des valeurs calculées (variables et hôtes)"""
+        self.invalidate_variables()
+        self.invalidate_hosts()
 
     def __repr__(self) -> str:
         return f"<GroupNode(name='{self.name}', hosts={len(self.hosts)}, children={len(self.children)})>"
@@ -92,6 +138,8 @@ class GroupTree:
     Gère la construction et la navigation dans la hiérarchie
     """
 
+    __slots__ = ("nodes", "nodes_by_name", "root")
+
     def __init__(self) -> None:
         """Initialise l'arbre des groupes"""
         self.nodes: Dict[int, GroupNode] = {}
@@ -133,6 +181,26 @@ class GroupTree:
 
         return node
 
+    def add_host(self, group_id: int, host_name: str) -> bool:
+        """
+        Ajoute un hôte direct à un groupe
+
+        Le nom est interné : une seule chaîne par hôte quel que soit le nombre
+        de groupes, et les comparaisons dans les ensembles se font par identité
+
+        Args:
+            group_id: ID du groupe
+            host_name: Nom de l'hôte
+
+        Returns:
+            True si le groupe existe
+        """
+        node = self.nodes.get(group_id)
+        if node is None:
+            return False
+        node.hosts.add(sys.intern(host_name))
+        return True
+
     def get_node(self, group_id: int) -> Optional[GroupNode]:
         return self.nodes.get(group_id)
 
@@ -150,9 +218,30 @@ class GroupTree:
                 # (normalement déjà fait dans add_group)
                 pass
 
+    def compute_all_variables(self) -> None:
+        """
+        Calcule les variables héritées de tous les nœuds en un parcours préfixé
+        (chaque nœud fusionne une seule fois le résultat de son parent)
+        """
+        for node in self.traverse_preorder():
+            inherited = node.parent._computed_variables if node.parent else {}
+            # sans variables locales, le dictionnaire du parent est partagé
+            node._computed_variables = (
+                {**inherited, **node.variables} if node.variables else inherited
+            )
+
+    def compute_all_hosts(self) -> None:
+        """
+        Calcule les hôtes (directs et descendants) de tous les nœuds
+        en un seul parcours suffixé (enfants avant parents)
+        """
+        for node in self.traverse_postorder():
+            node._computed_hosts = node._union_children_hosts()
+
     def traverse_preorder(self, node: Optional[GroupNode] = None) -> List[GroupNode]:
         """
         Parcours en profondeur préfixé (parent avant enfants)
+        Itératif (pile explicite) : pas de récursion ni de listes intermédiaires
 
         Args:
             node: Nœud de départ (racine si None)
@@ -166,9 +255,13 @@ class GroupTree:
         if node is None:
             return []
 
-        result: List[GroupNode] = [node]
-        for child in node.children:
-            result.extend(self.traverse_preorder(child))
+        result: List[GroupNode] = []
+        stack: List[GroupNode] = [node]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            # Enfants empilés à l'envers pour être visités dans l'ordre
+            stack.extend(reversed(current.children))
 
         return result
 
@@ -176,6 +269,7 @@ class GroupTree:
         """
         Parcours en profondeur suffixé (enfants avant parent)
         Utile pour propager les hôtes de bas en haut
+        Itératif (pile explicite avec marqueur de visite)
 
         Args:
             node: Nœud de départ (racine si None)
@@ -190,9 +284,15 @@ class GroupTree:
             return []
 
         result: List[GroupNode] = []
-        for child in node.children:
-            result.extend(self.traverse_postorder(child))
-        result.append(node)
+        stack: List[Tuple[GroupNode, bool]] = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if visited:
+                result.append(current)
+                continue
+            # Le parent repasse après tous ses enfants
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(current.children))
 
         return result
 
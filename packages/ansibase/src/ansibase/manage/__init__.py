@@ -1,6 +1,7 @@
 """CLI ansibase : gestion des hotes, groupes et variables"""
 
 import os
+from functools import lru_cache
 from typing import Optional
 
 import click
@@ -9,6 +10,10 @@ from ansibase.config import load_config
 from ansibase.database import Database, DatabaseConfig
 from ansibase.crypto import PgCrypto
 
+# Une instance de PgCrypto par cle, partagee entre les commandes d'un meme
+# processus (la config est deja memorisee par load_config, l'engine par DSN)
+_crypto_for_key = lru_cache(maxsize=4)(PgCrypto)
+
 
 class AppContext:
     """Contexte applicatif avec initialisation paresseuse de la config, DB et crypto."""
@@ -37,12 +42,13 @@ class AppContext:
     @property
     def crypto(self) -> PgCrypto:
         if self._crypto is None:
-            self._crypto = PgCrypto(self.config["encryption"]["key"])
+            self._crypto = _crypto_for_key(self.config["encryption"]["key"])
         return self._crypto
 
     def close(self) -> None:
-        if self._db is not None:
-            self._db.close()
+        # l'engine est partage par DSN : on garde son pool pour les commandes
+        # suivantes du processus (les sessions sont deja fermees)
+        self._db = None
 
 
 @click.group()
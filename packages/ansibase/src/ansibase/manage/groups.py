@@ -1,10 +1,12 @@
 """Sous-commandes CLI pour la gestion des groupes"""
 
+from collections import defaultdict
 from typing import Dict, List, Optional
 
 import click
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, any_, delete, literal, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from ansibase.models import (
     Group,
@@ -22,11 +24,12 @@ from ansibase.manage.utils import (
     output_detail,
     output_list,
     confirm_action,
+    dump_json,
     is_json_mode,
 )
-from ansibase.manage.importers import ImportStats, import_group_recursive
+from ansibase.manage.importers import ImportStats, import_groups
 
-PROTECTED_GROUPS = {"all", "ungrouped"}
+PROTECTED_GROUPS = frozenset({"all", "ungrouped"})
 
 
 @click.group()
@@ -36,30 +39,26 @@ def group():
 
 
 def _build_tree_lines(
-    session: Session,
     parent_id: Optional[int],
-    groups_by_parent: Dict[Optional[int], List[Group]],
-    prefix: str = "",
-    is_last: bool = True,
+    groups_by_parent: Dict[Optional[int], List[Row]],
 ) -> List[str]:
-    """Construit recursivement les lignes d'affichage de l'arborescence."""
+    """Construit les lignes d'affichage de l'arborescence (parcours iteratif)."""
     lines = []
-    children = groups_by_parent.get(parent_id, [])
-    for i, grp in enumerate(children):
-        is_last_child = i == len(children) - 1
-        if parent_id is None:
-            # Racine : pas de prefixe
-            connector = ""
-            child_prefix = ""
-        else:
-            connector = prefix + ("└── " if is_last_child else "├── ")
-            child_prefix = prefix + ("    " if is_last_child else "│   ")
+    # pile de (groupe, debut de ligne, prefixe transmis aux enfants) ;
+    # les racines n'ont pas de prefixe
+    stack = [(grp, "", "") for grp in reversed(groups_by_parent.get(parent_id, []))]
+    while stack:
+        grp, connector, prefix = stack.pop()
         lines.append(f"{connector}{grp.name}")
-        lines.extend(
-            _build_tree_lines(
-                session, grp.id, groups_by_parent, child_prefix, is_last_child
-            )
-        )
+
+        children = groups_by_parent.get(grp.id, [])
+        last = len(children) - 1
+        # empiles a l'envers pour sortir dans l'ordre
+        for i in range(last, -1, -1):
+            if i == last:
+                stack.append((children[i], prefix + "└── ", prefix + "    "))
+            else:
+                stack.append((children[i], prefix + "├── ", prefix + "│   "))
     return lines
 
 
@@ -69,7 +68,16 @@ def _build_tree_lines(
 def group_list(ctx, tree):
     """Lister les groupes."""
     with db_session(ctx) as session:
-        groups = session.execute(select(Group).order_by(Group.name)).scalars().all()
+        # lignes (id, name, parent_id) sans entites ORM ; la description
+        # n'est lue que pour la vue tableau
+        columns = [Group.id, Group.name, Group.parent_id]
+        if not tree:
+            columns.append(Group.description)
+        groups = session.execute(
+            select(*columns)
+            .order_by(Group.name)
+            .execution_options(yield_per=500)
+        )
 
         if tree:
             if is_json_mode(ctx):
@@ -78,20 +86,18 @@ def group_list(ctx, tree):
                     {"id": g.id, "name": g.name, "parent_id": g.parent_id}
                     for g in groups
                 ]
-                import json
-
-                click.echo(json.dumps(data, indent=2, default=str))
+                click.echo(dump_json(data))
                 return
 
             # Construire un dict parent_id -> [enfants]
-            groups_by_parent: Dict[Optional[int], List[Group]] = {}
+            groups_by_parent: Dict[Optional[int], List[Row]] = defaultdict(list)
             for g in groups:
-                groups_by_parent.setdefault(g.parent_id, []).append(g)
+                groups_by_parent[g.parent_id].append(g)
 
             # Trouver les racines (parent_id = None)
-            lines = _build_tree_lines(session, None, groups_by_parent)
-            for line in lines:
-                click.echo(line)
+            lines = _build_tree_lines(None, groups_by_parent)
+            if lines:
+                click.echo("\n".join(lines))
             return
 
         data = [
@@ -106,28 +112,39 @@ def group_list(ctx, tree):
         output_table(ctx, data, ["name", "parent_id", "description"])
 
 
-def _collect_child_group_ids(session: Session, group_id: int) -> List[int]:
-    """Collecte recursivement les IDs de tous les sous-groupes."""
-    child_ids = []
-    children = (
-        session.execute(select(Group.id).where(Group.parent_id == group_id))
-        .scalars()
-        .all()
+def _descendant_groups(group_id: int):
+    """CTE recursive : le groupe et tous ses sous-groupes (colonne id)."""
+    tree = (
+        select(Group.id).where(Group.id == group_id).cte("descendants", recursive=True)
     )
-    for cid in children:
-        child_ids.append(cid)
-        child_ids.extend(_collect_child_group_ids(session, cid))
-    return child_ids
+    # UNION (et non UNION ALL) : un cycle parent_id ne relance pas la recursion
+    return tree.union(select(Group.id).join(tree, Group.parent_id == tree.c.id))
+
 
+def _ancestor_groups(group_id: int):
+    """CTE recursive : le groupe et ses parents (colonnes id, parent_id, depth).
 
-def _collect_parent_group_ids(session: Session, group_id: int) -> List[int]:
-    """Collecte recursivement les IDs de tous les groupes parents."""
-    parent_ids = []
-    grp = session.get(Group, group_id)
-    while grp and grp.parent_id:
-        parent_ids.append(grp.parent_id)
-        grp = session.get(Group, grp.parent_id)
-    return parent_ids
+    depth vaut 0 pour le groupe lui-meme et croit en remontant. La colonne
+    path (ids deja visites) arrete la remontee sur un cycle parent_id, comme
+    _GROUP_HIERARCHY_SQL dans le builder.
+    """
+    tree = (
+        select(
+            Group.id,
+            Group.parent_id,
+            literal(0).label("depth"),
+            array([Group.id]).label("path"),
+        )
+        .where(Group.id == group_id)
+        .cte("ancestors", recursive=True)
+    )
+    return tree.union_all(
+        select(
+            Group.id, Group.parent_id, tree.c.depth + 1, tree.c.path.concat(Group.id)
+        )
+        .join(tree, Group.id == tree.c.parent_id)
+        .where(~(Group.id == any_(tree.c.path)))
+    )
 
 
 @group.command("show")
@@ -174,19 +191,18 @@ def group_show(ctx, ref, reveal, inherited):
         }
         output_detail(ctx, data)
 
-        # Hotes
-        group_ids_for_hosts = [grp.id]
+        # Hotes (sous-groupes resolus par la base en une seule requete)
+        hosts_stmt = select(Host.name).join(HostGroup, HostGroup.host_id == Host.id)
         if inherited:
-            group_ids_for_hosts.extend(_collect_child_group_ids(session, grp.id))
+            descendants = _descendant_groups(grp.id)
+            hosts_stmt = hosts_stmt.where(
+                HostGroup.group_id.in_(select(descendants.c.id))
+            )
+        else:
+            hosts_stmt = hosts_stmt.where(HostGroup.group_id == grp.id)
 
         hosts = (
-            session.execute(
-                select(Host.name)
-                .join(HostGroup, HostGroup.host_id == Host.id)
-                .where(HostGroup.group_id.in_(group_ids_for_hosts))
-                .distinct()
-                .order_by(Host.name)
-            )
+            session.execute(hosts_stmt.distinct().order_by(Host.name))
             .scalars()
             .all()
         )
@@ -195,50 +211,66 @@ def group_show(ctx, ref, reveal, inherited):
         title = "Hotes (herite) :" if inherited else "Hotes :"
         output_list(ctx, list(hosts), title=title)
 
-        # Variables
-        group_ids_for_vars = [grp.id]
+        # Variables (groupes parents resolus par la base, le plus proche d'abord)
+        vars_stmt = (
+            select(
+                GroupVariable.group_id,
+                GroupVariable.var_value,
+                GroupVariable.var_value_encrypted,
+                Variable.var_key,
+                Variable.is_sensitive,
+                Group.name.label("source_name"),
+            )
+            .join(Variable, GroupVariable.var_id == Variable.id)
+            .join(Group, Group.id == GroupVariable.group_id)
+        )
         if inherited:
-            group_ids_for_vars.extend(_collect_parent_group_ids(session, grp.id))
+            ancestors = _ancestor_groups(grp.id)
+            # DISTINCT ON (var_key) : une ligne par cle, celle du groupe le
+            # plus proche (depth 0 = groupe courant)
+            vars_stmt = (
+                vars_stmt.join(ancestors, ancestors.c.id == GroupVariable.group_id)
+                .order_by(Variable.var_key, ancestors.c.depth)
+                .distinct(Variable.var_key)
+            )
+        else:
+            vars_stmt = vars_stmt.where(GroupVariable.group_id == grp.id).order_by(
+                Variable.var_key
+            )
 
-        gvs = session.execute(
-            select(GroupVariable, Variable)
-            .join(Variable, GroupVariable.var_id == Variable.id)
-            .where(GroupVariable.group_id.in_(group_ids_for_vars))
-            .order_by(Variable.var_key)
-        ).all()
+        gvs = session.execute(vars_stmt).all()
 
-        # Deduplication : les variables du groupe courant ont priorite
-        seen_keys = set()
         var_data = []
-        for gv, var in gvs:
-            if var.var_key in seen_keys:
-                continue
-            seen_keys.add(var.var_key)
-
-            if var.is_sensitive:
-                if reveal and gv.var_value_encrypted:
-                    value = (
-                        app.crypto.decrypt_value(session, gv.var_value_encrypted)
-                        or "****"
-                    )
-                else:
-                    value = "****"
+        to_reveal = []
+        for gv in gvs:
+            if gv.is_sensitive:
+                # valeur dechiffree apres la boucle, en un seul lot
+                value = "****"
             else:
                 value = gv.var_value or ""
 
             row = {
-                "var_key": var.var_key,
+                "var_key": gv.var_key,
                 "value": value,
-                "sensitive": "oui" if var.is_sensitive else "non",
+                "sensitive": "oui" if gv.is_sensitive else "non",
             }
             if inherited:
                 if gv.group_id != grp.id:
-                    src_grp = session.get(Group, gv.group_id)
-                    row["source"] = src_grp.name if src_grp else ""
+                    row["source"] = gv.source_name
                 else:
                     row["source"] = "(direct)"
             var_data.append(row)
 
+            if gv.is_sensitive and reveal and gv.var_value_encrypted:
+                to_reveal.append((row, gv.var_value_encrypted))
+
+        if to_reveal:
+            values = app.crypto.decrypt_values(
+                session, [encrypted for _, encrypted in to_reveal]
+            )
+            for (row, _), value in zip(to_reveal, values):
+                row["value"] = value or "****"
+
         click.echo()
         columns = ["var_key", "value", "sensitive"]
         if inherited:
@@ -260,8 +292,8 @@ def group_show(ctx, ref, reveal, inherited):
 def group_create(ctx, name, description, parent_ref):
     """Creer un nouveau groupe."""
     with db_session(ctx) as session:
-        existing = session.query(Group).filter(Group.name == name).first()
-        if existing:
+        existing = session.scalar(select(Group.id).where(Group.name == name))
+        if existing is not None:
             raise click.ClickException(f"Le groupe '{name}' existe deja.")
 
         parent_id = None
@@ -292,8 +324,8 @@ def group_update(ctx, ref, new_name, description, parent_ref):
                 raise click.ClickException(
                     f"Le groupe '{grp.name}' est protege et ne peut pas etre renomme."
                 )
-            existing = session.query(Group).filter(Group.name == new_name).first()
-            if existing:
+            existing = session.scalar(select(Group.id).where(Group.name == new_name))
+            if existing is not None:
                 raise click.ClickException(f"Le nom '{new_name}' est deja utilise.")
             grp.name = new_name
             changed = True
@@ -337,8 +369,9 @@ def group_delete(ctx, ref, yes):
             click.echo("Annule.")
             return
 
-        session.delete(grp)
-        session.flush()
+        # DELETE direct : la base supprime sous-groupes, liens et variables
+        # (ON DELETE CASCADE) sans que la session charge les collections liees
+        session.execute(delete(Group).where(Group.id == grp.id))
         click.echo(f"Groupe '{grp.name}' supprime.")
 
 
@@ -354,24 +387,25 @@ def group_set_var(ctx, ref, key, value):
         var = resolve_variable(session, key)
         app = ctx.obj["app"]
 
-        gv = (
-            session.query(GroupVariable)
-            .filter(GroupVariable.group_id == grp.id, GroupVariable.var_id == var.id)
-            .first()
-        )
-
-        if gv is None:
-            gv = GroupVariable(group_id=grp.id, var_id=var.id)
-            session.add(gv)
-
         if var.is_sensitive:
-            gv.var_value_encrypted = app.crypto.encrypt_value(session, value)
-            gv.var_value = None
+            values = {
+                "var_value": None,
+                "var_value_encrypted": app.crypto.encrypt_value(session, value),
+            }
         else:
-            gv.var_value = value
-            gv.var_value_encrypted = None
-
-        session.flush()
+            values = {"var_value": value, "var_value_encrypted": None}
+
+        # upsert en une requete (pas de SELECT prealable)
+        stmt = pg_insert(GroupVariable).values(group_id=grp.id, var_id=var.id, **values)
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["group_id", "var_id"],
+                set_={
+                    "var_value": stmt.excluded.var_value,
+                    "var_value_encrypted": stmt.excluded.var_value_encrypted,
+                },
+            )
+        )
         click.echo(f"Variable '{var.var_key}' definie sur le groupe '{grp.name}'.")
 
 
@@ -385,18 +419,16 @@ def group_unset_var(ctx, ref, key):
         grp = resolve_group(session, ref)
         var = resolve_variable(session, key)
 
-        gv = (
-            session.query(GroupVariable)
-            .filter(GroupVariable.group_id == grp.id, GroupVariable.var_id == var.id)
-            .first()
-        )
-        if not gv:
+        deleted = session.execute(
+            delete(GroupVariable)
+            .where(GroupVariable.group_id == grp.id, GroupVariable.var_id == var.id)
+            .returning(GroupVariable.id)
+        ).first()
+        if deleted is None:
             raise click.ClickException(
                 f"La variable '{var.var_key}' n'est pas definie sur le groupe '{grp.name}'."
             )
 
-        session.delete(gv)
-        session.flush()
         click.echo(f"Variable '{var.var_key}' retiree du groupe '{grp.name}'.")
 
 
@@ -422,10 +454,7 @@ def group_import(ctx, file, dry_run):
         click.echo("[dry-run] Simulation, aucune modification ne sera appliquee.")
 
     with db_session(ctx, dry_run=dry_run) as session:
-        for group_name, group_data in data.items():
-            import_group_recursive(
-                session, app.crypto, group_name, group_data, None, stats
-            )
+        import_groups(session, app.crypto, data, stats)
 
     prefix = "[dry-run] " if dry_run else ""
     click.echo(f"{prefix}Import termine : {stats.summary()}.")
@@ -3,7 +3,8 @@
 from pathlib import Path
 
 import click
-from sqlalchemy import select
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from ansibase.models import Host, Group, Variable, HostGroup, HostVariable
 from ansibase.manage.utils import (
@@ -17,7 +18,7 @@ from ansibase.manage.utils import (
     output_list,
     confirm_action,
 )
-from ansibase.manage.importers import ImportStats, import_host_vars
+from ansibase.manage.importers import ImportStats, import_hosts
 
 
 @click.group()
@@ -101,9 +102,14 @@ def host_show(ctx, ref, reveal):
         click.echo()
         output_list(ctx, list(groups), title="Groupes :")
 
-        # Variables de l'hote
+        # Variables de l'hote (colonnes simples : aucun objet ORM a charger)
         hvs = session.execute(
-            select(HostVariable, Variable)
+            select(
+                Variable.var_key,
+                Variable.is_sensitive,
+                HostVariable.var_value,
+                HostVariable.var_value_encrypted,
+            )
             .join(Variable, HostVariable.var_id == Variable.id)
             .where(HostVariable.host_id == h.id)
             .order_by(Variable.var_key)
@@ -115,25 +121,30 @@ def host_show(ctx, ref, reveal):
             click.echo("  (aucune)")
         else:
             var_data = []
-            for hv, var in hvs:
-                if var.is_sensitive:
-                    if reveal and hv.var_value_encrypted:
-                        value = (
-                            app.crypto.decrypt_value(session, hv.var_value_encrypted)
-                            or "****"
-                        )
-                    else:
-                        value = "****"
+            to_reveal = []
+            for hv in hvs:
+                if hv.is_sensitive:
+                    # valeur dechiffree apres la boucle, en un seul lot
+                    value = "****"
                 else:
                     value = hv.var_value or ""
 
-                var_data.append(
-                    {
-                        "var_key": var.var_key,
-                        "value": value,
-                        "sensitive": "oui" if var.is_sensitive else "non",
-                    }
+                row = {
+                    "var_key": hv.var_key,
+                    "value": value,
+                    "sensitive": "oui" if hv.is_sensitive else "non",
+                }
+                var_data.append(row)
+
+                if hv.is_sensitive and reveal and hv.var_value_encrypted:
+                    to_reveal.append((row, hv.var_value_encrypted))
+
+            if to_reveal:
+                values = app.crypto.decrypt_values(
+                    session, [encrypted for _, encrypted in to_reveal]
                 )
+                for (row, _), value in zip(to_reveal, values):
+                    row["value"] = value or "****"
 
             click.echo("Variables :")
             output_table(ctx, var_data, ["var_key", "value", "sensitive"])
@@ -147,8 +158,8 @@ def host_show(ctx, ref, reveal):
 def host_create(ctx, name, description, inactive):
     """Creer un nouvel hote."""
     with db_session(ctx) as session:
-        existing = session.query(Host).filter(Host.name == name).first()
-        if existing:
+        existing = session.scalar(select(Host.id).where(Host.name == name))
+        if existing is not None:
             raise click.ClickException(f"L'hote '{name}' existe deja.")
 
         h = Host(name=name, description=description, is_active=not inactive)
@@ -170,8 +181,8 @@ def host_update(ctx, ref, new_name, description, active):
         changed = False
 
         if new_name is not None and new_name != h.name:
-            existing = session.query(Host).filter(Host.name == new_name).first()
-            if existing:
+            existing = session.scalar(select(Host.id).where(Host.name == new_name))
+            if existing is not None:
                 raise click.ClickException(f"Le nom '{new_name}' est deja utilise.")
             h.name = new_name
             changed = True
@@ -202,8 +213,9 @@ def host_delete(ctx, ref, yes):
             click.echo("Annule.")
             return
 
-        session.delete(h)
-        session.flush()
+        # DELETE direct : la base supprime liens et variables (ON DELETE
+        # CASCADE) sans que la session charge les collections liees
+        session.execute(delete(Host).where(Host.id == h.id))
         click.echo(f"Hote '{h.name}' supprime.")
 
 
@@ -217,19 +229,19 @@ def host_add_group(ctx, ref, group_ref):
         h = resolve_host(session, ref)
         grp = resolve_group(session, group_ref)
 
-        existing = (
-            session.query(HostGroup)
-            .filter(HostGroup.host_id == h.id, HostGroup.group_id == grp.id)
-            .first()
-        )
-        if existing:
+        # verification et insertion en une requete : rien n'est retourne
+        # si le lien existe deja
+        created = session.execute(
+            pg_insert(HostGroup)
+            .values(host_id=h.id, group_id=grp.id)
+            .on_conflict_do_nothing(index_elements=["host_id", "group_id"])
+            .returning(HostGroup.id)
+        ).first()
+        if created is None:
             raise click.ClickException(
                 f"L'hote '{h.name}' est deja dans le groupe '{grp.name}'."
             )
 
-        hg = HostGroup(host_id=h.id, group_id=grp.id)
-        session.add(hg)
-        session.flush()
         click.echo(f"Hote '{h.name}' ajoute au groupe '{grp.name}'.")
 
 
@@ -243,18 +255,16 @@ def host_remove_group(ctx, ref, group_ref):
         h = resolve_host(session, ref)
         grp = resolve_group(session, group_ref)
 
-        hg = (
-            session.query(HostGroup)
-            .filter(HostGroup.host_id == h.id, HostGroup.group_id == grp.id)
-            .first()
-        )
-        if not hg:
+        deleted = session.execute(
+            delete(HostGroup)
+            .where(HostGroup.host_id == h.id, HostGroup.group_id == grp.id)
+            .returning(HostGroup.id)
+        ).first()
+        if deleted is None:
             raise click.ClickException(
                 f"L'hote '{h.name}' n'est pas dans le groupe '{grp.name}'."
             )
 
-        session.delete(hg)
-        session.flush()
         click.echo(f"Hote '{h.name}' retire du groupe '{grp.name}'.")
 
 
@@ -270,24 +280,25 @@ def host_set_var(ctx, ref, key, value):
         var = resolve_variable(session, key)
         app = ctx.obj["app"]
 
-        hv = (
-            session.query(HostVariable)
-            .filter(HostVariable.host_id == h.id, HostVariable.var_id == var.id)
-            .first()
-        )
-
-        if hv is None:
-            hv = HostVariable(host_id=h.id, var_id=var.id)
-            session.add(hv)
-
         if var.is_sensitive:
-            hv.var_value_encrypted = app.crypto.encrypt_value(session, value)
-            hv.var_value = None
+            values = {
+                "var_value": None,
+                "var_value_encrypted": app.crypto.encrypt_value(session, value),
+            }
         else:
-            hv.var_value = value
-            hv.var_value_encrypted = None
-
-        session.flush()
+            values = {"var_value": value, "var_value_encrypted": None}
+
+        # upsert en une requete (pas de SELECT prealable)
+        stmt = pg_insert(HostVariable).values(host_id=h.id, var_id=var.id, **values)
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["host_id", "var_id"],
+                set_={
+                    "var_value": stmt.excluded.var_value,
+                    "var_value_encrypted": stmt.excluded.var_value_encrypted,
+                },
+            )
+        )
         click.echo(f"Variable '{var.var_key}' definie sur l'hote '{h.name}'.")
 
 
@@ -301,18 +312,16 @@ def host_unset_var(ctx, ref, key):
         h = resolve_host(session, ref)
         var = resolve_variable(session, key)
 
-        hv = (
-            session.query(HostVariable)
-            .filter(HostVariable.host_id == h.id, HostVariable.var_id == var.id)
-            .first()
-        )
-        if not hv:
+        deleted = session.execute(
+            delete(HostVariable)
+            .where(HostVariable.host_id == h.id, HostVariable.var_id == var.id)
+            .returning(HostVariable.id)
+        ).first()
+        if deleted is None:
             raise click.ClickException(
                 f"La variable '{var.var_key}' n'est pas definie sur l'hote '{h.name}'."
             )
 
-        session.delete(hv)
-        session.flush()
         click.echo(f"Variable '{var.var_key}' retiree de l'hote '{h.name}'.")
 
 
@@ -339,8 +348,15 @@ def host_import(ctx, file, hostname, dry_run):
     if not isinstance(data, dict):
         raise click.ClickException("Le fichier YAML doit contenir un dictionnaire.")
 
-    # Detection du format : si toutes les valeurs sont des scalaires → format A
-    is_flat = all(not isinstance(v, dict) for v in data.values())
+    # Detection du format en un seul passage : si toutes les valeurs sont des
+    # scalaires → format A, si toutes sont des dicts → format B
+    scalar_keys = [k for k, v in data.items() if not isinstance(v, dict)]
+    is_flat = len(scalar_keys) == len(data)
+
+    if not is_flat and scalar_keys:
+        raise click.ClickException(
+            f"Les variables de '{scalar_keys[0]}' doivent etre un dictionnaire."
+        )
 
     if dry_run:
         click.echo("[dry-run] Simulation, aucune modification ne sera appliquee.")
@@ -351,15 +367,10 @@ def host_import(ctx, file, hostname, dry_run):
             if not hostname:
                 # Deduire du nom de fichier
                 hostname = Path(file).stem
-            import_host_vars(session, app.crypto, hostname, data, stats)
+            import_hosts(session, app.crypto, {hostname: data}, stats)
         else:
             # Format B : multi-hotes
-            for host_name, host_vars in data.items():
-                if not isinstance(host_vars, dict):
-                    raise click.ClickException(
-                        f"Les variables de '{host_name}' doivent etre un dictionnaire."
-                    )
-                import_host_vars(session, app.crypto, host_name, host_vars, stats)
+            import_hosts(session, app.crypto, data, stats)
 
     prefix = "[dry-run] " if dry_run else ""
     click.echo(f"{prefix}Import termine : {stats.summary()}.")
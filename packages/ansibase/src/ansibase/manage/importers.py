@@ -2,8 +2,21 @@
 
 import json
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Set
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ansibase.crypto import PgCrypto
@@ -17,16 +30,35 @@ from ansibase.models import (
 )
 
 
-KNOWN_SENSITIVE_KEYS: Set[str] = {
-    "ansible_password",
-    "ansible_become_password",
-    "ansible_become_pass",
-    "ansible_ssh_pass",
-    "ansible_ssh_private_key_file",
-}
+KNOWN_SENSITIVE_KEYS: FrozenSet[str] = frozenset(
+    {
+        "ansible_password",
+        "ansible_become_password",
+        "ansible_become_pass",
+        "ansible_ssh_pass",
+        "ansible_ssh_private_key_file",
+    }
+)
 
 KNOWN_BUILTIN_PREFIXES = ("ansible_",)
 
+# Cle de Session.info pour le cache des variables du catalogue
+_VARIABLES_CACHE_KEY = "ansibase_import_variables"
+
+# Nombre de lignes par requete IN ou INSERT multi-lignes lors des imports
+_BATCH_SIZE = 500
+
+# Recherches par lot (IN ... expanding), construites une seule fois
+_VARIABLES_BY_KEYS = select(Variable.id, Variable.var_key, Variable.is_sensitive).where(
+    Variable.var_key.in_(bindparam("keys", expanding=True))
+)
+_HOSTS_BY_NAMES = select(Host.id, Host.name).where(
+    Host.name.in_(bindparam("names", expanding=True))
+)
+_GROUPS_BY_NAMES = select(Group.id, Group.name, Group.parent_id).where(
+    Group.name.in_(bindparam("names", expanding=True))
+)
+
 
 @dataclass
 class ImportStats:
@@ -56,8 +88,29 @@ class ImportStats:
         return ", ".join(parts) if parts else "Aucune modification"
 
 
+def _json_value(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+# Conversion par type exact (une recherche de dict au lieu d'isinstance
+# successifs) ; les autres types passent par normalize_value
+_NORMALIZERS = {
+    str: lambda value: value,
+    bool: lambda value: "true" if value else "false",
+    int: str,
+    float: str,
+    list: _json_value,
+    dict: _json_value,
+}
+
+
 def normalize_value(value: Any) -> str:
     """Convertit une valeur YAML en chaine pour stockage."""
+    normalize = _NORMALIZERS.get(type(value))
+    if normalize is not None:
+        return normalize(value)
+
+    # sous-classes et autres types (dates YAML, None, ...)
     if isinstance(value, bool):
         return "true" if value else "false"
     if isinstance(value, (list, dict)):
@@ -65,216 +118,338 @@ def normalize_value(value: Any) -> str:
     return str(value)
 
 
-def ensure_variable(
+def _chunks(items: List[Any], size: int = _BATCH_SIZE) -> Iterator[List[Any]]:
+    """Decoupe une liste en lots de `size` elements."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def ensure_variables(
     session: Session,
-    var_key: str,
+    var_keys: Iterable[str],
     stats: ImportStats,
     extra_sensitive_keys: Optional[Set[str]] = None,
-) -> Variable:
-    """Upsert d'une variable dans le catalogue. Cree si inexistante."""
-    var = session.query(Variable).filter(Variable.var_key == var_key).first()
-    if var:
-        return var
-
-    sensitive_keys = KNOWN_SENSITIVE_KEYS
-    if extra_sensitive_keys:
-        sensitive_keys = sensitive_keys | extra_sensitive_keys
+) -> Dict[str, Tuple[int, bool]]:
+    """Upsert par lots de variables du catalogue. Cree les inexistantes.
 
-    is_sensitive = var_key in sensitive_keys
-    is_builtin = any(var_key.startswith(p) for p in KNOWN_BUILTIN_PREFIXES)
+    Une requete IN par lot pour les cles existantes, un INSERT multi-lignes
+    pour les manquantes. Les cles deja vues dans la session sont servies
+    depuis un cache (une meme cle revient pour chaque hote importe).
 
-    var = Variable(
-        var_key=var_key,
-        is_sensitive=is_sensitive,
-        is_ansible_builtin=is_builtin,
+    Retourne cle -> (id, is_sensitive).
+    """
+    var_keys = set(var_keys)
+    cache: Dict[str, Tuple[int, bool]] = session.info.setdefault(
+        _VARIABLES_CACHE_KEY, {}
     )
-    session.add(var)
-    session.flush()
-    stats.variables_created += 1
-    return var
-
-
-def ensure_host(session: Session, hostname: str, stats: ImportStats) -> Host:
-    """Upsert d'un hote. Cree si inexistant."""
-    host = session.query(Host).filter(Host.name == hostname).first()
-    if host:
-        return host
-
-    host = Host(name=hostname)
-    session.add(host)
-    session.flush()
-    stats.hosts_created += 1
-    return host
+    result = {k: cache[k] for k in var_keys if k in cache}
+    pending = sorted(k for k in var_keys if k not in result)
+    if not pending:
+        return result
 
+    # ensemble resolu une fois par appel (et non par cle) ; sans cles
+    # supplementaires, la constante est utilisee telle quelle
+    sensitive_keys = KNOWN_SENSITIVE_KEYS
+    if extra_sensitive_keys:
+        sensitive_keys = sensitive_keys | extra_sensitive_keys
 
-def ensure_group(
-    session: Session,
-    group_name: str,
-    parent_id: Optional[int],
-    stats: ImportStats,
-) -> Group:
-    """Upsert d'un groupe. Cree si inexistant, met a jour le parent si fourni."""
-    grp = session.query(Group).filter(Group.name == group_name).first()
-    if grp:
-        if parent_id is not None and grp.parent_id != parent_id:
-            grp.parent_id = parent_id
-            session.flush()
-        return grp
-
-    grp = Group(name=group_name, parent_id=parent_id)
-    session.add(grp)
-    session.flush()
-    stats.groups_created += 1
-    return grp
-
-
-def assign_host_variable(
+    for chunk in _chunks(pending):
+        for var_id, var_key, is_sensitive in session.execute(
+            _VARIABLES_BY_KEYS, {"keys": chunk}
+        ):
+            result[var_key] = (var_id, is_sensitive)
+
+        missing = [k for k in chunk if k not in result]
+        if not missing:
+            continue
+
+        # on_conflict_do_nothing : une variable creee entre-temps est relue
+        stmt = (
+            pg_insert(Variable)
+            .values(
+                [
+                    {
+                        "var_key": k,
+                        "is_sensitive": k in sensitive_keys,
+                        "is_ansible_builtin": k.startswith(KNOWN_BUILTIN_PREFIXES),
+                    }
+                    for k in missing
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["var_key"])
+            .returning(Variable.id, Variable.var_key, Variable.is_sensitive)
+        )
+        for var_id, var_key, is_sensitive in session.execute(stmt):
+            result[var_key] = (var_id, is_sensitive)
+            stats.variables_created += 1
+
+        raced = [k for k in missing if k not in result]
+        if raced:
+            for var_id, var_key, is_sensitive in session.execute(
+                _VARIABLES_BY_KEYS, {"keys": raced}
+            ):
+                result[var_key] = (var_id, is_sensitive)
+
+    cache.update(result)
+    return result
+
+
+def ensure_hosts(
+    session: Session, hostnames: Iterable[str], stats: ImportStats
+) -> Dict[str, int]:
+    """Upsert par lots d'hotes. Cree les inexistants.
+
+    Retourne nom -> id.
+    """
+    host_ids: Dict[str, int] = {}
+    for chunk in _chunks(list(dict.fromkeys(hostnames))):
+        stmt = (
+            pg_insert(Host)
+            .values([{"name": name} for name in chunk])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Host.id, Host.name)
+        )
+        for host_id, name in session.execute(stmt):
+            host_ids[name] = host_id
+            stats.hosts_created += 1
+
+        existing = [name for name in chunk if name not in host_ids]
+        if existing:
+            for host_id, name in session.execute(_HOSTS_BY_NAMES, {"names": existing}):
+                host_ids[name] = host_id
+
+    return host_ids
+
+
+def _flatten_groups(data: Dict[str, Any]) -> Tuple[
+    Dict[str, Optional[str]],
+    Dict[str, Dict[str, str]],
+    Dict[str, None],
+    List[Tuple[str, str]],
+    Dict[str, Dict[str, str]],
+]:
+    """Aplatit un inventaire Ansible (hosts, vars, children) en tables.
+
+    Retourne : groupes (nom -> parent), variables de groupe, hotes (ordonnes),
+    liens (hote, groupe) et variables d'hote.
+    """
+    groups: Dict[str, Optional[str]] = {}
+    group_vars: Dict[str, Dict[str, str]] = {}
+    hosts: Dict[str, None] = {}
+    links: List[Tuple[str, str]] = []
+    host_vars: Dict[str, Dict[str, str]] = {}
+
+    # parcours en profondeur iteratif, dans l'ordre du fichier
+    stack = [(name, group_data, None) for name, group_data in data.items()]
+    stack.reverse()
+    while stack:
+        group_name, group_data, parent = stack.pop()
+        # un parent fourni remplace le precedent (groupe cite plusieurs fois)
+        if parent is not None or group_name not in groups:
+            groups[group_name] = parent
+
+        if not group_data or not isinstance(group_data, dict):
+            continue
+
+        hosts_data = group_data.get("hosts")
+        if hosts_data and isinstance(hosts_data, dict):
+            for hostname, values in hosts_data.items():
+                hosts[hostname] = None
+                links.append((hostname, group_name))
+                if values and isinstance(values, dict):
+                    dest = host_vars.setdefault(hostname, {})
+                    for var_key, raw_value in values.items():
+                        dest[var_key] = normalize_value(raw_value)
+
+        vars_data = group_data.get("vars")
+        if vars_data and isinstance(vars_data, dict):
+            dest = group_vars.setdefault(group_name, {})
+            for var_key, raw_value in vars_data.items():
+                dest[var_key] = normalize_value(raw_value)
+
+        children_data = group_data.get("children")
+        if children_data and isinstance(children_data, dict):
+            children = [
+                (child_name, child_data, group_name)
+                for child_name, child_data in children_data.items()
+            ]
+            stack.extend(reversed(children))
+
+    return groups, group_vars, hosts, links, host_vars
+
+
+def _upsert_values(
     session: Session,
     crypto: PgCrypto,
-    host: Host,
-    variable: Variable,
-    value: str,
-    stats: ImportStats,
-) -> None:
-    """Upsert d'une variable d'hote avec chiffrement si sensible."""
-    hv = (
-        session.query(HostVariable)
-        .filter(HostVariable.host_id == host.id, HostVariable.var_id == variable.id)
-        .first()
-    )
+    model: Any,
+    owner_column: str,
+    rows: List[Tuple[int, int, str, bool]],
+) -> int:
+    """Upsert par lots de variables d'hote ou de groupe.
 
-    if hv is None:
-        hv = HostVariable(host_id=host.id, var_id=variable.id)
-        session.add(hv)
-
-    if variable.is_sensitive:
-        hv.var_value_encrypted = crypto.encrypt_value(session, value)
-        hv.var_value = None
-    else:
-        hv.var_value = value
-        hv.var_value_encrypted = None
-
-    session.flush()
-    stats.host_vars_set += 1
+    `rows` contient (owner_id, var_id, valeur, is_sensitive) ; les valeurs
+    sensibles sont chiffrees en un aller-retour par lot. Une valeur en clair
+    identique a celle en base n'est pas reecrite.
 
+    Retourne le nombre de lignes inserees ou modifiees.
+    """
+    written = 0
+    for chunk in _chunks(rows):
+        sensitive = [value for _, _, value, is_sensitive in chunk if is_sensitive]
+        encrypted = iter(crypto.encrypt_values(session, sensitive))
+
+        values = []
+        for owner_id, var_id, value, is_sensitive in chunk:
+            values.append(
+                {
+                    owner_column: owner_id,
+                    "var_id": var_id,
+                    "var_value": None if is_sensitive else value,
+                    "var_value_encrypted": next(encrypted) if is_sensitive else None,
+                }
+            )
 
-def assign_group_variable(
+        stmt = pg_insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[owner_column, "var_id"],
+            set_={
+                "var_value": stmt.excluded.var_value,
+                "var_value_encrypted": stmt.excluded.var_value_encrypted,
+            },
+            # reimport idempotent : pas d'UPDATE si la valeur en clair est
+            # inchangee ; un chiffre pgp est aleatoire, une valeur sensible
+            # est donc toujours reecrite
+            where=or_(
+                model.var_value.is_distinct_from(stmt.excluded.var_value),
+                stmt.excluded.var_value_encrypted.is_not(None),
+            ),
+        ).returning(model.id)
+        written += len(session.execute(stmt).all())
+
+    return written
+
+
+def import_groups(
     session: Session,
     crypto: PgCrypto,
-    group: Group,
-    variable: Variable,
-    value: str,
+    data: Dict[str, Any],
     stats: ImportStats,
+    extra_sensitive_keys: Optional[Set[str]] = None,
 ) -> None:
-    """Upsert d'une variable de groupe avec chiffrement si sensible."""
-    gv = (
-        session.query(GroupVariable)
-        .filter(GroupVariable.group_id == group.id, GroupVariable.var_id == variable.id)
-        .first()
-    )
-
-    if gv is None:
-        gv = GroupVariable(group_id=group.id, var_id=variable.id)
-        session.add(gv)
-
-    if variable.is_sensitive:
-        gv.var_value_encrypted = crypto.encrypt_value(session, value)
-        gv.var_value = None
-    else:
-        gv.var_value = value
-        gv.var_value_encrypted = None
+    """Import d'un inventaire de groupes au format Ansible.
 
-    session.flush()
-    stats.group_vars_set += 1
-
-
-def assign_host_to_group(
-    session: Session, host: Host, group: Group, stats: ImportStats
-) -> None:
-    """Lien hote-groupe idempotent."""
-    existing = (
-        session.query(HostGroup)
-        .filter(HostGroup.host_id == host.id, HostGroup.group_id == group.id)
-        .first()
-    )
-    if existing:
+    Traite : hosts (avec variables), vars, children. L'arbre est d'abord
+    aplati, puis chaque table est ecrite par lots de _BATCH_SIZE lignes
+    (INSERT multi-lignes ... ON CONFLICT) au lieu d'un aller-retour par objet.
+    """
+    groups, group_vars, hosts, links, host_vars = _flatten_groups(data)
+    if not groups:
         return
 
-    hg = HostGroup(host_id=host.id, group_id=group.id)
-    session.add(hg)
-    session.flush()
-    stats.host_group_links += 1
-
-
-def import_host_vars(
-    session: Session,
-    crypto: PgCrypto,
-    hostname: str,
-    variables: Dict[str, Any],
-    stats: ImportStats,
-    extra_sensitive_keys: Optional[Set[str]] = None,
-) -> Host:
-    """Importe un hote et ses variables."""
-    host = ensure_host(session, hostname, stats)
-
-    for var_key, raw_value in variables.items():
-        value = normalize_value(raw_value)
-        variable = ensure_variable(session, var_key, stats, extra_sensitive_keys)
-        assign_host_variable(session, crypto, host, variable, value, stats)
+    # Catalogue des variables
+    var_keys = {k for values in group_vars.values() for k in values}
+    var_keys.update(k for values in host_vars.values() for k in values)
+    variables = ensure_variables(session, var_keys, stats, extra_sensitive_keys)
+
+    # Groupes : creation des manquants puis rattachement aux parents
+    group_ids: Dict[str, int] = {}
+    current_parent: Dict[str, Optional[int]] = {}
+    for chunk in _chunks(list(groups)):
+        for group_id, name, parent_id in session.execute(
+            _GROUPS_BY_NAMES, {"names": chunk}
+        ):
+            group_ids[name] = group_id
+            current_parent[name] = parent_id
+
+        missing = [name for name in chunk if name not in group_ids]
+        if missing:
+            stmt = (
+                pg_insert(Group)
+                .values([{"name": name} for name in missing])
+                .returning(Group.id, Group.name)
+            )
+            for group_id, name in session.execute(stmt):
+                group_ids[name] = group_id
+                current_parent[name] = None
+                stats.groups_created += 1
+
+    reparent = [
+        {"id": group_ids[name], "parent_id": group_ids[parent]}
+        for name, parent in groups.items()
+        if parent is not None and current_parent[name] != group_ids[parent]
+    ]
+    for chunk in _chunks(reparent):
+        session.execute(update(Group), chunk)
+
+    # Hotes
+    host_ids = ensure_hosts(session, hosts, stats)
+
+    # Liens hote-groupe (idempotents)
+    link_rows = list(
+        dict.fromkeys(
+            (host_ids[hostname], group_ids[group_name])
+            for hostname, group_name in links
+        )
+    )
+    for chunk in _chunks(link_rows):
+        stmt = (
+            pg_insert(HostGroup)
+            .values([{"host_id": h, "group_id": g} for h, g in chunk])
+            .on_conflict_do_nothing(index_elements=["host_id", "group_id"])
+            .returning(HostGroup.id)
+        )
+        stats.host_group_links += len(session.execute(stmt).all())
+
+    # Variables d'hote et de groupe
+    host_rows = []
+    for hostname, values in host_vars.items():
+        for var_key, value in values.items():
+            var_id, is_sensitive = variables[var_key]
+            host_rows.append((host_ids[hostname], var_id, value, is_sensitive))
+    stats.host_vars_set += _upsert_values(
+        session, crypto, HostVariable, "host_id", host_rows
+    )
 
-    return host
+    group_rows = []
+    for group_name, values in group_vars.items():
+        for var_key, value in values.items():
+            var_id, is_sensitive = variables[var_key]
+            group_rows.append((group_ids[group_name], var_id, value, is_sensitive))
+    stats.group_vars_set += _upsert_values(
+        session, crypto, GroupVariable, "group_id", group_rows
+    )
 
 
-def import_group_recursive(
+def import_hosts(
     session: Session,
     crypto: PgCrypto,
-    group_name: str,
-    group_data: Optional[Dict[str, Any]],
-    parent_id: Optional[int],
+    hosts: Dict[str, Dict[str, Any]],
     stats: ImportStats,
     extra_sensitive_keys: Optional[Set[str]] = None,
 ) -> None:
-    """Import recursif d'un groupe au format inventaire Ansible.
+    """Importe des hotes et leurs variables (nom -> variables).
 
-    Traite : hosts (avec variables), vars, children (recursif).
+    Les hotes sont traites par tranches de _BATCH_SIZE : identifiants,
+    catalogue et lignes normalisees ne sont conserves que pour la tranche
+    en cours, et chaque tranche est ecrite sans flush par objet.
     """
-    grp = ensure_group(session, group_name, parent_id, stats)
-
-    if not group_data or not isinstance(group_data, dict):
-        return
-
-    # Hotes du groupe
-    hosts_data = group_data.get("hosts")
-    if hosts_data and isinstance(hosts_data, dict):
-        for hostname, host_vars in hosts_data.items():
-            host = ensure_host(session, hostname, stats)
-            assign_host_to_group(session, host, grp, stats)
-            if host_vars and isinstance(host_vars, dict):
-                for var_key, raw_value in host_vars.items():
-                    value = normalize_value(raw_value)
-                    variable = ensure_variable(
-                        session, var_key, stats, extra_sensitive_keys
-                    )
-                    assign_host_variable(session, crypto, host, variable, value, stats)
-
-    # Variables du groupe
-    vars_data = group_data.get("vars")
-    if vars_data and isinstance(vars_data, dict):
-        for var_key, raw_value in vars_data.items():
-            value = normalize_value(raw_value)
-            variable = ensure_variable(session, var_key, stats, extra_sensitive_keys)
-            assign_group_variable(session, crypto, grp, variable, value, stats)
-
-    # Sous-groupes (recursif)
-    children_data = group_data.get("children")
-    if children_data and isinstance(children_data, dict):
-        for child_name, child_data in children_data.items():
-            import_group_recursive(
-                session,
-                crypto,
-                child_name,
-                child_data,
-                grp.id,
-                stats,
-                extra_sensitive_keys,
-            )
+    items = iter(hosts.items())
+    while True:
+        batch = list(islice(items, _BATCH_SIZE))
+        if not batch:
+            return
+
+        host_ids = ensure_hosts(session, (name for name, _ in batch), stats)
+
+        var_keys = {k for _, values in batch for k in values}
+        variables = ensure_variables(session, var_keys, stats, extra_sensitive_keys)
+
+        rows = []
+        for hostname, values in batch:
+            host_id = host_ids[hostname]
+            for var_key, raw_value in values.items():
+                var_id, is_sensitive = variables[var_key]
+                rows.append((host_id, var_id, normalize_value(raw_value), is_sensitive))
+        stats.host_vars_set += _upsert_values(
+            session, crypto, HostVariable, "host_id", rows
+        )
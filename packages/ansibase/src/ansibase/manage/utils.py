@@ -3,14 +3,45 @@
 import json
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Generator, List, Optional, Sequence
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
 
 import click
 import yaml
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel (extra "orjson")
+    orjson = None
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
 from ansibase.models import Host, Group, Variable
 
+# Requetes de resolution par nom, construites une seule fois
+_HOST_BY_NAME = select(Host).where(Host.name == bindparam("ref"))
+_GROUP_BY_NAME = select(Group).where(Group.name == bindparam("ref"))
+_VARIABLE_BY_KEY = select(Variable).where(Variable.var_key == bindparam("ref"))
+
+# Cle de Session.info pour le cache de resolution (type, nom) -> id
+_RESOLVE_CACHE_KEY = "ansibase_resolve_ids"
+
+# Chargeur C (libyaml) si disponible, sinon chargeur Python
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def dump_json(data: Any) -> str:
+    """Serialise en JSON indente pour la sortie --json (orjson si disponible)."""
+    if orjson is not None:
+        # dates passees a default=str comme avec json, cles non-str acceptees
+        return orjson.dumps(
+            data,
+            default=str,
+            option=orjson.OPT_INDENT_2
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    return json.dumps(data, indent=2, default=str)
+
 
 @contextmanager
 def db_session(
@@ -43,8 +74,9 @@ def load_yaml_file(path: str) -> Any:
     if not filepath.is_file():
         raise click.ClickException(f"Ce n'est pas un fichier : {path}")
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        # flux binaire : libyaml decode lui-meme l'UTF-8
+        with open(filepath, "rb") as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
     except yaml.YAMLError as e:
         raise click.ClickException(f"Erreur de parsing YAML : {e}")
     if data is None:
@@ -52,12 +84,36 @@ def load_yaml_file(path: str) -> Any:
     return data
 
 
+def _resolve_by_name(
+    session: Session, model: Any, column: str, stmt: Any, ref: str
+) -> Any:
+    """Resout un objet par nom, avec un cache nom -> id propre a la session.
+
+    Sur un succes du cache, session.get sert l'objet depuis l'identity map
+    sans requete ; le nom est reverifie (objet renomme ou supprime entre-temps).
+    """
+    cache: Dict[Tuple[str, str], int] = session.info.setdefault(
+        _RESOLVE_CACHE_KEY, {}
+    )
+    key = (model.__name__, ref)
+    obj_id = cache.get(key)
+    if obj_id is not None:
+        obj = session.get(model, obj_id)
+        if obj is not None and getattr(obj, column) == ref:
+            return obj
+
+    obj = session.execute(stmt, {"ref": ref}).scalar_one_or_none()
+    if obj is not None:
+        cache[key] = obj.id
+    return obj
+
+
 def resolve_host(session: Session, ref: str) -> Host:
     """Resout un hote par ID numerique ou nom."""
     if ref.isdigit():
         host = session.get(Host, int(ref))
     else:
-        host = session.query(Host).filter(Host.name == ref).first()
+        host = _resolve_by_name(session, Host, "name", _HOST_BY_NAME, ref)
     if not host:
         raise click.ClickException(f"Hote introuvable : {ref}")
     return host
@@ -68,7 +124,7 @@ def resolve_group(session: Session, ref: str) -> Group:
     if ref.isdigit():
         group = session.get(Group, int(ref))
     else:
-        group = session.query(Group).filter(Group.name == ref).first()
+        group = _resolve_by_name(session, Group, "name", _GROUP_BY_NAME, ref)
     if not group:
         raise click.ClickException(f"Groupe introuvable : {ref}")
     return group
@@ -79,7 +135,7 @@ def resolve_variable(session: Session, ref: str) -> Variable:
     if ref.isdigit():
         var = session.get(Variable, int(ref))
     else:
-        var = session.query(Variable).filter(Variable.var_key == ref).first()
+        var = _resolve_by_name(session, Variable, "var_key", _VARIABLE_BY_KEY, ref)
     if not var:
         raise click.ClickException(f"Variable introuvable : {ref}")
     return var
@@ -97,41 +153,44 @@ def output_table(
 ) -> None:
     """Affiche des donnees en tableau ou JSON."""
     if is_json_mode(ctx):
-        click.echo(json.dumps(list(data), indent=2, default=str))
+        click.echo(dump_json(list(data)))
         return
 
     if not data:
         click.echo("Aucun resultat.")
         return
 
-    # Calcul des largeurs de colonnes
-    widths = {col: len(col) for col in columns}
-    for row in data:
-        for col in columns:
-            val = str(row.get(col, ""))
-            widths[col] = max(widths[col], len(val))
+    # Cellules converties une seule fois, reutilisees pour largeurs et lignes
+    cells = [[str(row.get(col, "")) for col in columns] for row in data]
+    widths = [
+        max(len(col), max(len(r[i]) for r in cells)) for i, col in enumerate(columns)
+    ]
 
-    # En-tete
-    header = "  ".join(col.upper().ljust(widths[col]) for col in columns)
-    separator = "  ".join("-" * widths[col] for col in columns)
-    click.echo(header)
-    click.echo(separator)
-
-    # Lignes
-    for row in data:
-        line = "  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns)
-        click.echo(line)
+    # gabarit de ligne construit une fois : une seule mise en forme par ligne
+    fmt = "  ".join(f"{{:<{w}}}" for w in widths)
+    lines = [
+        fmt.format(*(col.upper() for col in columns)),
+        fmt.format(*("-" * w for w in widths)),
+    ]
+    lines.extend(fmt.format(*r) for r in cells)
+    # une seule ecriture pour tout le tableau
+    click.echo("\n".join(lines))
 
 
 def output_detail(ctx: click.Context, data: Dict[str, Any]) -> None:
     """Affiche un detail cle/valeur ou JSON."""
     if is_json_mode(ctx):
-        click.echo(json.dumps(data, indent=2, default=str))
+        click.echo(dump_json(data))
+        return
+
+    if not data:
         return
 
-    max_key_len = max(len(str(k)) for k in data.keys()) if data else 0
-    for key, value in data.items():
-        click.echo(f"  {str(key).ljust(max_key_len)} : {value}")
+    max_key_len = max(len(str(k)) for k in data.keys())
+    lines = [
+        f"  {str(key).ljust(max_key_len)} : {value}" for key, value in data.items()
+    ]
+    click.echo("\n".join(lines))
 
 
 def output_list(
@@ -139,16 +198,15 @@ def output_list(
 ) -> None:
     """Affiche une liste simple ou JSON."""
     if is_json_mode(ctx):
-        click.echo(json.dumps(items, indent=2, default=str))
+        click.echo(dump_json(items))
         return
 
-    if title:
-        click.echo(title)
-    if not items:
-        click.echo("  (vide)")
-        return
-    for item in items:
-        click.echo(f"  - {item}")
+    lines = [title] if title else []
+    if items:
+        lines.extend(f"  - {item}" for item in items)
+    else:
+        lines.append("  (vide)")
+    click.echo("\n".join(lines))
 
 
 def confirm_action(message: str) -> bool:
@@ -1,7 +1,7 @@
 """Sous-commandes CLI pour la gestion des variables"""
 
 import click
-from sqlalchemy import select
+from sqlalchemy import delete, select
 
 from ansibase.models import Variable
 from ansibase.manage.utils import (
@@ -80,8 +80,10 @@ def var_list(ctx, sensitive, builtin, var_type):
 def var_create(ctx, var_key, description, sensitive, var_type, default_value, regex):
     """Creer une variable dans le catalogue."""
     with db_session(ctx) as session:
-        existing = session.query(Variable).filter(Variable.var_key == var_key).first()
-        if existing:
+        existing = session.scalar(
+            select(Variable.id).where(Variable.var_key == var_key)
+        )
+        if existing is not None:
             raise click.ClickException(f"La variable '{var_key}' existe deja.")
 
         v = Variable(
@@ -159,6 +161,7 @@ def var_delete(ctx, ref, force, yes):
             click.echo("Annule.")
             return
 
-        session.delete(v)
-        session.flush()
+        # DELETE direct : la base supprime les valeurs assignees (ON DELETE
+        # CASCADE) sans que la session charge les collections liees
+        session.execute(delete(Variable).where(Variable.id == v.id))
         click.echo(f"Variable '{v.var_key}' supprimee.")
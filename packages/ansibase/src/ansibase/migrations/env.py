@@ -3,6 +3,7 @@ Configuration Alembic pour ansibase (standalone)
 L'URL de la base est injectee par le CLI via config.set_main_option
 """
 
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
@@ -18,24 +19,50 @@ if config.config_file_name is not None:
 # Pas d'autogenerate, les migrations sont manuelles (SQL brut)
 target_metadata = None
 
+# Options communes aux deux modes : une transaction par migration (une
+# migration en echec n'annule pas les precedentes), pas de mode batch
+# (reserve a SQLite)
+_CONFIGURE_OPTS = {
+    "target_metadata": target_metadata,
+    "version_table": "alembic_version_core",
+    "transaction_per_migration": True,
+    "render_as_batch": False,
+}
+
 
 def run_migrations_offline() -> None:
     """Migrations en mode offline (generation SQL sans connexion)"""
     url = config.get_main_option("sqlalchemy.url")
+    # les migrations sont en SQL brut, sans parametres : le rendu des
+    # litteraux n'est active qu'a la demande (ANSIBASE_OFFLINE_LITERAL=1)
     context.configure(
         url=url,
-        target_metadata=target_metadata,
-        literal_binds=True,
+        literal_binds=os.environ.get("ANSIBASE_OFFLINE_LITERAL") == "1",
         dialect_opts={"paramstyle": "named"},
-        version_table="alembic_version_core",
+        **_CONFIGURE_OPTS,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 
+def _run_with_connection(connection) -> None:
+    context.configure(connection=connection, **_CONFIGURE_OPTS)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
     """Migrations en mode online (connexion directe a la base)"""
+    # connexion fournie par l'appelant (config.attributes["connection"]) :
+    # reutilisee telle quelle, sans nouvelle connexion ni nouvel engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    # execution ponctuelle (une commande par processus) : pas de pool
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -43,14 +70,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            version_table="alembic_version_core",
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        _run_with_connection(connection)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,29 @@
+"""Index trigramme sur le nom des hotes
+
+Revision ID: 002
+Revises: 001
+
+Index: GIN pg_trgm sur ansibase_hosts(name), utilise par les recherches
+       ILIKE '%...%' (sans lui, chaque recherche parcourt toute la table)
+"""
+
+from alembic import op
+
+revision = "002_hosts_name_trgm.core"
+down_revision = "001_init.core"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Extension pg_trgm
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ansibase_hosts_name_trgm "
+        "ON ansibase_hosts USING gin (name gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_ansibase_hosts_name_trgm")
@@ -0,0 +1,36 @@
+"""Index des filtres du catalogue de variables
+
+Revision ID: 003
+Revises: 002
+
+Index: (var_type, id) et index partiels sur id pour is_sensitive / is_ansible_builtin,
+       adaptes au filtrage + tri par id de la liste des variables
+"""
+
+from alembic import op
+
+revision = "003_variables_filters.core"
+down_revision = "002_hosts_name_trgm.core"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ansibase_variables_type_id "
+        "ON ansibase_variables(var_type, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ansibase_variables_sensitive_id "
+        "ON ansibase_variables(id) WHERE is_sensitive"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ansibase_variables_builtin_id "
+        "ON ansibase_variables(id) WHERE is_ansible_builtin"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_ansibase_variables_builtin_id")
+    op.execute("DROP INDEX IF EXISTS idx_ansibase_variables_sensitive_id")
+    op.execute("DROP INDEX IF EXISTS idx_ansibase_variables_type_id")
@@ -0,0 +1,71 @@
+"""Index inverses des tables de liaison
+
+Revision ID: 004
+Revises: 003
+
+Index: (group_id, host_id) sur ansibase_host_groups, (var_id, host_id) et
+       (var_id, group_id) sur les tables de variables ; ils completent les
+       contraintes UNIQUE dans l'autre sens (parcours index-only "hotes d'un
+       groupe", "porteurs d'une variable") et remplacent les index simples
+       group_id / var_id devenus redondants
+"""
+
+from alembic import op
+
+revision = "004_assoc_reverse_idx.core"
+down_revision = "003_variables_filters.core"
+branch_labels = None
+depends_on = None
+
+# (nouvel index, table, colonnes, index simple remplace, colonne de celui-ci)
+_INDEXES = [
+    (
+        "idx_ansibase_host_groups_group_host",
+        "ansibase_host_groups",
+        "group_id, host_id",
+        "idx_ansibase_host_groups_group",
+        "group_id",
+    ),
+    (
+        "idx_ansibase_host_variables_var_host",
+        "ansibase_host_variables",
+        "var_id, host_id",
+        "idx_ansibase_host_variables_var",
+        "var_id",
+    ),
+    (
+        "idx_ansibase_group_variables_var_group",
+        "ansibase_group_variables",
+        "var_id, group_id",
+        "idx_ansibase_group_variables_var",
+        "var_id",
+    ),
+    (
+        "idx_ansibase_group_req_vars_var_group",
+        "ansibase_group_required_variables",
+        "var_id, group_id",
+        "idx_ansibase_group_req_vars_var",
+        "var_id",
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY : pas de verrou d'ecriture, mais hors transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, replaced, _ in _INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table}({columns})"
+            )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {replaced}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, replaced, replaced_column in reversed(_INDEXES):
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {replaced} "
+                f"ON {table}({replaced_column})"
+            )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
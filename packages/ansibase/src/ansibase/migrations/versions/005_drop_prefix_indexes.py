@@ -0,0 +1,45 @@
+"""Suppression des index simples doublant les contraintes UNIQUE
+
+Revision ID: 005
+Revises: 004
+
+Index: host_id sur ansibase_host_groups et ansibase_host_variables, group_id
+       sur ansibase_group_variables et ansibase_group_required_variables ; la
+       colonne est deja en tete de la contrainte UNIQUE de la table, dont
+       l'index sert les recherches WHERE host_id = ? / host_id IN (...)
+"""
+
+from alembic import op
+
+revision = "005_drop_prefix_indexes.core"
+down_revision = "004_assoc_reverse_idx.core"
+branch_labels = None
+depends_on = None
+
+# (index supprime, table, colonne)
+_INDEXES = [
+    ("idx_ansibase_host_groups_host", "ansibase_host_groups", "host_id"),
+    ("idx_ansibase_host_variables_host", "ansibase_host_variables", "host_id"),
+    ("idx_ansibase_group_variables_group", "ansibase_group_variables", "group_id"),
+    (
+        "idx_ansibase_group_req_vars_group",
+        "ansibase_group_required_variables",
+        "group_id",
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY : pas de verrou d'ecriture, mais hors transaction
+    with op.get_context().autocommit_block():
+        for name, _, _ in _INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in reversed(_INDEXES):
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table}({column})"
+            )
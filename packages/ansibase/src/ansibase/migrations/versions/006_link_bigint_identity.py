@@ -0,0 +1,58 @@
+"""Cles primaires BIGINT IDENTITY sur les tables de liaison
+
+Revision ID: 006
+Revises: 005
+
+Tables: ansibase_host_groups, ansibase_host_variables, ansibase_group_variables
+        passent de SERIAL (INTEGER + sequence) a BIGINT GENERATED BY DEFAULT AS
+        IDENTITY ; les upserts (INSERT ... ON CONFLICT) consomment une valeur
+        de sequence meme sans insertion, le plafond 2^31 est donc atteignable
+"""
+
+from alembic import op
+
+revision = "006_link_bigint_identity.core"
+down_revision = "005_drop_prefix_indexes.core"
+branch_labels = None
+depends_on = None
+
+_TABLES = [
+    "ansibase_host_groups",
+    "ansibase_host_variables",
+    "ansibase_group_variables",
+]
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        # une seule reecriture de la table pour le changement de type
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ALTER COLUMN id DROP DEFAULT, ALTER COLUMN id TYPE BIGINT"
+        )
+        op.execute(f"DROP SEQUENCE IF EXISTS {table}_id_seq")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY"
+        )
+        # l'identite reprend apres le plus grand id existant
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(_TABLES):
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ALTER COLUMN id DROP IDENTITY IF EXISTS, ALTER COLUMN id TYPE INTEGER"
+        )
+        op.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_id_seq OWNED BY {table}.id")
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')"
+        )
+        op.execute(
+            f"SELECT setval('{table}_id_seq', COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {table}"
+        )
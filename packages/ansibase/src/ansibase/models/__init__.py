@@ -7,6 +7,8 @@ from typing import Optional
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import (
+    BigInteger,
+    Identity,
     Integer,
     Text,
     Boolean,
@@ -14,6 +16,7 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     LargeBinary,
+    func,
 )
 
 from .base import Base
@@ -34,8 +37,11 @@ class HostGroup(Base):
     """
 
     __tablename__ = "ansibase_host_groups"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(
+        BigInteger, Identity(always=False), primary_key=True
+    )
     host_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("ansibase_hosts.id", ondelete="CASCADE"), nullable=False
     )
@@ -43,12 +49,16 @@ class HostGroup(Base):
         Integer, ForeignKey("ansibase_groups.id", ondelete="CASCADE"), nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
 
     # Relations
-    host: Mapped["Host"] = relationship("Host", backref="host_group_associations")
-    group: Mapped["Group"] = relationship("Group", backref="host_group_associations")
+    host: Mapped["Host"] = relationship(
+        "Host", back_populates="host_group_associations"
+    )
+    group: Mapped["Group"] = relationship(
+        "Group", back_populates="host_group_associations"
+    )
 
     __table_args__ = (UniqueConstraint("host_id", "group_id"),)
 
@@ -68,8 +78,11 @@ class HostVariable(Base):
     """
 
     __tablename__ = "ansibase_host_variables"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(
+        BigInteger, Identity(always=False), primary_key=True
+    )
     host_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("ansibase_hosts.id", ondelete="CASCADE"), nullable=False
     )
@@ -81,16 +94,16 @@ class HostVariable(Base):
         LargeBinary, nullable=True
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relations
-    host: Mapped["Host"] = relationship("Host", backref="host_variables")
+    host: Mapped["Host"] = relationship("Host", back_populates="host_variables")
     variable: Mapped["Variable"] = relationship(
-        "Variable", backref="host_variable_values"
+        "Variable", back_populates="host_variable_values"
     )
 
     __table_args__ = (UniqueConstraint("host_id", "var_id"),)
@@ -106,8 +119,11 @@ class GroupVariable(Base):
     """
 
     __tablename__ = "ansibase_group_variables"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(
+        BigInteger, Identity(always=False), primary_key=True
+    )
     group_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("ansibase_groups.id", ondelete="CASCADE"), nullable=False
     )
@@ -119,16 +135,16 @@ class GroupVariable(Base):
         LargeBinary, nullable=True
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relations
-    group: Mapped["Group"] = relationship("Group", backref="group_variables")
+    group: Mapped["Group"] = relationship("Group", back_populates="group_variables")
     variable: Mapped["Variable"] = relationship(
-        "Variable", backref="group_variable_values"
+        "Variable", back_populates="group_variable_values"
     )
 
     __table_args__ = (UniqueConstraint("group_id", "var_id"),)
@@ -144,6 +160,7 @@ class GroupRequiredVariable(Base):
     """
 
     __tablename__ = "ansibase_group_required_variables"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     group_id: Mapped[int] = mapped_column(
@@ -155,16 +172,16 @@ class GroupRequiredVariable(Base):
     is_required: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     override_default_value: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     # Relations
-    group: Mapped["Group"] = relationship("Group", backref="required_variables")
+    group: Mapped["Group"] = relationship("Group", back_populates="required_variables")
     variable: Mapped["Variable"] = relationship(
-        "Variable", backref="required_by_groups"
+        "Variable", back_populates="required_by_groups"
     )
 
     __table_args__ = (UniqueConstraint("group_id", "var_id"),)
@@ -173,6 +190,11 @@ class GroupRequiredVariable(Base):
         return f"<GroupRequiredVariable(group_id={self.group_id}, var_id={self.var_id}, required={self.is_required})>"
 
 
+# Configuration des mappers dès l'import (relations résolues une seule fois) :
+# la première requête ne paie plus ce coût
+Base.registry.configure()
+
+
 __all__ = [
     # Base
     "Base",
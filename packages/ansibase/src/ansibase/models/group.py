@@ -3,17 +3,21 @@ Modèles SQLAlchemy pour les groupes
 """
 
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
+if TYPE_CHECKING:
+    from . import GroupRequiredVariable, GroupVariable, HostGroup
+
 
 class Group(Base):
     """Modèle pour la table ansibase_groups"""
 
     __tablename__ = "ansibase_groups"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -22,10 +26,21 @@ class Group(Base):
         Integer, ForeignKey("ansibase_groups.id", ondelete="CASCADE"), nullable=True
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    # Relations (côté inverse des tables de liaison)
+    host_group_associations: Mapped[List["HostGroup"]] = relationship(
+        "HostGroup", back_populates="group"
+    )
+    group_variables: Mapped[List["GroupVariable"]] = relationship(
+        "GroupVariable", back_populates="group"
+    )
+    required_variables: Mapped[List["GroupRequiredVariable"]] = relationship(
+        "GroupRequiredVariable", back_populates="group"
     )
 
     def __repr__(self) -> str:
@@ -3,27 +3,40 @@ Modèles SQLAlchemy pour les hôtes
 """
 
 from datetime import datetime
-from typing import Optional
-from sqlalchemy import Integer, String, Text, Boolean, DateTime
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy import Integer, String, Text, Boolean, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
+if TYPE_CHECKING:
+    from . import HostGroup, HostVariable
+
 
 class Host(Base):
     """Modèle pour la table ansibase_hosts"""
 
     __tablename__ = "ansibase_hosts"
+    # id et horodatages relus par RETURNING dans l'INSERT/UPDATE lui-même
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    # Relations (côté inverse des tables de liaison)
+    host_group_associations: Mapped[List["HostGroup"]] = relationship(
+        "HostGroup", back_populates="host"
+    )
+    host_variables: Mapped[List["HostVariable"]] = relationship(
+        "HostVariable", back_populates="host"
     )
 
     def __repr__(self) -> str:
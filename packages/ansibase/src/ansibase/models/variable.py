@@ -3,7 +3,7 @@ Modèles SQLAlchemy pour les variables
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 from sqlalchemy import (
     Integer,
     String,
@@ -13,16 +13,21 @@ from sqlalchemy import (
     ForeignKey,
     CheckConstraint,
     UniqueConstraint,
+    func,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
+if TYPE_CHECKING:
+    from . import GroupRequiredVariable, GroupVariable, HostVariable
+
 
 class Variable(Base):
     """Modèle pour la table ansibase_variables"""
 
     __tablename__ = "ansibase_variables"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     var_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -35,10 +40,21 @@ class Variable(Base):
         Boolean, default=False, nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    # Relations (côté inverse des tables de liaison)
+    host_variable_values: Mapped[List["HostVariable"]] = relationship(
+        "HostVariable", back_populates="variable"
+    )
+    group_variable_values: Mapped[List["GroupVariable"]] = relationship(
+        "GroupVariable", back_populates="variable"
+    )
+    required_by_groups: Mapped[List["GroupRequiredVariable"]] = relationship(
+        "GroupRequiredVariable", back_populates="variable"
     )
 
     def __repr__(self) -> str:
@@ -49,6 +65,7 @@ class VariableAlias(Base):
     """Modèle pour la table ansibase_variable_aliases"""
 
     __tablename__ = "ansibase_variable_aliases"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     alias_var_id: Mapped[int] = mapped_column(
@@ -59,10 +76,10 @@ class VariableAlias(Base):
     )
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
     )
 
     __table_args__ = (
@@ -0,0 +1,75 @@
+"""
+Tests du chargement de configuration : lecteur INI rapide contre ConfigParser
+"""
+
+import configparser
+
+import pytest
+
+from ansibase import config as config_module
+
+_BASE = """
+[database]
+host = localhost
+port = 5432
+database = ansible_inventory
+user = ansible
+password = a%%b%c
+"""
+
+_ENCRYPTION = """
+[encryption]
+# commentaire
+key = ANSIBASE_central
+"""
+
+CASES = {
+    "simple": _BASE + _ENCRYPTION,
+    "cache": _BASE + _ENCRYPTION + "[cache]\nenabled = no\nttl: 60\n",
+    "default": "[DEFAULT]\nttl = 60\nenabled = false\n"
+    + _BASE + _ENCRYPTION + "[cache]\n",
+    "continuation": _BASE + "  suite\n" + _ENCRYPTION,
+    "continuation_section": _BASE + _ENCRYPTION + "  [cache]\nttl = 10\n",
+    "cle_en_double": _BASE + "host = autre\n" + _ENCRYPTION,
+    "section_en_double": _BASE + _ENCRYPTION + "[encryption]\nkey = x\n",
+    "cle_sans_valeur": _BASE + "orpheline\n" + _ENCRYPTION,
+}
+
+
+def _load(tmp_path, monkeypatch, text, fast):
+    monkeypatch.setattr(config_module, "USE_FAST_INI", fast)
+    path = tmp_path / f"ansibase_{fast}.ini"
+    path.write_text(text, encoding="utf-8")
+    try:
+        return config_module._load_ini(path)
+    except (configparser.Error, ValueError) as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_lecteur_rapide_identique_a_configparser(tmp_path, monkeypatch, name):
+    """Meme resultat (ou meme erreur) avec et sans le lecteur rapide"""
+    text = CASES[name]
+    assert _load(tmp_path, monkeypatch, text, True) == _load(
+        tmp_path, monkeypatch, text, False
+    )
+
+
+def test_section_default_heritee(tmp_path, monkeypatch):
+    """[DEFAULT] s'applique a la section cache"""
+    result = _load(tmp_path, monkeypatch, CASES["default"], True)
+    assert result["cache"] == {"enabled": False, "ttl": 60}
+
+
+def test_pourcent_echappe(tmp_path, monkeypatch):
+    """%% est lu comme %, un % seul tel quel"""
+    result = _load(tmp_path, monkeypatch, CASES["simple"], True)
+    assert result["database"]["password"] == "a%b%c"
+
+
+@pytest.mark.parametrize("name", ["simple", "cache"])
+def test_lecteur_rapide_utilise(name):
+    """Les fichiers simples sont lus sans repli sur ConfigParser"""
+    assert config_module._parse_ini_fast(CASES[name])["encryption"]["key"] == (
+        "ANSIBASE_central"
+    )
@@ -0,0 +1,42 @@
+"""
+Tests des migrations : chaque revision doit tenir dans version_num (VARCHAR(32))
+"""
+
+import ast
+from pathlib import Path
+
+import pytest
+
+import ansibase
+
+VERSIONS_DIR = Path(ansibase.__file__).parent / "migrations" / "versions"
+
+# Taille de la colonne version_num de la table de suivi
+VERSION_NUM_LENGTH = 32
+
+
+def _revision_ids(path: Path) -> dict:
+    """Lit revision et down_revision sans importer le module de migration"""
+    ids = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    ids[target.id] = node.value.value
+    return ids
+
+
+MIGRATIONS = sorted(VERSIONS_DIR.glob("[0-9]*.py"))
+
+
+@pytest.mark.parametrize("path", MIGRATIONS, ids=lambda p: p.stem)
+def test_revision_tient_dans_version_num(path):
+    revision = _revision_ids(path)["revision"]
+    assert len(revision) <= VERSION_NUM_LENGTH
+
+
+def test_chaine_de_revisions():
+    revisions = [_revision_ids(path) for path in MIGRATIONS]
+    assert revisions[0]["down_revision"] is None
+    for previous, current in zip(revisions, revisions[1:]):
+        assert current["down_revision"] == previous["revision"]